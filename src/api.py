@@ -6,15 +6,25 @@ Provides endpoints to search and download archived emails.
 from __future__ import annotations
 
 import os
-import json
+import stat
+import time
+import base64
 import logging
-from datetime import datetime, date
+import functools
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timedelta
 from typing import Optional
 
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import FileResponse, JSONResponse
+import orjson
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, Response
 from pydantic import BaseModel, Field
 
+from .search_index import SearchIndex, SearchIndexError, search_result_key
+
 logger = logging.getLogger(__name__)
 
 # API Application
@@ -89,6 +99,7 @@ class SearchResponse(BaseModel):
     """Response model for search results."""
     total: int
     results: list[SearchResult]
+    next_cursor: Optional[str] = None
 
 
 class HealthResponse(BaseModel):
@@ -114,10 +125,170 @@ def get_base_path() -> str:
     return os.environ.get("PEC_ARCHIVE_BASE_PATH", "/data/pec-archive")
 
 
+@functools.lru_cache(maxsize=8)
+def _abs_base_path(base_path: str) -> str:
+    """Get the absolute form of a base path, computed once per path."""
+    return os.path.abspath(base_path)
+
+
+def is_within_base_path(path: str, base_path: str) -> bool:
+    """
+    Check that a path resolves inside the archive base path.
+    
+    Compares whole path components, so a sibling directory sharing the
+    base path as a string prefix (e.g. /data/pec-archive-old) is rejected.
+    
+    Args:
+        path: Path to check
+        base_path: Archive base path
+    
+    Returns:
+        True if path is the base path or inside it
+    """
+    abs_base_path = _abs_base_path(base_path)
+    return os.path.commonpath([os.path.abspath(path), abs_base_path]) == abs_base_path
+
+
+# Maximum number of threads used to read index files in scan_emails
+SCAN_MAX_WORKERS = 32
+
+# Search indexes by archive base path
+_search_indexes: dict[str, SearchIndex] = {}
+# Monotonic time of the last failed index creation, by archive base path
+_search_index_failures: dict[str, float] = {}
+_search_indexes_lock = threading.Lock()
+
+# Seconds after which a search starts a background refresh of the index;
+# also the minimum delay before retrying an index that could not be created
+SEARCH_INDEX_REFRESH_INTERVAL = 60
+
+
+def get_search_index(base_path: str) -> Optional[SearchIndex]:
+    """
+    Get the SQLite search index for an archive base path.
+    
+    The database location can be overridden with the PEC_SEARCH_DB_PATH
+    environment variable (useful when the archive is mounted read-only).
+    
+    Args:
+        base_path: Archive base path
+    
+    Returns:
+        SearchIndex instance, or None if the index cannot be used
+        (creation is retried at most every SEARCH_INDEX_REFRESH_INTERVAL
+        seconds)
+    """
+    with _search_indexes_lock:
+        search_index = _search_indexes.get(base_path)
+        if search_index is None:
+            failed_at = _search_index_failures.get(base_path)
+            now = time.monotonic()
+            if failed_at is not None and now - failed_at < SEARCH_INDEX_REFRESH_INTERVAL:
+                return None
+            try:
+                search_index = SearchIndex(
+                    base_path,
+                    db_path=os.environ.get("PEC_SEARCH_DB_PATH")
+                )
+            except SearchIndexError as e:
+                _search_index_failures[base_path] = now
+                logger.warning(f"Search index unavailable, using filesystem scan: {e}")
+                return None
+            _search_index_failures.pop(base_path, None)
+            _search_indexes[base_path] = search_index
+        return search_index
+
+
+# In-memory cache of parsed index.json files.
+# Maps index path -> IndexCacheEntry, kept in LRU order.
+INDEX_CACHE_MAX_ENTRIES = 4096
+
+
+# Searchable fields of an index: subject, sender, and To + Cc
+SEARCH_FIELD_SUBJECT = 0
+SEARCH_FIELD_SENDER = 1
+SEARCH_FIELD_RECIPIENT = 2
+
+# Separator between values joined into one search blob. Search terms
+# containing it never match, so a hit cannot span two values.
+_FIELD_SEPARATOR = "\x00"
+
+
+class IndexCacheEntry:
+    """Parsed index.json contents plus lazily built search fields."""
+    
+    __slots__ = ("stamp", "emails", "search_fields")
+    
+    def __init__(self, stamp: tuple[int, int], emails: list[dict]):
+        self.stamp = stamp
+        self.emails = emails
+        # Per search field: (lowercased values joined by _FIELD_SEPARATOR,
+        # start offset of each email's value in the joined string)
+        self.search_fields: Optional[list[tuple[str, list[int]]]] = None
+
+
+_index_cache: OrderedDict[str, IndexCacheEntry] = OrderedDict()
+_index_cache_lock = threading.Lock()
+
+
+def clear_index_cache() -> None:
+    """Drop all cached index.json contents."""
+    with _index_cache_lock:
+        _index_cache.clear()
+
+
+def _load_index_entry(account_path: str, date_dir: str) -> Optional[IndexCacheEntry]:
+    """
+    Load the cache entry for an account and date directory.
+    
+    Parsed contents are reused as long as the file's mtime and size
+    are unchanged.
+    
+    Returns:
+        Cache entry, or None if the index is missing or unreadable
+    """
+    # Find the year subdirectory
+    year = date_dir[:4]
+    index_path = os.path.join(account_path, year, date_dir, "index.json")
+    
+    try:
+        st = os.stat(index_path)
+    except OSError:
+        return None
+    
+    stamp = (st.st_mtime_ns, st.st_size)
+    
+    with _index_cache_lock:
+        cached = _index_cache.get(index_path)
+        if cached is not None and cached.stamp == stamp:
+            _index_cache.move_to_end(index_path)
+            return cached
+    
+    try:
+        with open(index_path, "rb") as f:
+            index_data = orjson.loads(f.read())
+    except (orjson.JSONDecodeError, OSError) as e:
+        logger.error(f"Failed to load index.json from {index_path}: {e}")
+        return None
+    
+    entry = IndexCacheEntry(stamp, index_data)
+    with _index_cache_lock:
+        _index_cache[index_path] = entry
+        _index_cache.move_to_end(index_path)
+        while len(_index_cache) > INDEX_CACHE_MAX_ENTRIES:
+            _index_cache.popitem(last=False)
+    
+    return entry
+
+
 def load_index_json(account_path: str, date_dir: str) -> list[dict]:
     """
     Load index.json from a specific account and date directory.
     
+    Parsed contents are cached in memory and reused as long as the
+    file's mtime and size are unchanged. The returned list is shared
+    with the cache and must not be modified by callers.
+    
     Args:
         account_path: Path to account directory
         date_dir: Date directory name (YYYY-MM-DD)
@@ -125,21 +296,174 @@ def load_index_json(account_path: str, date_dir: str) -> list[dict]:
     Returns:
         List of email metadata dictionaries
     """
-    # Find the year subdirectory
-    year = date_dir[:4]
-    index_path = os.path.join(account_path, year, date_dir, "index.json")
+    entry = _load_index_entry(account_path, date_dir)
+    return entry.emails if entry is not None else []
+
+
+def _build_search_field(values: list[str]) -> tuple[str, list[int]]:
+    """Join lowercased values into one search blob with per-value offsets."""
+    starts = []
+    offset = 0
+    for value in values:
+        starts.append(offset)
+        offset += len(value) + 1
+    return _FIELD_SEPARATOR.join(values), starts
+
+
+def _find_matching_rows(search_field: tuple[str, list[int]], term: str) -> set[int]:
+    """
+    Find the values of a search field that contain a term.
     
-    if not os.path.exists(index_path):
+    The joined blob is scanned with str.find, so the whole index is
+    matched in C; after a hit the scan resumes at the next value.
+    """
+    blob, starts = search_field
+    rows = set()
+    pos = blob.find(term)
+    while pos != -1:
+        row = bisect_right(starts, pos) - 1
+        rows.add(row)
+        if row + 1 >= len(starts):
+            break
+        pos = blob.find(term, starts[row + 1])
+    return rows
+
+
+def find_index_matches(
+    account_path: str,
+    date_dir: str,
+    checks: list[tuple[int, str]]
+) -> list[dict]:
+    """
+    Find the emails of an index.json that match all search checks.
+    
+    The lowercased search fields are built once per cached index file,
+    so repeated searches do not lowercase every email again.
+    
+    Args:
+        account_path: Path to account directory
+        date_dir: Date directory name (YYYY-MM-DD)
+        checks: List of (SEARCH_FIELD_*, lowercased term) pairs
+    
+    Returns:
+        Matching email metadata dictionaries, in index order
+    """
+    entry = _load_index_entry(account_path, date_dir)
+    if entry is None:
         return []
+    if not checks:
+        return list(entry.emails)
     
-    try:
-        with open(index_path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, OSError) as e:
-        logger.error(f"Failed to load index.json from {index_path}: {e}")
+    fields = entry.search_fields
+    if fields is None:
+        emails = entry.emails
+        fields = [
+            _build_search_field([e.get("subject", "").lower() for e in emails]),
+            _build_search_field([e.get("from", "").lower() for e in emails]),
+            _build_search_field([
+                e.get("to", "").lower() + _FIELD_SEPARATOR + e.get("cc", "").lower()
+                for e in emails
+            ])
+        ]
+        entry.search_fields = fields
+    
+    if any(_FIELD_SEPARATOR in term for _, term in checks):
         return []
+    
+    # The first check scans its whole column; the remaining ones only
+    # test the candidate rows that are still left.
+    field, term = checks[0]
+    rows = _find_matching_rows(fields[field], term)
+    for field, term in checks[1:]:
+        if not rows:
+            break
+        blob, starts = fields[field]
+        last = len(starts) - 1
+        rows = {
+            row for row in rows
+            if term in blob[starts[row]:starts[row + 1] - 1 if row < last else len(blob)]
+        }
+    
+    return [entry.emails[row] for row in sorted(rows)]
+
+
+def read_summary_message_count(date_path: str) -> Optional[int]:
+    """
+    Read the message count of a date directory from its summary.json.
+    
+    summary.json is written by the archiver after index.json and is much
+    smaller, so this avoids parsing the full index just to count it.
+    
+    Args:
+        date_path: Path to the account's date directory
+    
+    Returns:
+        Message count, or None if summary.json is missing, unreadable or
+        older than index.json
+    """
+    summary_path = os.path.join(date_path, "summary.json")
+    index_path = os.path.join(date_path, "index.json")
+    
+    try:
+        summary_mtime = os.stat(summary_path).st_mtime_ns
+        if os.stat(index_path).st_mtime_ns > summary_mtime:
+            return None
+        with open(summary_path, "rb") as f:
+            summary = orjson.loads(f.read())
+        count = summary["statistics"]["total_messages"]
+    except (OSError, orjson.JSONDecodeError, KeyError, TypeError):
+        return None
+    
+    return count if isinstance(count, int) else None
+
+
+# Account and date listings only change when a backup runs, so they are
+# cached briefly to absorb clients polling the list endpoints.
+LISTING_CACHE_TTL = 60
+LISTING_CACHE_MAX_ENTRIES = 256
+_listing_cache: OrderedDict[tuple, tuple[float, list[dict]]] = OrderedDict()
+_listing_cache_lock = threading.Lock()
+
+
+def clear_listing_cache() -> None:
+    """Drop all cached account and date listings."""
+    with _listing_cache_lock:
+        _listing_cache.clear()
+
+
+def _listing_cached(func):
+    """
+    Cache a listing function's result for LISTING_CACHE_TTL seconds.
+    
+    Results are keyed on the function, the archive base path and the
+    positional arguments. Cached lists are shared and must not be modified.
+    """
+    @functools.wraps(func)
+    def wrapper(*args):
+        key = (func.__name__, get_base_path()) + args
+        now = time.monotonic()
+        
+        with _listing_cache_lock:
+            cached = _listing_cache.get(key)
+            if cached is not None and now - cached[0] < LISTING_CACHE_TTL:
+                _listing_cache.move_to_end(key)
+                return cached[1]
+        
+        value = func(*args)
+        
+        with _listing_cache_lock:
+            _listing_cache[key] = (now, value)
+            _listing_cache.move_to_end(key)
+            # Evict least recently used listings
+            while len(_listing_cache) > LISTING_CACHE_MAX_ENTRIES:
+                _listing_cache.popitem(last=False)
+        
+        return value
+    
+    return wrapper
 
 
+@_listing_cached
 def get_accounts() -> list[dict]:
     """
     Get list of all accounts in the archive.
@@ -153,22 +477,25 @@ def get_accounts() -> list[dict]:
     if not os.path.exists(base_path):
         return accounts
     
-    for account_name in os.listdir(base_path):
-        account_path = os.path.join(base_path, account_name)
-        if os.path.isdir(account_path):
-            years = []
-            for year_dir in os.listdir(account_path):
-                year_path = os.path.join(account_path, year_dir)
-                if os.path.isdir(year_path) and year_dir.isdigit():
-                    years.append(year_dir)
+    with os.scandir(base_path) as account_entries:
+        for account_entry in account_entries:
+            if not account_entry.is_dir():
+                continue
+            with os.scandir(account_entry.path) as year_entries:
+                years = [
+                    year_entry.name
+                    for year_entry in year_entries
+                    if year_entry.name.isdigit() and year_entry.is_dir()
+                ]
             accounts.append({
-                "name": account_name,
+                "name": account_entry.name,
                 "years": sorted(years, reverse=True)
             })
     
     return accounts
 
 
+@_listing_cached
 def get_dates_for_account(account: str, year: str) -> list[dict]:
     """
     Get list of archived dates for an account in a specific year.
@@ -187,15 +514,18 @@ def get_dates_for_account(account: str, year: str) -> list[dict]:
     if not os.path.exists(year_path):
         return dates
     
-    for date_dir in os.listdir(year_path):
-        date_path = os.path.join(year_path, date_dir)
-        if os.path.isdir(date_path):
-            # Count messages from index.json
-            index_data = load_index_json(os.path.join(base_path, account), date_dir)
-            dates.append({
-                "date": date_dir,
-                "message_count": len(index_data)
-            })
+    account_path = os.path.join(base_path, account)
+    with os.scandir(year_path) as date_entries:
+        for date_entry in date_entries:
+            if date_entry.is_dir():
+                message_count = read_summary_message_count(date_entry.path)
+                if message_count is None:
+                    # Count messages from index.json
+                    message_count = len(load_index_json(account_path, date_entry.name))
+                dates.append({
+                    "date": date_entry.name,
+                    "message_count": message_count
+                })
     
     return sorted(dates, key=lambda x: x["date"], reverse=True)
 
@@ -208,11 +538,15 @@ def search_emails(
     date_to: Optional[date] = None,
     account: Optional[str] = None,
     limit: int = 100,
-    offset: int = 0
+    offset: int = 0,
+    after: Optional[tuple[str, str, str, str]] = None
 ) -> tuple[list[dict], int]:
     """
     Search emails across all accounts and dates.
     
+    Uses the SQLite search index when available and falls back to
+    scanning the archive otherwise.
+    
     Args:
         subject: Subject filter (case-insensitive partial match)
         sender: Sender filter (case-insensitive partial match)
@@ -222,6 +556,155 @@ def search_emails(
         account: Account filter
         limit: Maximum results to return
         offset: Offset for pagination
+        after: Only return results ordered after this key (keyset cursor)
+    
+    Returns:
+        Tuple of (list of matching emails, total count)
+    """
+    base_path = get_base_path()
+    
+    if not os.path.exists(base_path):
+        return [], 0
+    
+    search_index = get_search_index(base_path)
+    if search_index is not None:
+        try:
+            search_index.refresh_if_stale(SEARCH_INDEX_REFRESH_INTERVAL)
+            return search_index.search(
+                subject=subject,
+                sender=sender,
+                recipient=recipient,
+                date_from=date_from,
+                date_to=date_to,
+                account=account,
+                limit=limit,
+                offset=offset,
+                after=after
+            )
+        except SearchIndexError as e:
+            logger.error(f"Indexed search failed, using filesystem scan: {e}")
+    
+    return scan_emails(
+        subject=subject,
+        sender=sender,
+        recipient=recipient,
+        date_from=date_from,
+        date_to=date_to,
+        account=account,
+        limit=limit,
+        offset=offset,
+        after=after
+    )
+
+
+# Date ranges up to this many days are resolved by probing each date
+# directory directly instead of listing whole year directories.
+DATE_PROBE_MAX_DAYS = 62
+
+
+def _is_date_dir_name(name: str) -> bool:
+    """Check that a directory name has the YYYY-MM-DD shape."""
+    return (
+        len(name) == 10
+        and name[4] == "-"
+        and name[7] == "-"
+        and name[:4].isdigit()
+        and name[5:7].isdigit()
+        and name[8:].isdigit()
+    )
+
+
+def list_date_dirs(
+    account_path: str,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+) -> list[str]:
+    """
+    List the date directories of an account within a date range.
+    
+    Year directories outside the range are not listed at all, and short
+    ranges are resolved by checking each date directory directly.
+    
+    Args:
+        account_path: Path to account directory
+        date_from: Start date filter (inclusive)
+        date_to: End date filter (inclusive)
+    
+    Returns:
+        List of date directory names (YYYY-MM-DD)
+    """
+    if date_from and date_to:
+        if date_from > date_to:
+            return []
+        days = (date_to - date_from).days + 1
+        if days <= DATE_PROBE_MAX_DAYS:
+            candidates = [
+                (date_from + timedelta(days=i)).isoformat() for i in range(days)
+            ]
+            return [
+                d for d in candidates
+                if os.path.isdir(os.path.join(account_path, d[:4], d))
+            ]
+    
+    date_dirs = []
+    date_from_str = date_from.isoformat() if date_from else None
+    date_to_str = date_to.isoformat() if date_to else None
+    
+    # Iterate through years, skipping those outside the range
+    with os.scandir(account_path) as year_entries:
+        year_paths = [
+            entry.path for entry in year_entries
+            if entry.name.isdigit()
+            and not (date_from and int(entry.name) < date_from.year)
+            and not (date_to and int(entry.name) > date_to.year)
+            and entry.is_dir()
+        ]
+    
+    for year_path in year_paths:
+        # Iterate through dates
+        with os.scandir(year_path) as date_entries:
+            names = [entry.name for entry in date_entries if entry.is_dir()]
+        
+        for date_dir in names:
+            # ISO dates sort chronologically, so compare the strings directly
+            if not _is_date_dir_name(date_dir):
+                continue
+            if date_from_str and date_dir < date_from_str:
+                continue
+            if date_to_str and date_dir > date_to_str:
+                continue
+            
+            date_dirs.append(date_dir)
+    
+    return date_dirs
+
+
+def scan_emails(
+    subject: Optional[str] = None,
+    sender: Optional[str] = None,
+    recipient: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    account: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0,
+    after: Optional[tuple[str, str, str, str]] = None
+) -> tuple[list[dict], int]:
+    """
+    Search emails by walking the archive and reading every index.json.
+    
+    Used when the SQLite search index is not available.
+    
+    Args:
+        subject: Subject filter (case-insensitive partial match)
+        sender: Sender filter (case-insensitive partial match)
+        recipient: Recipient filter (case-insensitive partial match)
+        date_from: Start date filter
+        date_to: End date filter
+        account: Account filter
+        limit: Maximum results to return
+        offset: Offset for pagination
+        after: Only return results ordered after this key (keyset cursor)
     
     Returns:
         Tuple of (list of matching emails, total count)
@@ -238,71 +721,218 @@ def search_emails(
         if os.path.exists(account_path):
             accounts_to_search = [account]
     else:
-        accounts_to_search = [
-            d for d in os.listdir(base_path)
-            if os.path.isdir(os.path.join(base_path, d))
-        ]
+        with os.scandir(base_path) as account_entries:
+            accounts_to_search = [
+                entry.name for entry in account_entries if entry.is_dir()
+            ]
     
+    # Collect the (account, date) directories to search
+    date_dirs_to_search = []
     for acc in accounts_to_search:
         account_path = os.path.join(base_path, acc)
-        
-        # Iterate through years
-        for year_dir in os.listdir(account_path):
-            year_path = os.path.join(account_path, year_dir)
-            if not os.path.isdir(year_path) or not year_dir.isdigit():
-                continue
-            
-            # Iterate through dates
-            for date_dir in os.listdir(year_path):
-                date_path = os.path.join(year_path, date_dir)
-                if not os.path.isdir(date_path):
-                    continue
-                
-                # Check date filter
-                try:
-                    email_date = datetime.strptime(date_dir, "%Y-%m-%d").date()
-                    if date_from and email_date < date_from:
-                        continue
-                    if date_to and email_date > date_to:
-                        continue
-                except ValueError:
-                    continue
-                
-                # Load index and search
-                index_data = load_index_json(account_path, date_dir)
-                for email in index_data:
-                    # Apply filters
-                    if subject:
-                        email_subject = email.get("subject", "").lower()
-                        if subject.lower() not in email_subject:
-                            continue
-                    
-                    if sender:
-                        email_sender = email.get("from", "").lower()
-                        if sender.lower() not in email_sender:
-                            continue
-                    
-                    if recipient:
-                        email_to = email.get("to", "").lower()
-                        email_cc = email.get("cc", "").lower()
-                        if recipient.lower() not in email_to and recipient.lower() not in email_cc:
-                            continue
-                    
-                    # Add to results
-                    results.append({
-                        "account": acc,
-                        "date": date_dir,
-                        "email": email
-                    })
+        for date_dir in list_date_dirs(account_path, date_from, date_to):
+            date_dirs_to_search.append((acc, account_path, date_dir))
+    
+    # Build the filter once per request: (search field, lowercased term)
+    checks = [
+        (field, term.lower())
+        for field, term in (
+            (SEARCH_FIELD_SUBJECT, subject),
+            (SEARCH_FIELD_SENDER, sender),
+            (SEARCH_FIELD_RECIPIENT, recipient)
+        )
+        if term
+    ]
+    
+    def search_date_dir(item: tuple[str, str, str]) -> list[dict]:
+        """Load one index.json and return its matching emails."""
+        acc, account_path, date_dir = item
+        return [
+            {
+                "account": acc,
+                "date": date_dir,
+                "email": email
+            }
+            for email in find_index_matches(account_path, date_dir, checks)
+        ]
+    
+    if not checks:
+        return _scan_date_only(date_dirs_to_search, limit, offset, after)
+    
+    # Reading and parsing index files is I/O bound, so fan out over threads
+    if len(date_dirs_to_search) > 1:
+        with ThreadPoolExecutor(max_workers=SCAN_MAX_WORKERS) as executor:
+            for matches in executor.map(search_date_dir, date_dirs_to_search):
+                results.extend(matches)
+    else:
+        for item in date_dirs_to_search:
+            results.extend(search_date_dir(item))
     
     # Sort by date (newest first)
-    results.sort(key=lambda x: x["date"], reverse=True)
+    results.sort(key=search_result_key, reverse=True)
     
     total = len(results)
+    if after is not None:
+        results = [r for r in results if search_result_key(r) < after]
+    return results[offset:offset + limit], total
+
+
+def _scan_date_only(
+    date_dirs: list[tuple[str, str, str]],
+    limit: int,
+    offset: int,
+    after: Optional[tuple[str, str, str, str]]
+) -> tuple[list[dict], int]:
+    """
+    Scan for a query without text filters, stopping once the page is full.
+    
+    Results are ordered by (date, account, ...) descending, so walking the
+    directories in that order means every later directory sorts after all
+    results already collected. Every email matches, so the total is taken
+    from the per-date message counts without loading the remaining indexes.
+    
+    Args:
+        date_dirs: List of (account, account path, date directory) tuples
+        limit: Maximum results to return
+        offset: Offset for pagination
+        after: Only return results ordered after this key (keyset cursor)
+    
+    Returns:
+        Tuple of (list of matching emails, total count)
+    """
+    date_dirs = sorted(date_dirs, key=lambda item: (item[2], item[0]), reverse=True)
+    needed = offset + limit
+    results = []
+    total = 0
+    
+    for acc, account_path, date_dir in date_dirs:
+        if len(results) >= needed or (after is not None and (date_dir, acc) > after[:2]):
+            count = read_summary_message_count(
+                os.path.join(account_path, date_dir[:4], date_dir)
+            )
+            if count is None:
+                count = len(load_index_json(account_path, date_dir))
+            total += count
+            continue
+        
+        emails = load_index_json(account_path, date_dir)
+        total += len(emails)
+        matches = [
+            {
+                "account": acc,
+                "date": date_dir,
+                "email": email
+            }
+            for email in emails
+        ]
+        if after is not None:
+            matches = [r for r in matches if search_result_key(r) < after]
+        results.extend(matches)
+    
+    results.sort(key=search_result_key, reverse=True)
     return results[offset:offset + limit], total
 
 
+def encode_cursor(key: tuple[str, str, str, str]) -> str:
+    """Encode a search result key as an opaque pagination cursor."""
+    return base64.urlsafe_b64encode(orjson.dumps(list(key))).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[str, str, str, str]:
+    """
+    Decode a pagination cursor produced by encode_cursor.
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        key = orjson.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeEncodeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(key, list) or len(key) != 4 or not all(isinstance(k, str) for k in key):
+        raise ValueError("Invalid cursor")
+    return tuple(key)
+
+
+# Output keys of EmailInfo (by alias) and their defaults; fields without a
+# model default get an empty value of their type, so entries of older
+# index.json files missing a field never serialize it as null
+_EMAIL_FIELDS = tuple(
+    (
+        field.alias or name,
+        (0 if field.annotation is int else "") if field.is_required() else field.default
+    )
+    for name, field in EmailInfo.model_fields.items()
+)
+
+
+def email_payload(email: dict) -> dict:
+    """
+    Shape an index.json entry like a serialized EmailInfo without validation.
+    
+    Args:
+        email: Email metadata dictionary from index.json
+    
+    Returns:
+        Dictionary with exactly the EmailInfo output keys
+    """
+    return {key: email.get(key, default) for key, default in _EMAIL_FIELDS}
+
+
+def json_response(content: dict) -> Response:
+    """Serialize trusted response data with orjson, bypassing model validation."""
+    return Response(content=orjson.dumps(content), media_type="application/json")
+
+
+# Cache policy for downloaded files. Archived files do not change in
+# place, but re-running a backup for a date rewrites them under the same
+# URL, so clients cache for a day and revalidate with the ETag after that.
+DOWNLOAD_CACHE_CONTROL = "public, max-age=86400"
+
+
+def file_download_response(
+    request: Request,
+    path: str,
+    filename: str,
+    media_type: str,
+    file_stat: os.stat_result
+) -> Response:
+    """
+    Build a download response with ETag and Cache-Control headers.
+    
+    Answers 304 Not Modified when the client's If-None-Match matches.
+    
+    Args:
+        request: Incoming request
+        path: Path to the file
+        filename: Download filename
+        media_type: Response media type
+        file_stat: Stat result of the file
+    
+    Returns:
+        FileResponse, or an empty 304 response
+    """
+    etag = f'"{file_stat.st_mtime_ns:x}-{file_stat.st_size:x}"'
+    headers = {"ETag": etag, "Cache-Control": DOWNLOAD_CACHE_CONTROL}
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        client_etags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in client_etags or etag in client_etags:
+            return Response(status_code=304, headers=headers)
+    
+    return FileResponse(
+        path=path,
+        filename=filename,
+        media_type=media_type,
+        stat_result=file_stat,
+        headers=headers
+    )
+
+
 # API Endpoints
+# Endpoints that touch the filesystem are plain `def` so FastAPI runs them
+# in its threadpool instead of blocking the event loop.
 @app.get("/api/v1/health", response_model=HealthResponse, tags=["Health"])
 async def health_check():
     """Check API health status."""
@@ -313,7 +943,7 @@ async def health_check():
 
 
 @app.get("/api/v1/accounts", response_model=AccountListResponse, tags=["Accounts"])
-async def list_accounts():
+def list_accounts():
     """
     List all archived PEC accounts.
     
@@ -327,7 +957,7 @@ async def list_accounts():
 
 
 @app.get("/api/v1/accounts/{account}/dates", response_model=DateListResponse, tags=["Accounts"])
-async def list_dates(
+def list_dates(
     account: str,
     year: str = Query(..., description="Year (YYYY format)", pattern=r"^\d{4}$")
 ):
@@ -355,7 +985,7 @@ async def list_dates(
 
 
 @app.get("/api/v1/accounts/{account}/emails/{date_str}", response_model=EmailListResponse, tags=["Emails"])
-async def list_emails(
+def list_emails(
     account: str,
     date_str: str,
     folder: Optional[str] = Query(None, description="Filter by folder (e.g., INBOX)")
@@ -389,14 +1019,15 @@ async def list_emails(
     if folder:
         index_data = [e for e in index_data if e.get("folder", "").lower() == folder.lower()]
     
-    return EmailListResponse(
-        total=len(index_data),
-        emails=[EmailInfo(**email) for email in index_data]
-    )
+    # index.json is written by the archiver, so skip per-email model validation
+    return json_response({
+        "total": len(index_data),
+        "emails": [email_payload(email) for email in index_data]
+    })
 
 
 @app.get("/api/v1/search", response_model=SearchResponse, tags=["Search"])
-async def search(
+def search(
     subject: Optional[str] = Query(None, description="Search in subject (case-insensitive)"),
     sender: Optional[str] = Query(None, description="Search in sender (case-insensitive)", alias="from"),
     recipient: Optional[str] = Query(None, description="Search in recipient (case-insensitive)", alias="to"),
@@ -404,13 +1035,17 @@ async def search(
     date_to: Optional[date] = Query(None, description="Filter to date (YYYY-MM-DD)"),
     account: Optional[str] = Query(None, description="Filter by account"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum results"),
-    offset: int = Query(0, ge=0, description="Offset for pagination")
+    offset: int = Query(0, ge=0, description="Offset for pagination"),
+    cursor: Optional[str] = Query(None, description="Pagination cursor (next_cursor of the previous page)")
 ):
     """
     Search emails across all accounts.
     
     Supports filtering by subject, sender, recipient, date range, and account.
     Results are sorted by date (newest first).
+    
+    For deep pagination pass the `next_cursor` of the previous response as
+    `cursor` instead of increasing `offset`.
     """
     if not any([subject, sender, recipient, date_from, date_to, account]):
         raise HTTPException(
@@ -418,6 +1053,14 @@ async def search(
             detail="At least one search parameter is required"
         )
     
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    # Fetch one extra result to know whether there is a next page
     results, total = search_emails(
         subject=subject,
         sender=sender,
@@ -425,21 +1068,28 @@ async def search(
         date_from=date_from,
         date_to=date_to,
         account=account,
-        limit=limit,
-        offset=offset
+        limit=limit + 1,
+        offset=offset,
+        after=after
     )
     
-    return SearchResponse(
-        total=total,
-        results=[
-            SearchResult(
-                account=r["account"],
-                date=r["date"],
-                email=EmailInfo(**r["email"])
-            )
+    next_cursor = None
+    if len(results) > limit:
+        results = results[:limit]
+        next_cursor = encode_cursor(search_result_key(results[-1]))
+    
+    return json_response({
+        "total": total,
+        "results": [
+            {
+                "account": r["account"],
+                "date": r["date"],
+                "email": email_payload(r["email"])
+            }
             for r in results
-        ]
-    )
+        ],
+        "next_cursor": next_cursor
+    })
 
 
 @app.get(
@@ -447,7 +1097,8 @@ async def search(
     tags=["Downloads"],
     response_class=FileResponse
 )
-async def download_email(
+def download_email(
+    request: Request,
     account: str,
     date_str: str,
     folder: str,
@@ -490,22 +1141,28 @@ async def download_email(
     )
     
     # Ensure the path is within the base path
+    if not is_within_base_path(file_path, base_path):
+        raise HTTPException(status_code=400, detail="Invalid path")
     abs_file_path = os.path.abspath(file_path)
-    abs_base_path = os.path.abspath(base_path)
     
-    if not abs_file_path.startswith(abs_base_path):
-        raise HTTPException(status_code=400, detail="Invalid path")
+    if not abs_file_path.endswith(".eml"):
+        raise HTTPException(status_code=400, detail="Only .eml files can be downloaded")
     
-    if not os.path.exists(abs_file_path):
+    # Stat once and hand the result to FileResponse so it does not stat again
+    try:
+        file_stat = os.stat(abs_file_path)
+    except OSError:
         raise HTTPException(status_code=404, detail="Email file not found")
     
-    if not abs_file_path.endswith(".eml"):
-        raise HTTPException(status_code=400, detail="Only .eml files can be downloaded")
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise HTTPException(status_code=404, detail="Email file not found")
     
-    return FileResponse(
-        path=abs_file_path,
-        filename=safe_filename,
-        media_type="message/rfc822"
+    return file_download_response(
+        request,
+        abs_file_path,
+        safe_filename,
+        "message/rfc822",
+        file_stat
     )
 
 
@@ -514,7 +1171,7 @@ async def download_email(
     tags=["Downloads"],
     response_class=FileResponse
 )
-async def download_archive(account: str, date_str: str):
+def download_archive(request: Request, account: str, date_str: str):
     """
     Download the compressed archive (.tar.gz) for a specific date.
     
@@ -541,24 +1198,24 @@ async def download_archive(account: str, date_str: str):
     date_path = os.path.join(base_path, safe_account, year, safe_date)
     
     # Ensure the path is within the base path
-    abs_date_path = os.path.abspath(date_path)
-    abs_base_path = os.path.abspath(base_path)
-    
-    if not abs_date_path.startswith(abs_base_path):
+    if not is_within_base_path(date_path, base_path):
         raise HTTPException(status_code=400, detail="Invalid path")
+    abs_date_path = os.path.abspath(date_path)
     
     if not os.path.exists(abs_date_path):
         raise HTTPException(status_code=404, detail="Archive date not found")
     
     # Find the archive file
-    for file in os.listdir(abs_date_path):
-        if file.endswith(".tar.gz"):
-            archive_path = os.path.join(abs_date_path, file)
-            return FileResponse(
-                path=archive_path,
-                filename=file,
-                media_type="application/gzip"
-            )
+    with os.scandir(abs_date_path) as entries:
+        for entry in entries:
+            if entry.name.endswith(".tar.gz") and entry.is_file():
+                return file_download_response(
+                    request,
+                    entry.path,
+                    entry.name,
+                    "application/gzip",
+                    entry.stat()
+                )
     
     raise HTTPException(status_code=404, detail="Archive file not found")
 
@@ -52,6 +52,9 @@ Examples:
   
   # Set custom archive path
   python -m src.api_server --base-path /custom/archive
+  
+  # Run with 4 worker processes
+  python -m src.api_server --workers 4
         """
     )
     
@@ -84,6 +87,14 @@ Examples:
         help='Logging level (default: INFO)'
     )
     
+    parser.add_argument(
+        '--workers', '-w',
+        type=int,
+        default=1,
+        help='Number of worker processes (default: 1; ignored in debug mode). '
+             'Each process keeps its own caches and refreshes the search index'
+    )
+    
     parser.add_argument(
         '--debug',
         action='store_true',
@@ -112,20 +123,29 @@ def main() -> int:
         '/data/pec-archive'
     )
     set_base_path(base_path)
+    # Worker and reload processes import src.api themselves, so pass the
+    # base path through the environment as well
+    os.environ['PEC_ARCHIVE_BASE_PATH'] = base_path
+    
+    # Auto-reload only works with a single process
+    workers = 1 if args.debug else max(1, args.workers)
     
     logger.info(f"PEC Archiver API starting...")
     logger.info(f"Archive base path: {base_path}")
-    logger.info(f"Server: http://{args.host}:{args.port}")
+    logger.info(f"Server: http://{args.host}:{args.port} ({workers} worker(s))")
     logger.info(f"API Documentation: http://{args.host}:{args.port}/api/docs")
     
     try:
         # Using string reference allows uvicorn to properly handle reload mode
-        # This is the recommended approach for production deployment
+        # and multiple workers. This is the recommended approach for production
+        # deployment. The default "auto" loop/http settings pick uvloop and
+        # httptools (installed with uvicorn[standard]).
         uvicorn.run(
             "src.api:app",
             host=args.host,
             port=args.port,
             reload=args.debug,
+            workers=workers,
             log_level=args.log_level.lower()
         )
         return 0
@@ -11,8 +11,9 @@ import sys
 import os
 import argparse
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import List, Tuple
+from typing import Iterable, Iterator, Optional, Tuple
 
 # Add src to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -81,23 +82,126 @@ def validate_date_range(date_from: datetime, date_to: datetime) -> None:
         )
 
 
-def generate_date_range(date_from: datetime, date_to: datetime) -> List[datetime]:
+def count_days(date_from: datetime, date_to: datetime) -> int:
     """
-    Generate a list of dates between date_from and date_to (inclusive).
+    Count the days between date_from and date_to (inclusive).
     
     Args:
         date_from: Start date
         date_to: End date
         
     Returns:
-        List of datetime objects
+        Number of days in the range (0 if the range is inverted)
     """
-    dates = []
-    current = date_from
-    while current <= date_to:
-        dates.append(current)
-        current += timedelta(days=1)
-    return dates
+    return max((date_to - date_from).days + 1, 0)
+
+
+def generate_date_range(date_from: datetime, date_to: datetime) -> Iterator[datetime]:
+    """
+    Generate the dates between date_from and date_to (inclusive).
+    
+    Dates are produced lazily; use count_days() for the length.
+    
+    Args:
+        date_from: Start date
+        date_to: End date
+        
+    Returns:
+        Iterator of datetime objects
+    """
+    return (
+        date_from + timedelta(days=i)
+        for i in range(count_days(date_from, date_to))
+    )
+
+
+def process_date(scheduler: PECScheduler, date: datetime) -> Optional[dict]:
+    """
+    Run the backup for a single date.
+    
+    Args:
+        scheduler: Scheduler used to run the archive job
+        date: Date to back up
+        
+    Returns:
+        Aggregated report for the date, or None if the job failed
+    """
+    logger = logging.getLogger(__name__)
+    logger.info(f"\n{'='*50}")
+    logger.info(f"Processing date: {date.date()}")
+    logger.info('='*50)
+    
+    try:
+        report = scheduler.run_once(date)
+    except Exception as e:
+        logger.error(f"Failed to process date {date.date()}: {e}")
+        return None
+    
+    logger.info(
+        f"Date {date.date()} completed: "
+        f"{report['accounts_successful']}/{report['accounts_processed']} accounts, "
+        f"{report['total_messages']} messages"
+    )
+    return report
+
+
+def run_dates(
+    scheduler: PECScheduler,
+    dates: Iterable[datetime],
+    parallel: int = 1
+) -> dict:
+    """
+    Back up each date and aggregate the results.
+    
+    Dates are independent, so with parallel > 1 they are processed
+    concurrently; the IMAP work is I/O bound.
+    
+    Args:
+        scheduler: Scheduler used to run the archive job
+        dates: Dates to back up
+        parallel: Maximum number of dates processed at the same time
+        
+    Returns:
+        Dictionary with totals over all dates
+    """
+    total_results = {
+        'dates_processed': 0,
+        'dates_successful': 0,
+        'dates_with_errors': 0,
+        'total_accounts_processed': 0,
+        'total_accounts_successful': 0,
+        'total_messages': 0,
+        'total_errors': 0
+    }
+    
+    def add_report(report: Optional[dict]) -> None:
+        total_results['dates_processed'] += 1
+        if report is None:
+            total_results['dates_with_errors'] += 1
+            return
+        
+        total_results['total_accounts_processed'] += report['accounts_processed']
+        total_results['total_accounts_successful'] += report['accounts_successful']
+        total_results['total_messages'] += report['total_messages']
+        total_results['total_errors'] += report['total_errors']
+        
+        if report['accounts_with_errors'] == 0:
+            total_results['dates_successful'] += 1
+        else:
+            total_results['dates_with_errors'] += 1
+    
+    if parallel <= 1:
+        for date in dates:
+            add_report(process_date(scheduler, date))
+        return total_results
+    
+    # Reports are aggregated here, in the calling thread, as they complete
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        futures = [executor.submit(process_date, scheduler, date) for date in dates]
+        for future in as_completed(futures):
+            add_report(future.result())
+    
+    return total_results
 
 
 def parse_args() -> argparse.Namespace:
@@ -116,6 +220,9 @@ Examples:
   # Backup a specific week (last 7 days from a date)
   python -m src.backup_range --date-from 2024-01-15 --date-to 2024-01-21
   
+  # Back up a month, processing 4 days at a time
+  python -m src.backup_range --date-from 2024-01-01 --date-to 2024-01-31 --parallel 4
+  
   # Use custom config file
   python -m src.backup_range --date 2024-01-15 --config /path/to/config.yaml
         """
@@ -151,6 +258,14 @@ Examples:
         help='End date for date range (YYYY-MM-DD format)'
     )
     
+    parser.add_argument(
+        '--parallel', '-p',
+        type=int,
+        default=1,
+        help='Number of dates to back up concurrently (default: 1). Each date '
+             'uses up to "concurrency" IMAP connections per run'
+    )
+    
     parser.add_argument(
         '--log-level', '-l',
         type=str,
@@ -231,6 +346,10 @@ def main() -> int:
         logger.error(str(e))
         return 1
     
+    if args.parallel < 1:
+        logger.error("--parallel must be at least 1")
+        return 1
+    
     # Load configuration
     try:
         config = load_config(args.config)
@@ -240,57 +359,24 @@ def main() -> int:
     
     # Generate date list
     dates = generate_date_range(date_from, date_to)
+    num_days = count_days(date_from, date_to)
     
-    if len(dates) == 1:
-        logger.info(f"PEC Archiver - Backing up date: {dates[0].date()}")
+    if num_days == 1:
+        logger.info(f"PEC Archiver - Backing up date: {date_from.date()}")
     else:
         logger.info(
             f"PEC Archiver - Backing up date range: "
-            f"{date_from.date()} to {date_to.date()} ({len(dates)} days)"
+            f"{date_from.date()} to {date_to.date()} ({num_days} days)"
         )
     
     # Create scheduler
-    scheduler = PECScheduler(config=config)
+    scheduler = PECScheduler(config=config, parallel_runs=args.parallel)
     
     # Process each date
-    total_results = {
-        'dates_processed': 0,
-        'dates_successful': 0,
-        'dates_with_errors': 0,
-        'total_accounts_processed': 0,
-        'total_accounts_successful': 0,
-        'total_messages': 0,
-        'total_errors': 0
-    }
-    
-    for date in dates:
-        logger.info(f"\n{'='*50}")
-        logger.info(f"Processing date: {date.date()}")
-        logger.info('='*50)
-        
-        try:
-            report = scheduler.run_once(date)
-            
-            total_results['dates_processed'] += 1
-            total_results['total_accounts_processed'] += report['accounts_processed']
-            total_results['total_accounts_successful'] += report['accounts_successful']
-            total_results['total_messages'] += report['total_messages']
-            total_results['total_errors'] += report['total_errors']
-            
-            if report['accounts_with_errors'] == 0:
-                total_results['dates_successful'] += 1
-            else:
-                total_results['dates_with_errors'] += 1
-            
-            logger.info(
-                f"Date {date.date()} completed: "
-                f"{report['accounts_successful']}/{report['accounts_processed']} accounts, "
-                f"{report['total_messages']} messages"
-            )
-        except Exception as e:
-            logger.error(f"Failed to process date {date.date()}: {e}")
-            total_results['dates_processed'] += 1
-            total_results['dates_with_errors'] += 1
+    try:
+        total_results = run_dates(scheduler, dates, args.parallel)
+    finally:
+        scheduler.close()
     
     # Print final summary
     print("\n" + "="*60)
@@ -6,86 +6,286 @@ Creates .tar.gz archives and generates SHA256 digest.
 from __future__ import annotations
 
 import os
+import re
+import shutil
 import tarfile
 import hashlib
 import logging
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Default gzip level for archives: level 6 compresses almost as well as 9
+# at a fraction of the CPU time
+ARCHIVE_COMPRESS_LEVEL = 6
+
+# Read size used when copying compressed output from pigz
+PIGZ_READ_SIZE = 1024 * 1024
+
+# Buffer sizes for archive I/O; tarfile's defaults (16 KiB copies, 10 KiB
+# stream blocks) turn large archives into many small reads and writes
+ARCHIVE_COPY_BUFSIZE = 1024 * 1024
+ARCHIVE_WRITE_BUFSIZE = 4 * 1024 * 1024
+
+# Never archived: the archive itself, digest files, and summary.json
+# (written after the archive)
+ARCHIVE_EXCLUDE_SUFFIXES = ('.tar.gz', '.sha256', 'summary.json')
+
+# Threads listing the folders of an account while the archive is written
+ARCHIVE_WALK_MAX_WORKERS = min(8, os.cpu_count() or 1)
+
 
 class CompressionError(Exception):
     """Compression operation error."""
     pass
 
 
+class HashingWriter:
+    """
+    Write-only file wrapper that computes the SHA256 of everything written.
+    
+    Lets the archive digest be computed while the archive is written,
+    instead of reading the whole file back afterwards.
+    """
+    
+    def __init__(self, fileobj):
+        """
+        Initialize writer.
+        
+        Args:
+            fileobj: Binary file object to write to
+        """
+        self.fileobj = fileobj
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+    
+    def write(self, data) -> int:
+        """Hash and write a chunk of data."""
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.fileobj.write(data)
+    
+    def flush(self) -> None:
+        """Flush the underlying file."""
+        self.fileobj.flush()
+    
+    def hexdigest(self) -> str:
+        """Get the SHA256 of the data written so far."""
+        return self.sha256.hexdigest()
+
+
 def create_archive(
     source_path: str,
     account_name: str,
     date: datetime,
-    exclude_patterns: list[str] = None
-) -> str:
+    exclude_patterns: list[str] = None,
+    compresslevel: int = ARCHIVE_COMPRESS_LEVEL
+) -> tuple[str, str]:
     """
     Create a .tar.gz archive of the account's date directory.
     
+    The SHA256 of the archive is computed while it is written, so it can
+    be passed to create_digest() without reading the archive again.
+    
     Args:
         source_path: Path to account's date directory
         account_name: Account name for archive filename
         date: Archive date
         exclude_patterns: Patterns to exclude from archive
+        compresslevel: gzip compression level (1-9)
     
     Returns:
-        Path to created archive file
+        Tuple of (path to created archive file, SHA256 hex digest)
     
     Raises:
         CompressionError: If archive creation fails
     """
-    if exclude_patterns is None:
-        exclude_patterns = []
-    
     date_str = date.strftime('%Y-%m-%d')
     archive_name = f"archive-{account_name}-{date_str}.tar.gz"
     archive_path = os.path.join(source_path, archive_name)
     
+    # Custom exclusion patterns are plain substrings, matched in one regex
+    exclude_re = (
+        re.compile('|'.join(map(re.escape, exclude_patterns)))
+        if exclude_patterns else None
+    )
+    
     def should_exclude(tarinfo):
         """Filter function to exclude certain files."""
         name = tarinfo.name
-        # Exclude the archive file itself
-        if name.endswith('.tar.gz'):
-            return None
-        # Exclude digest files
-        if name.endswith('.sha256'):
+        if name.endswith(ARCHIVE_EXCLUDE_SUFFIXES):
             return None
-        # Exclude summary.json as it's created after
-        if name.endswith('summary.json'):
+        if exclude_re is not None and exclude_re.search(name):
             return None
-        # Check custom exclusion patterns
-        for pattern in exclude_patterns:
-            if pattern in name:
-                return None
         return tarinfo
     
+    def add_items(tar):
+        """Add all files in source_path to the archive."""
+        with os.scandir(source_path) as entries:
+            top_level = sorted(entries, key=lambda entry: entry.name)
+        
+        # Folders are listed on worker threads while members of earlier
+        # folders are written; map() keeps the archive order deterministic
+        with ThreadPoolExecutor(max_workers=ARCHIVE_WALK_MAX_WORKERS) as executor:
+            for members in executor.map(_list_tree, top_level):
+                _add_members(tar, members, should_exclude)
+    
     try:
-        with tarfile.open(archive_path, 'w:gz') as tar:
-            # Add all files in source_path
-            for item in os.listdir(source_path):
-                item_path = os.path.join(source_path, item)
-                tar.add(
-                    item_path,
-                    arcname=item,
-                    filter=should_exclude
-                )
+        pigz_path = shutil.which('pigz')
+        with open(archive_path, 'wb', buffering=ARCHIVE_WRITE_BUFSIZE) as f:
+            writer = HashingWriter(f)
+            if pigz_path:
+                _write_archive_pigz(pigz_path, writer, add_items, compresslevel)
+            else:
+                with tarfile.open(
+                    mode='w:gz',
+                    fileobj=writer,
+                    compresslevel=compresslevel,
+                    copybufsize=ARCHIVE_COPY_BUFSIZE
+                ) as tar:
+                    add_items(tar)
         
-        archive_size = os.path.getsize(archive_path)
+        archive_size = writer.size
         logger.info(
             f"Created archive: {archive_path} "
             f"({archive_size / (1024*1024):.2f} MB)"
         )
-        return archive_path
+        return archive_path, writer.hexdigest()
     except Exception as e:
         raise CompressionError(f"Failed to create archive: {e}")
 
 
+def _list_tree(entry: os.DirEntry) -> list[tuple[str, str]]:
+    """
+    List an item and, for a directory, everything below it.
+    
+    Items are returned in the order tarfile.add() would add them:
+    a directory before its contents, sorted by name. Symlinks to
+    directories are not followed.
+    
+    Args:
+        entry: Top-level entry of the source directory
+    
+    Returns:
+        List of (path, arcname) tuples
+    """
+    members = [(entry.path, entry.name)]
+    if entry.is_dir(follow_symlinks=False):
+        with os.scandir(entry.path) as children:
+            for child in sorted(children, key=lambda child: child.name):
+                for path, arcname in _list_tree(child):
+                    members.append((path, f"{entry.name}/{arcname}"))
+    return members
+
+
+def _add_members(tar: tarfile.TarFile, members: list[tuple[str, str]], filter_func) -> None:
+    """
+    Add listed items to an archive, as tarfile.add() with a filter would.
+    
+    When the filter drops a directory, nothing below it is added.
+    
+    Args:
+        tar: Archive being written
+        members: List of (path, arcname) tuples from _list_tree()
+        filter_func: Function returning the TarInfo to add, or None to skip
+    """
+    excluded_prefix = None
+    for path, arcname in members:
+        if excluded_prefix and arcname.startswith(excluded_prefix):
+            continue
+        
+        tarinfo = tar.gettarinfo(path, arcname)
+        if tarinfo is None:
+            # Sockets and other unsupported file types
+            continue
+        is_dir = tarinfo.isdir()
+        tarinfo = filter_func(tarinfo)
+        if tarinfo is None:
+            if is_dir:
+                excluded_prefix = arcname + '/'
+            continue
+        
+        if tarinfo.isreg():
+            with open(path, 'rb') as f:
+                tar.addfile(tarinfo, f)
+        else:
+            tar.addfile(tarinfo)
+
+
+def _write_archive_pigz(
+    pigz_path: str,
+    writer: HashingWriter,
+    add_items,
+    compresslevel: int = ARCHIVE_COMPRESS_LEVEL
+) -> None:
+    """
+    Write a .tar.gz archive by streaming an uncompressed tar into pigz.
+    
+    pigz compresses on all CPU cores, while tarfile's gzip is single-threaded.
+    Its output is copied to the writer from a separate thread, so pigz never
+    blocks on a full pipe while the tar is still being fed to it.
+    
+    Args:
+        pigz_path: Path to the pigz executable
+        writer: Writer receiving the compressed archive
+        add_items: Callable that adds the archive members to a TarFile
+        compresslevel: gzip compression level (1-9)
+    
+    Raises:
+        CompressionError: If pigz fails
+    """
+    proc = subprocess.Popen(
+        [pigz_path, '-p', str(os.cpu_count() or 1), f'-{compresslevel}'],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+    copy_errors = []
+    
+    def copy_output():
+        try:
+            for chunk in iter(lambda: proc.stdout.read(PIGZ_READ_SIZE), b''):
+                writer.write(chunk)
+        except Exception as e:
+            copy_errors.append(e)
+            # Keep draining so pigz can exit
+            for _ in iter(lambda: proc.stdout.read(PIGZ_READ_SIZE), b''):
+                pass
+    
+    copier = threading.Thread(target=copy_output, daemon=True)
+    copier.start()
+    try:
+        with tarfile.open(
+            fileobj=proc.stdin,
+            mode='w|',
+            bufsize=ARCHIVE_COPY_BUFSIZE,
+            copybufsize=ARCHIVE_COPY_BUFSIZE
+        ) as tar:
+            add_items(tar)
+        proc.stdin.close()
+    except BaseException:
+        proc.kill()
+        proc.wait()
+        copier.join()
+        raise
+    
+    copier.join()
+    stderr = proc.stderr.read()
+    for pipe in (proc.stdout, proc.stderr):
+        pipe.close()
+    
+    if proc.wait() != 0:
+        raise CompressionError(
+            f"pigz exited with status {proc.returncode}: "
+            f"{stderr.decode(errors='replace').strip()}"
+        )
+    if copy_errors:
+        raise copy_errors[0]
+
+
 def calculate_sha256(filepath: str) -> str:
     """
     Calculate SHA256 hash of a file.
@@ -96,21 +296,19 @@ def calculate_sha256(filepath: str) -> str:
     Returns:
         SHA256 hash as hexadecimal string
     """
-    sha256_hash = hashlib.sha256()
-    
+    # file_digest reads and hashes in C, without a Python-level chunk loop
     with open(filepath, 'rb') as f:
-        for chunk in iter(lambda: f.read(8192), b''):
-            sha256_hash.update(chunk)
-    
-    return sha256_hash.hexdigest()
+        return hashlib.file_digest(f, 'sha256').hexdigest()
 
 
-def create_digest(archive_path: str) -> str:
+def create_digest(archive_path: str, digest: str = None) -> str:
     """
     Create SHA256 digest file for an archive.
     
     Args:
         archive_path: Path to archive file
+        digest: Precomputed SHA256 of the archive, as returned by
+            create_archive() (default: computed by reading the archive)
     
     Returns:
         Path to digest file
@@ -119,7 +317,8 @@ def create_digest(archive_path: str) -> str:
         CompressionError: If digest creation fails
     """
     try:
-        digest = calculate_sha256(archive_path)
+        if digest is None:
+            digest = calculate_sha256(archive_path)
         archive_name = os.path.basename(archive_path)
         digest_path = os.path.join(
             os.path.dirname(archive_path),
@@ -7,12 +7,26 @@ from __future__ import annotations
 
 import os
 import re
+import json
 import yaml
 import logging
 from typing import Any
 
+try:
+    # LibYAML's C parser, when PyYAML was built with it
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 logger = logging.getLogger(__name__)
 
+# Parsed YAML is cached next to the config file as JSON, which loads much
+# faster; the cache is keyed on the config file's mtime and size
+CONFIG_CACHE_SUFFIX = '.cache.json'
+
+# ${VAR_NAME} references expanded by expand_env_vars
+ENV_VAR_PATTERN = re.compile(r'\$\{([^}]+)\}')
+
 
 class ConfigError(Exception):
     """Configuration error exception."""
@@ -25,12 +39,12 @@ def expand_env_vars(value: Any) -> Any:
     Supports ${VAR_NAME} syntax.
     """
     if isinstance(value, str):
-        pattern = re.compile(r'\$\{([^}]+)\}')
-        matches = pattern.findall(value)
-        for match in matches:
-            env_value = os.environ.get(match, '')
-            value = value.replace(f'${{{match}}}', env_value)
-        return value
+        if '$' not in value:
+            return value
+        return ENV_VAR_PATTERN.sub(
+            lambda match: os.environ.get(match.group(1), ''),
+            value
+        )
     elif isinstance(value, dict):
         return {k: expand_env_vars(v) for k, v in value.items()}
     elif isinstance(value, list):
@@ -58,8 +72,7 @@ def load_config(config_path: str = None) -> dict:
         raise ConfigError(f"Configuration file not found: {config_path}")
     
     try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
+        config = load_yaml_cached(config_path)
     except yaml.YAMLError as e:
         raise ConfigError(f"Invalid YAML in configuration file: {e}")
     
@@ -73,6 +86,64 @@ def load_config(config_path: str = None) -> dict:
     return config
 
 
+def load_yaml_cached(config_path: str) -> Any:
+    """
+    Parse a YAML file, reusing a JSON cache of the result when up to date.
+    
+    The cache holds the raw parsed YAML, before environment variable
+    expansion. Failing to read or write the cache (e.g. on a read-only
+    config volume) only means the YAML is parsed again.
+    
+    Args:
+        config_path: Path to the YAML file
+    
+    Returns:
+        Parsed YAML content
+    
+    Raises:
+        yaml.YAMLError: If the file is not valid YAML
+    """
+    st = os.stat(config_path)
+    stamp = [st.st_mtime_ns, st.st_size]
+    cache_path = config_path + CONFIG_CACHE_SUFFIX
+    
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached['stamp'] == stamp:
+            return cached['config']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.load(f, Loader=SafeLoader)
+    
+    try:
+        data = json.dumps({'stamp': stamp, 'config': config})
+    except (TypeError, ValueError):
+        # Dates and other YAML-only types cannot be cached as JSON
+        return config
+    # Non-string keys would silently become strings in JSON
+    if json.loads(data)['config'] != config:
+        return config
+    
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        # The config may hold credentials, so keep the cache private
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.debug(f"Could not write config cache {cache_path}: {e}")
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+    
+    return config
+
+
 def validate_config(config: dict) -> None:
     """
     Validate configuration dictionary.
@@ -111,11 +182,42 @@ def validate_config(config: dict) -> None:
     })
     config.setdefault('imap', {
         'timeout': 30,
-        'batch_size': 100
+        'batch_size': 100,
+        'folder_connections': 1
     })
     config.setdefault('scheduler', {
         'run_time': '01:00'
     })
+    config.setdefault('compression', {
+        'level': 6
+    })
+    config.setdefault('storage', {
+        'fsync': False
+    })
+    
+    folder_connections = config['imap'].get('folder_connections', 1)
+    if (not isinstance(folder_connections, int) or isinstance(folder_connections, bool)
+            or folder_connections < 1):
+        raise ConfigError("imap.folder_connections must be a positive integer")
+    
+    target_batch_bytes = config['imap'].get('target_batch_bytes')
+    if target_batch_bytes is not None and (
+            not isinstance(target_batch_bytes, int) or isinstance(target_batch_bytes, bool)
+            or target_batch_bytes < 1):
+        raise ConfigError("imap.target_batch_bytes must be a positive integer")
+    
+    account_deadline = config['imap'].get('account_deadline_seconds')
+    if account_deadline is not None and (
+            not isinstance(account_deadline, (int, float)) or isinstance(account_deadline, bool)
+            or account_deadline <= 0):
+        raise ConfigError("imap.account_deadline_seconds must be a positive number")
+    
+    level = config['compression'].get('level', 6)
+    if not isinstance(level, int) or isinstance(level, bool) or not 1 <= level <= 9:
+        raise ConfigError("compression.level must be an integer between 1 and 9")
+    
+    if not isinstance(config['storage'].get('fsync', False), bool):
+        raise ConfigError("storage.fsync must be true or false")
     
     # Set default notifications config (disabled by default)
     config.setdefault('notifications', {
@@ -147,11 +249,18 @@ def get_default_config() -> dict:
         },
         'imap': {
             'timeout': 30,
-            'batch_size': 100
+            'batch_size': 100,
+            'folder_connections': 1
         },
         'scheduler': {
             'run_time': '01:00'
         },
+        'compression': {
+            'level': 6
+        },
+        'storage': {
+            'fsync': False
+        },
         'notifications': {
             'enabled': False
         },
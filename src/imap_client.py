@@ -6,22 +6,123 @@ Handles IMAP connections and message fetching.
 from __future__ import annotations
 
 import imaplib
-import email
 import ssl
+import re
 import time
+import random
 import logging
+import threading
 from datetime import datetime, timedelta
 from email.message import Message
+from email.parser import BytesHeaderParser
 from typing import Generator, Optional
 
 logger = logging.getLogger(__name__)
 
+# Fetch the full message without setting the \Seen flag
+FETCH_ITEMS = '(BODY.PEEK[])'
+
+# Message number at the start of a FETCH response, e.g. b'12 (BODY[] {3456}'
+FETCH_RESPONSE_PATTERN = re.compile(rb'^(\d+) \(')
+
+# Message number and size in a size-only FETCH response, e.g. b'12 (RFC822.SIZE 3456)'
+SIZE_RESPONSE_PATTERN = re.compile(rb'^(\d+) \(.*?RFC822\.SIZE (\d+)')
+
+# Upper bound on messages per FETCH when batches are sized by bytes
+MAX_BATCH_MESSAGES = 1000
+
+_header_parser = BytesHeaderParser()
+
+
+def parse_headers(raw_email: bytes) -> Message:
+    """
+    Parse only the headers of a raw email.
+    
+    Archiving stores the raw bytes and indexes header fields, so the MIME
+    body (PEC envelopes carry the original message and attachments) is
+    left unparsed as the message payload.
+    
+    Args:
+        raw_email: Raw email bytes
+    
+    Returns:
+        Message object with headers parsed
+    """
+    return _header_parser.parsebytes(raw_email)
+
+
+def message_set(uids: list[bytes]) -> bytes:
+    """
+    Build an IMAP message set, collapsing runs of consecutive numbers.
+    
+    Args:
+        uids: Message numbers, in the order to keep
+    
+    Returns:
+        Message set such as b'1:4,7,9:10'
+    """
+    ranges = []
+    start = end = None
+    for uid in uids:
+        number = int(uid)
+        if end is not None and number == end + 1:
+            end = number
+            continue
+        if start is not None:
+            ranges.append(f'{start}:{end}' if end != start else str(start))
+        start = end = number
+    if start is not None:
+        ranges.append(f'{start}:{end}' if end != start else str(start))
+    return ','.join(ranges).encode('ascii')
+
+
+def size_batches(
+    uids: list[bytes],
+    sizes: dict[bytes, int],
+    target_bytes: int,
+    max_messages: int = MAX_BATCH_MESSAGES
+) -> list[list[bytes]]:
+    """
+    Split messages into batches of about target_bytes each.
+    
+    A message larger than target_bytes gets a batch of its own; messages
+    of unknown size count as target_bytes.
+    
+    Args:
+        uids: Message numbers
+        sizes: Message sizes in bytes by message number
+        target_bytes: Aimed total size of a batch
+        max_messages: Maximum number of messages in a batch
+    
+    Returns:
+        List of batches, in the order of uids
+    """
+    batches = []
+    batch = []
+    batch_bytes = 0
+    for uid in uids:
+        size = sizes.get(uid, target_bytes)
+        if batch and (batch_bytes + size > target_bytes or len(batch) >= max_messages):
+            batches.append(batch)
+            batch = []
+            batch_bytes = 0
+        batch.append(uid)
+        batch_bytes += size
+    if batch:
+        batches.append(batch)
+    return batches
+
 
 class IMAPError(Exception):
     """IMAP operation error."""
     pass
 
 
+class IMAPAuthenticationError(IMAPError):
+    """IMAP login rejected by the server; retrying will not help."""
+    pass
+
+
 class IMAPClient:
     """
     IMAP client for connecting to PEC mailboxes.
@@ -58,6 +159,7 @@ class IMAPClient:
         Establish SSL/TLS connection to IMAP server.
         
         Raises:
+            IMAPAuthenticationError: If the server rejects the login
             IMAPError: If connection fails
         """
         try:
@@ -68,10 +170,18 @@ class IMAPClient:
                 ssl_context=context,
                 timeout=self.timeout
             )
+        except Exception as e:
+            raise IMAPError(f"Connection failed: {e}")
+        
+        try:
             self.connection.login(self.username, self.password)
             logger.info(f"Connected to {self.host} as {self.username}")
+        except imaplib.IMAP4.abort as e:
+            # Connection dropped during login: transient
+            raise IMAPError(f"Connection failed: {e}")
         except imaplib.IMAP4.error as e:
-            raise IMAPError(f"IMAP login failed: {e}")
+            # LOGIN answered NO/BAD (wrong credentials, disabled account)
+            raise IMAPAuthenticationError(f"IMAP login failed: {e}")
         except Exception as e:
             raise IMAPError(f"Connection failed: {e}")
     
@@ -164,7 +274,7 @@ class IMAPClient:
             uid: Message UID
         
         Returns:
-            Tuple of (parsed Message object, raw email bytes)
+            Tuple of (Message object with parsed headers, raw email bytes)
         
         Raises:
             IMAPError: If fetch fails
@@ -173,21 +283,99 @@ class IMAPClient:
             raise IMAPError("Not connected to IMAP server")
         
         try:
-            status, data = self.connection.fetch(uid, '(RFC822)')
+            status, data = self.connection.fetch(uid, FETCH_ITEMS)
             if status != 'OK':
                 raise IMAPError(f"Failed to fetch message {uid}: {data}")
             
             raw_email = data[0][1]
-            msg = email.message_from_bytes(raw_email)
-            return msg, raw_email
+            return parse_headers(raw_email), raw_email
         except imaplib.IMAP4.error as e:
             raise IMAPError(f"Failed to fetch message {uid}: {e}")
     
+    def fetch_batch(self, uids: list[bytes]) -> list[tuple[Message, bytes, bytes]]:
+        """
+        Fetch several messages with a single FETCH command.
+        
+        Args:
+            uids: Message UIDs
+        
+        Returns:
+            List of (Message object with parsed headers, raw email bytes, UID),
+            in the order of uids; messages missing from the response are skipped
+        
+        Raises:
+            IMAPError: If fetch fails
+        """
+        if not self.connection:
+            raise IMAPError("Not connected to IMAP server")
+        if not uids:
+            return []
+        
+        try:
+            status, data = self.connection.fetch(message_set(uids), FETCH_ITEMS)
+            if status != 'OK':
+                raise IMAPError(f"Failed to fetch messages: {data}")
+        except imaplib.IMAP4.error as e:
+            raise IMAPError(f"Failed to fetch messages: {e}")
+        
+        # Each message arrives as a (b'N (BODY[] {size}', raw) tuple followed
+        # by a closing b')'; anything else is unsolicited data to skip
+        raw_by_uid = {}
+        for item in data:
+            if not isinstance(item, tuple):
+                continue
+            match = FETCH_RESPONSE_PATTERN.match(item[0])
+            if match:
+                raw_by_uid[match.group(1)] = item[1]
+        
+        messages = []
+        for uid in uids:
+            raw_email = raw_by_uid.get(uid)
+            if raw_email is None:
+                logger.error(f"Message {uid} missing from FETCH response")
+                continue
+            messages.append((parse_headers(raw_email), raw_email, uid))
+        return messages
+    
+    def fetch_sizes(self, uids: list[bytes]) -> dict[bytes, int]:
+        """
+        Get message sizes with a single FETCH of RFC822.SIZE.
+        
+        Args:
+            uids: Message UIDs
+        
+        Returns:
+            Dictionary mapping UID to size in bytes
+        
+        Raises:
+            IMAPError: If fetch fails
+        """
+        if not self.connection:
+            raise IMAPError("Not connected to IMAP server")
+        if not uids:
+            return {}
+        
+        try:
+            status, data = self.connection.fetch(message_set(uids), '(RFC822.SIZE)')
+            if status != 'OK':
+                raise IMAPError(f"Failed to fetch message sizes: {data}")
+        except imaplib.IMAP4.error as e:
+            raise IMAPError(f"Failed to fetch message sizes: {e}")
+        
+        sizes = {}
+        for item in data:
+            if isinstance(item, bytes):
+                match = SIZE_RESPONSE_PATTERN.match(item)
+                if match:
+                    sizes[match.group(1)] = int(match.group(2))
+        return sizes
+    
     def fetch_messages_by_date(
         self,
         folder: str,
         target_date: datetime,
-        batch_size: int = 100
+        batch_size: int = 100,
+        target_batch_bytes: Optional[int] = None
     ) -> Generator[tuple[Message, bytes, str], None, None]:
         """
         Fetch all messages from a folder for a specific date.
@@ -196,9 +384,11 @@ class IMAPClient:
             folder: IMAP folder name
             target_date: Date to fetch messages for
             batch_size: Number of messages to fetch per batch
+            target_batch_bytes: If set, size batches by message size instead,
+                aiming at this many bytes per FETCH (sizes are fetched first)
         
         Yields:
-            Tuple of (Message object, raw email bytes, UID string)
+            Tuple of (Message object with parsed headers, raw email bytes, UID string)
         
         Raises:
             IMAPError: If fetch fails
@@ -208,31 +398,159 @@ class IMAPClient:
         
         logger.info(f"Fetching {len(uids)} messages from '{folder}' for {target_date.date()}")
         
-        for i in range(0, len(uids), batch_size):
-            batch = uids[i:i + batch_size]
-            for uid in batch:
-                try:
-                    msg, raw_email = self.fetch_message(uid)
-                    yield msg, raw_email, uid.decode('utf-8')
-                except IMAPError as e:
-                    logger.error(f"Failed to fetch message {uid}: {e}")
-                    continue
+        batches = None
+        if target_batch_bytes and len(uids) > 1:
+            try:
+                batches = size_batches(uids, self.fetch_sizes(uids), target_batch_bytes)
+            except IMAPError as e:
+                logger.warning(f"Could not fetch message sizes, using fixed batches: {e}")
+        if batches is None:
+            batches = [uids[i:i + batch_size] for i in range(0, len(uids), batch_size)]
+        
+        for batch in batches:
+            try:
+                messages = self.fetch_batch(batch)
+            except IMAPError as e:
+                # Retry one by one so a single bad message does not lose the batch
+                logger.warning(f"Batch fetch failed, fetching messages one by one: {e}")
+                messages = []
+                for uid in batch:
+                    try:
+                        msg, raw_email = self.fetch_message(uid)
+                        messages.append((msg, raw_email, uid))
+                    except IMAPError as e:
+                        logger.error(f"Failed to fetch message {uid}: {e}")
+            
+            for msg, raw_email, uid in messages:
+                yield msg, raw_email, uid.decode('utf-8')
+
+
+class IMAPConnectionPool:
+    """
+    Pool of logged-in IMAP connections, reused across folders and runs.
+    
+    Connections are keyed by (host, port, username) and handed out to
+    one user at a time; an idle connection is checked with NOOP before
+    it is reused, so one dropped by the server is replaced transparently.
+    """
+    
+    def __init__(self):
+        """Initialize an empty pool."""
+        self._idle: dict[tuple[str, int, str], list[IMAPClient]] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+    
+    def acquire(
+        self,
+        host: str,
+        username: str,
+        password: str,
+        port: int = 993,
+        timeout: int = 30
+    ) -> IMAPClient:
+        """
+        Get a connected client, reusing an idle one when possible.
+        
+        Args:
+            host: IMAP server hostname
+            username: Account username
+            password: Account password
+            port: IMAP port
+            timeout: Connection timeout in seconds
+        
+        Returns:
+            Connected IMAP client; hand it back with release() or discard()
+        
+        Raises:
+            IMAPError: If a new connection cannot be established
+        """
+        key = (host, port, username)
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                client = idle.pop() if idle else None
+            if client is None:
+                break
+            if self._is_alive(client):
+                logger.debug(f"Reusing IMAP connection to {host} as {username}")
+                return client
+            client.disconnect()
+        
+        client = IMAPClient(host, username, password, port=port, timeout=timeout)
+        client.connect()
+        return client
+    
+    def release(self, client: IMAPClient) -> None:
+        """
+        Return a healthy client to the pool.
+        
+        Once the pool is closed, the client is logged out instead.
+        
+        Args:
+            client: Client obtained from acquire()
+        """
+        key = (client.host, client.port, client.username)
+        with self._lock:
+            if not self._closed:
+                self._idle.setdefault(key, []).append(client)
+                return
+        client.disconnect()
+    
+    def discard(self, client: IMAPClient) -> None:
+        """
+        Close a client whose connection state is unknown instead of pooling it.
+        
+        Args:
+            client: Client obtained from acquire()
+        """
+        client.disconnect()
+    
+    def close(self) -> None:
+        """Log out all idle connections, and any released afterwards."""
+        with self._lock:
+            self._closed = True
+            clients = [client for idle in self._idle.values() for client in idle]
+            self._idle.clear()
+        for client in clients:
+            client.disconnect()
+    
+    @staticmethod
+    def _is_alive(client: IMAPClient) -> bool:
+        """Check an idle connection with NOOP."""
+        try:
+            status, _ = client.connection.noop()
+            return status == 'OK'
+        except Exception:
+            return False
 
 
 def with_retry(
     func,
     max_retries: int = 3,
     initial_delay: int = 5,
-    backoff_multiplier: int = 2
+    backoff_multiplier: int = 2,
+    max_delay: float = 300,
+    deadline: Optional[float] = None,
+    retry_on: tuple = (Exception,),
+    stop_on: tuple = ()
 ):
     """
     Execute function with retry logic and exponential backoff.
     
+    Each wait is drawn uniformly between zero and the current backoff
+    delay ("full jitter"), so workers that failed together do not all
+    retry at the same moment.
+    
     Args:
         func: Function to execute
         max_retries: Maximum number of retries
         initial_delay: Initial delay between retries in seconds
         backoff_multiplier: Multiplier for delay on each retry
+        max_delay: Upper bound for the delay in seconds
+        deadline: time.monotonic() value after which no retry is started
+        retry_on: Exception types that are retried
+        stop_on: Exception types raised at once without retrying, even
+            if they match retry_on (e.g. permanent errors)
     
     Returns:
         Function result
@@ -240,22 +558,36 @@ def with_retry(
     Raises:
         Exception: If all retries fail
     """
-    delay = initial_delay
+    delay = min(initial_delay, max_delay)
     last_exception = None
     
     for attempt in range(max_retries + 1):
         try:
             return func()
-        except Exception as e:
+        except retry_on as e:
+            if isinstance(e, stop_on):
+                logger.error(f"Attempt {attempt + 1} failed: {e}. Not retrying")
+                raise
             last_exception = e
-            if attempt < max_retries:
-                logger.warning(
-                    f"Attempt {attempt + 1} failed: {e}. "
-                    f"Retrying in {delay} seconds..."
-                )
-                time.sleep(delay)
-                delay *= backoff_multiplier
-            else:
+            if attempt >= max_retries:
                 logger.error(f"All {max_retries + 1} attempts failed")
+                break
+            
+            sleep_for = random.uniform(0, delay)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= sleep_for:
+                    logger.error(
+                        f"Attempt {attempt + 1} failed: {e}. "
+                        f"Retry deadline reached, giving up"
+                    )
+                    break
+            
+            logger.warning(
+                f"Attempt {attempt + 1} failed: {e}. "
+                f"Retrying in {sleep_for:.1f} seconds..."
+            )
+            time.sleep(sleep_for)
+            delay = min(delay * backoff_multiplier, max_delay)
     
     raise last_exception
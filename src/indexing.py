@@ -6,18 +6,65 @@ Generates index.csv and index.json files.
 from __future__ import annotations
 
 import os
+import re
 import csv
-import json
-import email
+import sys
 import logging
-from datetime import datetime
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from collections import Counter
 from email.message import Message
+from email.parser import BytesHeaderParser
 from email.utils import parsedate_to_datetime
 from email.header import decode_header
 from typing import Optional
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
+# Columns of index.csv, in order
+CSV_FIELDNAMES = [
+    'uid', 'folder', 'filename', 'subject', 'from', 'to',
+    'cc', 'date', 'message_id', 'size'
+]
+
+
+# Fields of an index entry, in index.json order
+INDEX_FIELDS = [
+    'uid', 'folder', 'filename', 'filepath', 'subject', 'from', 'to',
+    'cc', 'date', 'message_id', 'size'
+]
+
+_header_parser = BytesHeaderParser()
+
+# Headers read by extract_message_info (lowercase)
+INDEX_HEADERS = frozenset(('subject', 'from', 'to', 'cc', 'date', 'message-id'))
+
+# Common RFC 2822 date form ("Mon, 15 Jan 2024 10:30:00 +0100"), parsed
+# without going through email.utils; anything else falls back to it
+DATE_PATTERN = re.compile(
+    r'\s*(?:[A-Z][a-z]{2}, )?(\d{1,2}) '
+    r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) '
+    r'(\d{4}) (\d{2}):(\d{2}):(\d{2}) ([+-])(\d{2})(\d{2})(?!\S)'
+)
+
+MONTHS = {
+    name: number for number, name in enumerate(
+        ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+         'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'),
+        start=1
+    )
+}
+
+# Write buffer for index files
+INDEX_WRITE_BUFSIZE = 1024 * 1024
+
+# Threads reading .eml headers; loading is bound by file open/read latency
+LOAD_MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
 
 def decode_email_header(header_value: Optional[str]) -> str:
     """
@@ -32,6 +79,26 @@ def decode_email_header(header_value: Optional[str]) -> str:
     if not header_value:
         return ''
     
+    if isinstance(header_value, str):
+        # Only RFC 2047 encoded words ("=?charset?...") need decoding
+        if '=?' not in header_value:
+            # Plain str (header objects of newer policies subclass str)
+            return str(header_value)
+        # Senders and recipients repeat across messages, so cache the result
+        return _decode_encoded_header(header_value)
+    
+    # Header objects (raw non-ASCII headers) are not hashable
+    return _decode_header_parts(header_value)
+
+
+@functools.lru_cache(maxsize=16384)
+def _decode_encoded_header(header_value: str) -> str:
+    """Decode a header string containing encoded words, with caching."""
+    return _decode_header_parts(header_value)
+
+
+def _decode_header_parts(header_value) -> str:
+    """Decode all parts of a header value into one string."""
     try:
         decoded_parts = []
         for part, encoding in decode_header(header_value):
@@ -61,16 +128,56 @@ def parse_email_date(date_str: Optional[str]) -> Optional[datetime]:
         return None
     
     try:
-        return parsedate_to_datetime(date_str)
+        match = DATE_PATTERN.match(date_str) if isinstance(date_str, str) else None
+        # "-0000" means unknown zone, which parsedate_to_datetime makes naive
+        if match is None or match.group(7, 8, 9) == ('-', '00', '00'):
+            return parsedate_to_datetime(date_str)
+        
+        day, month, year, hour, minute, second, sign, tz_hours, tz_minutes = match.groups()
+        offset = int(tz_hours) * 60 + int(tz_minutes)
+        return datetime(
+            int(year), MONTHS[month], int(day),
+            int(hour), int(minute), int(second),
+            tzinfo=_fixed_timezone(-offset if sign == '-' else offset)
+        )
     except Exception:
         return None
 
 
+@functools.lru_cache(maxsize=None)
+def _fixed_timezone(offset_minutes: int) -> timezone:
+    """Get the timezone for a UTC offset in minutes."""
+    return timezone(timedelta(minutes=offset_minutes))
+
+
+def _index_headers(message: Message) -> dict:
+    """
+    Collect the headers needed for indexing in one pass.
+    
+    Equivalent to calling message.get() for each of INDEX_HEADERS,
+    without scanning the header list once per header.
+    
+    Args:
+        message: Parsed email message
+    
+    Returns:
+        Dictionary mapping lowercase header name to its first value
+    """
+    headers = {}
+    for name, value in message._headers:
+        key = name.lower()
+        if key in INDEX_HEADERS and key not in headers:
+            headers[key] = message.policy.header_fetch_parse(name, value)
+    return headers
+
+
 def extract_message_info(
     message: Message,
     uid: str,
     folder: str,
-    filepath: str
+    filepath: str,
+    size: Optional[int] = None,
+    filename: Optional[str] = None
 ) -> dict:
     """
     Extract metadata from an email message.
@@ -80,49 +187,94 @@ def extract_message_info(
         uid: Message UID
         folder: IMAP folder name
         filepath: Path to saved .eml file
+        size: Size of the .eml file in bytes, if already known
+            (default: read from the file system)
+        filename: Base name of filepath, if already known
     
     Returns:
         Dictionary with message metadata
     """
-    date = parse_email_date(message.get('Date'))
+    headers = _index_headers(message)
+    date = parse_email_date(headers.get('date'))
+    
+    if size is None:
+        try:
+            size = os.path.getsize(filepath)
+        except OSError:
+            size = 0
     
+    # Folders and addresses repeat across many messages: intern them so
+    # the index keeps one copy of each value
     return {
         'uid': uid,
-        'folder': folder,
-        'filename': os.path.basename(filepath),
+        'folder': sys.intern(folder),
+        'filename': filename if filename is not None else os.path.basename(filepath),
         'filepath': filepath,
-        'subject': decode_email_header(message.get('Subject')),
-        'from': decode_email_header(message.get('From')),
-        'to': decode_email_header(message.get('To')),
-        'cc': decode_email_header(message.get('Cc')),
+        'subject': decode_email_header(headers.get('subject')),
+        'from': sys.intern(decode_email_header(headers.get('from'))),
+        'to': sys.intern(decode_email_header(headers.get('to'))),
+        'cc': sys.intern(decode_email_header(headers.get('cc'))),
         'date': date.isoformat() if date else '',
-        'message_id': message.get('Message-ID', ''),
-        'size': os.path.getsize(filepath) if os.path.exists(filepath) else 0
+        'message_id': headers.get('message-id', ''),
+        'size': size
     }
 
 
 def load_message_from_file(filepath: str) -> Optional[Message]:
     """
-    Load and parse an email message from .eml file.
+    Load and parse the headers of an email message from .eml file.
+    
+    Only the header block is read, since indexing needs nothing else;
+    the returned message has an empty body.
     
     Args:
         filepath: Path to .eml file
     
     Returns:
-        Parsed Message object or None if parsing fails
+        Message object with parsed headers or None if parsing fails
     """
     try:
+        header_lines = []
         with open(filepath, 'rb') as f:
-            return email.message_from_bytes(f.read())
+            for line in f:
+                if line in (b'\r\n', b'\n'):
+                    break
+                header_lines.append(line)
+        return _header_parser.parsebytes(b''.join(header_lines))
     except Exception as e:
         logger.error(f"Failed to load message from {filepath}: {e}")
         return None
 
 
+def _file_sizes(directories: set[str]) -> dict[str, int]:
+    """
+    Get the sizes of the files in some directories with one scan each.
+    
+    Args:
+        directories: Directory paths
+    
+    Returns:
+        Dictionary mapping file path to size in bytes
+    """
+    sizes = {}
+    for directory in directories:
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        sizes[entry.path] = entry.stat().st_size
+        except OSError:
+            continue
+    return sizes
+
+
 class Indexer:
     """
     Index generator for PEC archive.
     Creates index.csv and index.json files.
+    
+    Entries are stored column-wise, one list per field in `columns`,
+    so writers and statistics walk flat lists instead of per-entry dicts.
     """
     
     def __init__(self, account_path: str):
@@ -133,26 +285,51 @@ class Indexer:
             account_path: Path to account's date directory
         """
         self.account_path = account_path
-        self.messages = []
+        self.columns = {field: [] for field in INDEX_FIELDS}
+        # Statistics kept up to date as messages are added
+        self._folder_counts = Counter()
+        self._total_size = 0
+        # Folders of an account may be fetched, and added, concurrently
+        self._lock = threading.Lock()
+    
+    @property
+    def messages(self) -> list[dict]:
+        """Indexed entries as dictionaries (built on each access)."""
+        return [
+            dict(zip(INDEX_FIELDS, row))
+            for row in zip(*(self.columns[field] for field in INDEX_FIELDS))
+        ]
+    
+    def __len__(self) -> int:
+        """Number of indexed messages."""
+        return len(self.columns['uid'])
     
     def add_message(
         self,
         message: Message,
         uid: str,
         folder: str,
-        filepath: str
+        filepath: str,
+        size: Optional[int] = None,
+        filename: Optional[str] = None
     ) -> None:
         """
-        Add a message to the index.
+        Add a message to the index. Safe to call from several threads.
         
         Args:
             message: Parsed email message
             uid: Message UID
             folder: IMAP folder name
             filepath: Path to saved .eml file
+            size: Size of the .eml file in bytes, if already known
+            filename: Base name of filepath, if already known
         """
-        info = extract_message_info(message, uid, folder, filepath)
-        self.messages.append(info)
+        info = extract_message_info(message, uid, folder, filepath, size, filename)
+        with self._lock:
+            for field, column in self.columns.items():
+                column.append(info[field])
+            self._folder_counts[folder] += 1
+            self._total_size += info['size']
     
     def load_messages_from_files(
         self,
@@ -161,17 +338,38 @@ class Indexer:
         """
         Load messages from saved .eml files.
         
+        Files are read in parallel; messages are added in the given order.
+        
         Args:
             folder_messages: Dictionary mapping folder names to lists of .eml file paths
         """
-        for folder, files in folder_messages.items():
-            for filepath in files:
-                message = load_message_from_file(filepath)
-                if message:
-                    # Extract UID from filename (format: uid_subject.eml)
-                    filename = os.path.basename(filepath)
-                    uid = filename.split('_')[0] if '_' in filename else filename
-                    self.add_message(message, uid, folder, filepath)
+        with ThreadPoolExecutor(max_workers=LOAD_MAX_WORKERS) as executor:
+            for folder, files in folder_messages.items():
+                self._load_folder_files(executor, folder, files)
+    
+    def _load_folder_files(
+        self,
+        executor: ThreadPoolExecutor,
+        folder: str,
+        files: list[str]
+    ) -> None:
+        """
+        Load the .eml files of one folder.
+        
+        Args:
+            executor: Executor reading the files
+            folder: IMAP folder name
+            files: Paths of the folder's .eml files
+        """
+        sizes = _file_sizes({os.path.dirname(filepath) for filepath in files})
+        for filepath, message in zip(files, executor.map(load_message_from_file, files)):
+            if message:
+                # Extract UID from filename (format: uid_subject.eml)
+                filename = os.path.basename(filepath)
+                uid = filename.partition('_')[0]
+                self.add_message(
+                    message, uid, folder, filepath, sizes.get(filepath), filename
+                )
     
     def generate_csv(self) -> str:
         """
@@ -182,18 +380,15 @@ class Indexer:
         """
         csv_path = os.path.join(self.account_path, 'index.csv')
         
-        fieldnames = [
-            'uid', 'folder', 'filename', 'subject', 'from', 'to',
-            'cc', 'date', 'message_id', 'size'
-        ]
-        
-        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-            writer.writeheader()
-            for msg in self.messages:
-                writer.writerow(msg)
+        with open(
+            csv_path, 'w', newline='', encoding='utf-8',
+            buffering=INDEX_WRITE_BUFSIZE
+        ) as f:
+            writer = csv.writer(f, lineterminator='\r\n', quoting=csv.QUOTE_MINIMAL)
+            writer.writerow(CSV_FIELDNAMES)
+            writer.writerows(zip(*(self.columns[field] for field in CSV_FIELDNAMES)))
         
-        logger.info(f"Generated index.csv with {len(self.messages)} entries")
+        logger.info(f"Generated index.csv with {len(self)} entries")
         return csv_path
     
     def generate_json(self) -> str:
@@ -205,22 +400,22 @@ class Indexer:
         """
         json_path = os.path.join(self.account_path, 'index.json')
         
-        # Create relative paths for JSON
-        index_data = []
-        for msg in self.messages:
-            msg_copy = msg.copy()
-            # Make filepath relative to account_path
-            if msg_copy.get('filepath'):
-                msg_copy['filepath'] = os.path.relpath(
-                    msg_copy['filepath'],
-                    self.account_path
-                )
-            index_data.append(msg_copy)
+        # Make filepaths relative to account_path for JSON
+        columns = dict(self.columns)
+        columns['filepath'] = [
+            os.path.relpath(filepath, self.account_path) if filepath else filepath
+            for filepath in columns['filepath']
+        ]
+        index_data = [
+            dict(zip(INDEX_FIELDS, row))
+            for row in zip(*(columns[field] for field in INDEX_FIELDS))
+        ]
         
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(index_data, f, ensure_ascii=False, indent=2)
+        # orjson serializes in C and emits UTF-8 directly; one write call
+        with open(json_path, 'wb') as f:
+            f.write(orjson.dumps(index_data, option=orjson.OPT_INDENT_2))
         
-        logger.info(f"Generated index.json with {len(self.messages)} entries")
+        logger.info(f"Generated index.json with {len(self)} entries")
         return json_path
     
     def generate_all(self) -> tuple[str, str]:
@@ -241,16 +436,8 @@ class Indexer:
         Returns:
             Dictionary with statistics
         """
-        folders = {}
-        total_size = 0
-        
-        for msg in self.messages:
-            folder = msg['folder']
-            folders[folder] = folders.get(folder, 0) + 1
-            total_size += msg.get('size', 0)
-        
         return {
-            'total_messages': len(self.messages),
-            'folders': folders,
-            'total_size': total_size
+            'total_messages': len(self),
+            'folders': dict(self._folder_counts),
+            'total_size': self._total_size
         }
@@ -142,6 +142,8 @@ def main() -> int:
         except Exception as e:
             logger.error(f"Archive job failed: {e}")
             return 1
+        finally:
+            scheduler.close()
     else:
         # Start scheduler
         try:
@@ -152,6 +154,8 @@ def main() -> int:
         except Exception as e:
             logger.error(f"Scheduler error: {e}")
             return 1
+        finally:
+            scheduler.close()
 
 
 if __name__ == '__main__':
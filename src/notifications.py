@@ -5,21 +5,46 @@ Sends email notifications with daily backup reports and error alerts.
 
 from __future__ import annotations
 
+import base64
 import smtplib
 import logging
-from email.mime.text import MIMEText
+import threading
+from email.mime.nonmultipart import MIMENonMultipart
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# Values of notifications.format: which report bodies the email carries
+NOTIFICATION_FORMATS = ('both', 'html', 'text')
+
 
 class NotificationError(Exception):
     """Notification operation error."""
     pass
 
 
+def _utf8_text_part(content: str, subtype: str) -> MIMENonMultipart:
+    """
+    Build a base64-encoded UTF-8 text/<subtype> part.
+    
+    Produces the same part as MIMEText(content, subtype, 'utf-8'),
+    encoding the body in one step without the charset machinery.
+    
+    Args:
+        content: Body text
+        subtype: MIME subtype ('plain' or 'html')
+    
+    Returns:
+        MIME part
+    """
+    part = MIMENonMultipart('text', subtype, charset='utf-8')
+    part['Content-Transfer-Encoding'] = 'base64'
+    part.set_payload(base64.encodebytes(content.encode('utf-8')).decode('ascii'))
+    return part
+
+
 def format_report_html(report: dict, target_date: datetime) -> str:
     """
     Format report as HTML for email.
@@ -33,7 +58,7 @@ def format_report_html(report: dict, target_date: datetime) -> str:
     """
     status = "✅ SUCCESS" if report.get('accounts_with_errors', 0) == 0 else "⚠️ COMPLETED WITH ERRORS"
     
-    html = f"""
+    parts = [f"""
     <html>
     <head>
         <style>
@@ -71,42 +96,42 @@ def format_report_html(report: dict, target_date: datetime) -> str:
                 <tr><td>Errori totali</td><td class="{'error' if report.get('total_errors', 0) > 0 else ''}">{report.get('total_errors', 0)}</td></tr>
             </table>
         </div>
-    """
+    """]
     
-    # Add accounts table if available
+    # Add accounts table if available; pieces are joined once at the end
     accounts = report.get('accounts', [])
     if accounts:
-        html += """
+        parts.append("""
         <div class="accounts">
             <h3>📋 Dettaglio Account</h3>
             <table>
                 <tr><th>Account</th><th>Stato</th><th>Messaggi</th></tr>
-        """
+        """)
         for account in accounts:
             status_class = "success" if account.get('status') == 'success' else "error"
             status_text = "✓ Successo" if account.get('status') == 'success' else "✗ Errori"
-            html += f"""
+            parts.append(f"""
                 <tr>
                     <td>{account.get('account', 'N/A')}</td>
                     <td class="{status_class}">{status_text}</td>
                     <td>{account.get('messages', 0)}</td>
                 </tr>
-            """
-        html += """
+            """)
+        parts.append("""
             </table>
         </div>
-        """
+        """)
     
-    html += f"""
+    parts.append(f"""
         <div class="footer">
             <p>Report generato automaticamente da PEC Archiver</p>
             <p>Timestamp: {datetime.now().isoformat()}</p>
         </div>
     </body>
     </html>
-    """
+    """)
     
-    return html
+    return ''.join(parts)
 
 
 def format_report_text(report: dict, target_date: datetime) -> str:
@@ -159,6 +184,194 @@ def format_report_text(report: dict, target_date: datetime) -> str:
     return "\n".join(lines)
 
 
+class Notifier:
+    """
+    Sends backup report notifications over a reusable SMTP connection.
+    
+    The connection is opened on the first send and kept for the next
+    ones, so several reports (e.g. a date range) need a single TLS
+    handshake and login. Use close() (or a with block) when done.
+    """
+    
+    def __init__(self, config: dict):
+        """
+        Initialize notifier.
+        
+        Args:
+            config: Notification configuration dictionary
+        """
+        self.config = config
+        self._server = None
+        self._lock = threading.Lock()
+    
+    def __enter__(self) -> 'Notifier':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+    
+    def send(
+        self,
+        report: dict,
+        target_date: datetime,
+        force_send: bool = False
+    ) -> bool:
+        """
+        Send email notification with backup report.
+        
+        Args:
+            report: Aggregated report dictionary
+            target_date: Date that was archived
+            force_send: Force sending even if notifications are disabled
+        
+        Returns:
+            True if notification was sent successfully, False otherwise
+        
+        Raises:
+            NotificationError: If sending fails
+        """
+        config = self.config
+        
+        # Check if notifications are enabled
+        if not config.get('enabled', False) and not force_send:
+            logger.debug("Notifications are disabled")
+            return False
+        
+        # Get recipients
+        recipients = config.get('recipients', [])
+        if not recipients:
+            logger.warning("No notification recipients configured")
+            return False
+        
+        # Ensure recipients is a list
+        if isinstance(recipients, str):
+            recipients = [recipients]
+        
+        # Get SMTP settings
+        smtp_config = config.get('smtp', {})
+        smtp_host = smtp_config.get('host')
+        smtp_username = smtp_config.get('username')
+        smtp_password = smtp_config.get('password')
+        sender = smtp_config.get('sender', smtp_username)
+        
+        if not smtp_host or not smtp_username or not smtp_password:
+            logger.warning("SMTP configuration incomplete, skipping notification")
+            return False
+        
+        # Determine if this is an error notification
+        has_errors = report.get('accounts_with_errors', 0) > 0 or report.get('total_errors', 0) > 0
+        
+        # Check if we should send based on send_on setting
+        send_on = config.get('send_on', 'always')
+        if send_on == 'error' and not has_errors:
+            logger.debug("Notification skipped: send_on='error' but no errors occurred")
+            return False
+        
+        # Build subject
+        if has_errors:
+            subject = f"⚠️ [PEC Archiver] Errori nel backup del {target_date.strftime('%Y-%m-%d')}"
+        else:
+            subject = f"✅ [PEC Archiver] Backup completato - {target_date.strftime('%Y-%m-%d')}"
+        
+        # Create message, rendering only the requested bodies
+        body_format = config.get('format', 'both')
+        if body_format == 'text':
+            msg = _utf8_text_part(format_report_text(report, target_date), 'plain')
+        elif body_format == 'html':
+            msg = _utf8_text_part(format_report_html(report, target_date), 'html')
+        else:
+            # Attach plain text and HTML versions
+            msg = MIMEMultipart('alternative')
+            msg.attach(_utf8_text_part(format_report_text(report, target_date), 'plain'))
+            msg.attach(_utf8_text_part(format_report_html(report, target_date), 'html'))
+        msg['Subject'] = subject
+        msg['From'] = sender
+        msg['To'] = ', '.join(recipients)
+        
+        # Serialize once, straight to bytes with SMTP line endings (as
+        # send_message does); a reconnect retry reuses the same data
+        data = msg.as_bytes(policy=msg.policy.clone(linesep='\r\n'))
+        
+        # Send email
+        try:
+            with self._lock:
+                self._sendmail(sender, recipients, data)
+            
+            logger.info(f"Notification sent successfully to {len(recipients)} recipient(s)")
+            return True
+        except smtplib.SMTPException as e:
+            logger.error(f"Failed to send notification: {e}")
+            raise NotificationError(f"SMTP error: {e}")
+        except Exception as e:
+            logger.error(f"Failed to send notification: {e}")
+            raise NotificationError(f"Failed to send notification: {e}")
+    
+    def close(self) -> None:
+        """Close the SMTP connection, if open."""
+        with self._lock:
+            self._disconnect()
+    
+    def _connect(self) -> smtplib.SMTP:
+        """
+        Open and log in an SMTP connection.
+        
+        Returns:
+            Connected SMTP client
+        """
+        smtp_config = self.config.get('smtp', {})
+        smtp_host = smtp_config.get('host')
+        smtp_port = smtp_config.get('port', 587)
+        
+        if smtp_config.get('use_tls', True):
+            server = smtplib.SMTP(smtp_host, smtp_port, timeout=30)
+            server.starttls()
+        else:
+            server = smtplib.SMTP_SSL(smtp_host, smtp_port, timeout=30)
+        
+        server.login(smtp_config.get('username'), smtp_config.get('password'))
+        return server
+    
+    def _disconnect(self) -> None:
+        """Quit the SMTP connection, called with the lock held."""
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            self._server.close()
+        self._server = None
+    
+    def _sendmail(self, sender: str, recipients: list[str], message: bytes) -> None:
+        """
+        Send a message, reconnecting once if the server dropped the connection.
+        
+        A reused connection counts as dropped when the socket is gone or
+        the server answers 421 (service closing, e.g. an idle timeout).
+        
+        Called with the lock held.
+        """
+        try:
+            if self._server is not None:
+                try:
+                    self._server.sendmail(sender, recipients, message)
+                    return
+                except (smtplib.SMTPServerDisconnected, ConnectionError):
+                    logger.debug("SMTP connection lost, reconnecting")
+                except smtplib.SMTPResponseException as e:
+                    if e.smtp_code != 421:
+                        raise
+                    logger.debug(f"SMTP session closed by server ({e.smtp_code}), reconnecting")
+                self._server.close()
+                self._server = None
+            
+            self._server = self._connect()
+            self._server.sendmail(sender, recipients, message)
+        except Exception:
+            # Start from a fresh connection next time
+            self._disconnect()
+            raise
+
+
 def send_notification(
     config: dict,
     report: dict,
@@ -166,7 +379,7 @@ def send_notification(
     force_send: bool = False
 ) -> bool:
     """
-    Send email notification with backup report.
+    Send email notification with backup report over a one-off connection.
     
     Args:
         config: Notification configuration dictionary
@@ -180,82 +393,8 @@ def send_notification(
     Raises:
         NotificationError: If sending fails
     """
-    # Check if notifications are enabled
-    if not config.get('enabled', False) and not force_send:
-        logger.debug("Notifications are disabled")
-        return False
-    
-    # Get recipients
-    recipients = config.get('recipients', [])
-    if not recipients:
-        logger.warning("No notification recipients configured")
-        return False
-    
-    # Ensure recipients is a list
-    if isinstance(recipients, str):
-        recipients = [recipients]
-    
-    # Get SMTP settings
-    smtp_config = config.get('smtp', {})
-    smtp_host = smtp_config.get('host')
-    smtp_port = smtp_config.get('port', 587)
-    smtp_username = smtp_config.get('username')
-    smtp_password = smtp_config.get('password')
-    smtp_use_tls = smtp_config.get('use_tls', True)
-    sender = smtp_config.get('sender', smtp_username)
-    
-    if not smtp_host or not smtp_username or not smtp_password:
-        logger.warning("SMTP configuration incomplete, skipping notification")
-        return False
-    
-    # Determine if this is an error notification
-    has_errors = report.get('accounts_with_errors', 0) > 0 or report.get('total_errors', 0) > 0
-    
-    # Check if we should send based on send_on setting
-    send_on = config.get('send_on', 'always')
-    if send_on == 'error' and not has_errors:
-        logger.debug("Notification skipped: send_on='error' but no errors occurred")
-        return False
-    
-    # Build subject
-    if has_errors:
-        subject = f"⚠️ [PEC Archiver] Errori nel backup del {target_date.strftime('%Y-%m-%d')}"
-    else:
-        subject = f"✅ [PEC Archiver] Backup completato - {target_date.strftime('%Y-%m-%d')}"
-    
-    # Create message
-    msg = MIMEMultipart('alternative')
-    msg['Subject'] = subject
-    msg['From'] = sender
-    msg['To'] = ', '.join(recipients)
-    
-    # Attach plain text and HTML versions
-    text_content = format_report_text(report, target_date)
-    html_content = format_report_html(report, target_date)
-    
-    msg.attach(MIMEText(text_content, 'plain', 'utf-8'))
-    msg.attach(MIMEText(html_content, 'html', 'utf-8'))
-    
-    # Send email
-    try:
-        if smtp_use_tls:
-            server = smtplib.SMTP(smtp_host, smtp_port, timeout=30)
-            server.starttls()
-        else:
-            server = smtplib.SMTP_SSL(smtp_host, smtp_port, timeout=30)
-        
-        server.login(smtp_username, smtp_password)
-        server.sendmail(sender, recipients, msg.as_string())
-        server.quit()
-        
-        logger.info(f"Notification sent successfully to {len(recipients)} recipient(s)")
-        return True
-    except smtplib.SMTPException as e:
-        logger.error(f"Failed to send notification: {e}")
-        raise NotificationError(f"SMTP error: {e}")
-    except Exception as e:
-        logger.error(f"Failed to send notification: {e}")
-        raise NotificationError(f"Failed to send notification: {e}")
+    with Notifier(config) as notifier:
+        return notifier.send(report, target_date, force_send)
 
 
 def validate_notification_config(config: dict) -> list[str]:
@@ -304,4 +443,8 @@ def validate_notification_config(config: dict) -> list[str]:
     if send_on not in ['always', 'error']:
         errors.append("notifications.send_on must be 'always' or 'error'")
     
+    # Check format value
+    if config.get('format', 'both') not in NOTIFICATION_FORMATS:
+        errors.append("notifications.format must be 'both', 'html' or 'text'")
+    
     return errors
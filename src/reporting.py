@@ -6,13 +6,18 @@ Generates summary.json with archive statistics and status.
 from __future__ import annotations
 
 import os
-import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Optional
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
+# Threads reading summary.json files in aggregate_summaries
+SUMMARY_READ_MAX_WORKERS = 8
+
 
 class ReportingError(Exception):
     """Reporting operation error."""
@@ -102,8 +107,8 @@ def create_summary(
     summary_path = os.path.join(account_path, 'summary.json')
     
     try:
-        with open(summary_path, 'w', encoding='utf-8') as f:
-            json.dump(summary, f, ensure_ascii=False, indent=2)
+        with open(summary_path, 'wb') as f:
+            f.write(orjson.dumps(summary, option=orjson.OPT_INDENT_2))
         
         logger.info(f"Created summary: {summary_path}")
         return summary_path
@@ -122,8 +127,8 @@ def format_summary_for_log(summary_path: str) -> str:
         Formatted summary string
     """
     try:
-        with open(summary_path, 'r', encoding='utf-8') as f:
-            summary = json.load(f)
+        with open(summary_path, 'rb') as f:
+            summary = orjson.loads(f.read())
         
         lines = [
             f"Account: {summary.get('account', 'N/A')}",
@@ -149,6 +154,34 @@ def format_summary_for_log(summary_path: str) -> str:
         return f"Failed to format summary: {e}"
 
 
+def _read_summary_totals(summary_path: str) -> Optional[dict]:
+    """
+    Read the fields of a summary.json needed by aggregate_summaries.
+    
+    Args:
+        summary_path: Path to summary.json file
+    
+    Returns:
+        Dictionary with account, status, total_messages, total_size_bytes
+        and error_count, or None if the file cannot be read
+    """
+    try:
+        with open(summary_path, 'rb') as f:
+            summary = orjson.loads(f.read())
+        
+        stats = summary.get('statistics', {})
+        return {
+            'account': summary.get('account'),
+            'status': summary.get('status'),
+            'total_messages': stats.get('total_messages', 0),
+            'total_size_bytes': stats.get('total_size_bytes', 0),
+            'error_count': summary.get('error_count', 0)
+        }
+    except Exception as e:
+        logger.error(f"Failed to read summary {summary_path}: {e}")
+        return None
+
+
 def aggregate_summaries(summary_paths: list[str]) -> dict:
     """
     Aggregate multiple summaries into a single report.
@@ -170,29 +203,29 @@ def aggregate_summaries(summary_paths: list[str]) -> dict:
         'accounts': []
     }
     
-    for summary_path in summary_paths:
-        try:
-            with open(summary_path, 'r', encoding='utf-8') as f:
-                summary = json.load(f)
-            
-            report['accounts_processed'] += 1
-            
-            if summary.get('status') == 'success':
-                report['accounts_successful'] += 1
-            else:
-                report['accounts_with_errors'] += 1
-            
-            stats = summary.get('statistics', {})
-            report['total_messages'] += stats.get('total_messages', 0)
-            report['total_size_bytes'] += stats.get('total_size_bytes', 0)
-            report['total_errors'] += summary.get('error_count', 0)
-            
-            report['accounts'].append({
-                'account': summary.get('account'),
-                'status': summary.get('status'),
-                'messages': stats.get('total_messages', 0)
-            })
-        except Exception as e:
-            logger.error(f"Failed to read summary {summary_path}: {e}")
+    # Summaries are read concurrently; results keep the order of summary_paths
+    with ThreadPoolExecutor(max_workers=SUMMARY_READ_MAX_WORKERS) as executor:
+        totals = list(executor.map(_read_summary_totals, summary_paths))
+    
+    for summary in totals:
+        if summary is None:
+            continue
+        
+        report['accounts_processed'] += 1
+        
+        if summary['status'] == 'success':
+            report['accounts_successful'] += 1
+        else:
+            report['accounts_with_errors'] += 1
+        
+        report['total_messages'] += summary['total_messages']
+        report['total_size_bytes'] += summary['total_size_bytes']
+        report['total_errors'] += summary['error_count']
+        
+        report['accounts'].append({
+            'account': summary['account'],
+            'status': summary['status'],
+            'messages': summary['total_messages']
+        })
     
     return report
@@ -5,20 +5,26 @@ Main scheduler that runs daily at configured time.
 
 from __future__ import annotations
 
-import schedule
 import time
+import schedule
 import logging
+import threading
 from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from typing import Optional
 
 from .config import load_config
 from .worker import AccountWorker, WorkerError
+from .imap_client import IMAPConnectionPool
 from .reporting import aggregate_summaries
-from .notifications import send_notification, NotificationError
+from .notifications import Notifier, NotificationError
 
 logger = logging.getLogger(__name__)
 
+# Longest single wait between checks for due jobs, so wall-clock changes
+# (DST, NTP steps, host suspend) are noticed within this many seconds
+MAX_IDLE_WAIT = 3600
+
 
 class SchedulerError(Exception):
     """Scheduler operation error."""
@@ -31,13 +37,20 @@ class PECScheduler:
     Runs daily at configured time to archive previous day's messages.
     """
     
-    def __init__(self, config: dict = None, config_path: str = None):
+    def __init__(
+        self,
+        config: dict = None,
+        config_path: str = None,
+        parallel_runs: int = 1
+    ):
         """
         Initialize scheduler.
         
         Args:
             config: Configuration dictionary (optional)
             config_path: Path to configuration file (optional)
+            parallel_runs: Number of archive jobs that may run at the same
+                time (e.g. dates of a range); each gets `concurrency` workers
         """
         if config:
             self.config = config
@@ -48,9 +61,33 @@ class PECScheduler:
         self.concurrency = self.config.get('concurrency', 4)
         self.retry_policy = self.config.get('retry_policy', {})
         self.imap_settings = self.config.get('imap', {})
+        self.compression_settings = self.config.get('compression', {})
+        self.storage_settings = self.config.get('storage', {})
         self.accounts = self.config['accounts']
         self.run_time = self.config.get('scheduler', {}).get('run_time', '01:00')
         self.notifications_config = self.config.get('notifications', {})
+        # Shared so consecutive runs reuse one SMTP connection; kept open
+        # between daily runs and reopened if the server dropped it
+        self.notifier = Notifier(self.notifications_config)
+        # Shared so consecutive runs of an account reuse its IMAP login;
+        # idle connections are NOOP-checked before reuse
+        self.imap_pool = IMAPConnectionPool()
+        self._stop = threading.Event()
+        # Workers that outlived account_deadline_seconds and may still be
+        # running, each holding a thread of the executor
+        self._stragglers = set()
+        self._stragglers_lock = threading.Lock()
+        # Shared so consecutive runs reuse the worker threads
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.concurrency * max(1, parallel_runs),
+            thread_name_prefix='pec-worker'
+        )
+    
+    def __enter__(self) -> 'PECScheduler':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
     
     def run_archive_job(self, target_date: datetime = None) -> dict:
         """
@@ -72,23 +109,52 @@ class PECScheduler:
         logger.info(f"Starting archive job for date: {target_date.date()}")
         logger.info(f"Processing {len(self.accounts)} accounts with {self.concurrency} workers")
         
+        with self._stragglers_lock:
+            self._stragglers = {future for future in self._stragglers if not future.done()}
+            stragglers = len(self._stragglers)
+        if stragglers:
+            logger.warning(
+                f"{stragglers} timed-out worker(s) from an earlier run "
+                f"still running, fewer worker threads available"
+            )
+        
         summary_paths = []
         
-        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
-            futures = {}
-            
-            for account in self.accounts:
-                worker = AccountWorker(
-                    account_config=account,
-                    base_path=self.base_path,
-                    retry_policy=self.retry_policy,
-                    imap_settings=self.imap_settings
-                )
-                future = executor.submit(worker.process, target_date)
-                futures[future] = account['username']
+        futures = {}
+        # Monotonic start time of each worker, set when it leaves the
+        # executor queue
+        started = {}
+        
+        for account in self.accounts:
+            worker = AccountWorker(
+                account_config=account,
+                base_path=self.base_path,
+                retry_policy=self.retry_policy,
+                imap_settings=self.imap_settings,
+                compression_settings=self.compression_settings,
+                storage_settings=self.storage_settings,
+                imap_pool=self.imap_pool
+            )
+            future = self._executor.submit(
+                self._run_worker, worker, target_date, started
+            )
+            futures[future] = worker
+        
+        deadline = self.imap_settings.get('account_deadline_seconds')
+        timed_out = []
+        pending = set(futures)
+        
+        while pending:
+            done, pending = wait(
+                pending,
+                timeout=self._deadline_wait(
+                    [futures[future] for future in pending], started, deadline
+                ),
+                return_when=FIRST_COMPLETED
+            )
             
-            for future in as_completed(futures):
-                username = futures[future]
+            for future in done:
+                username = futures[future].username
                 try:
                     summary_path = future.result()
                     summary_paths.append(summary_path)
@@ -97,9 +163,37 @@ class PECScheduler:
                     logger.error(f"Worker error for {username}: {e}")
                 except Exception as e:
                     logger.error(f"Unexpected error for {username}: {e}")
+            
+            if deadline is None:
+                continue
+            
+            now = time.monotonic()
+            for future in list(pending):
+                worker = futures[future]
+                if worker in started and now - started[worker] >= deadline:
+                    # A running worker cannot be interrupted: stop waiting
+                    # for it and let it finish in the background
+                    pending.discard(future)
+                    with self._stragglers_lock:
+                        self._stragglers.add(future)
+                    username = worker.username
+                    timed_out.append(username)
+                    logger.error(
+                        f"Timeout for {username}: not completed "
+                        f"within {deadline}s, excluded from the report"
+                    )
         
         # Aggregate summaries
         report = aggregate_summaries(summary_paths)
+        for username in timed_out:
+            report['accounts_processed'] += 1
+            report['accounts_with_errors'] += 1
+            report['total_errors'] += 1
+            report['accounts'].append({
+                'account': username,
+                'status': 'timeout',
+                'messages': 0
+            })
         
         logger.info(
             f"Archive job completed: "
@@ -112,6 +206,46 @@ class PECScheduler:
         
         return report
     
+    @staticmethod
+    def _deadline_wait(
+        workers: list[AccountWorker],
+        started: dict,
+        deadline: Optional[float]
+    ) -> Optional[float]:
+        """
+        Get how long to wait for the next worker to complete.
+        
+        Args:
+            workers: Workers that have not completed
+            started: Monotonic start time of each started worker
+            deadline: Seconds each account may run (None: no limit)
+        
+        Returns:
+            Seconds until the earliest running account reaches its
+            deadline (at most `deadline`, for workers still queued),
+            or None to wait without a timeout
+        """
+        if deadline is None:
+            return None
+        
+        now = time.monotonic()
+        remaining = [
+            started[worker] + deadline - now
+            for worker in workers
+            if worker in started
+        ]
+        return max(0, min(remaining, default=deadline))
+    
+    @staticmethod
+    def _run_worker(
+        worker: AccountWorker,
+        target_date: datetime,
+        started: dict
+    ) -> str:
+        """Record the worker's start time, then process the account."""
+        started[worker] = time.monotonic()
+        return worker.process(target_date)
+    
     def _send_notification(self, report: dict, target_date: datetime) -> None:
         """
         Send notification with backup report.
@@ -121,11 +255,7 @@ class PECScheduler:
             target_date: Date that was archived
         """
         try:
-            sent = send_notification(
-                config=self.notifications_config,
-                report=report,
-                target_date=target_date
-            )
+            sent = self.notifier.send(report, target_date)
             if sent:
                 logger.info("Notification sent successfully")
         except NotificationError as e:
@@ -137,15 +267,22 @@ class PECScheduler:
         logger.info(f"Scheduled daily archive job at {self.run_time}")
     
     def start(self) -> None:
-        """Start the scheduler and run indefinitely."""
+        """Start the scheduler and run until stop() is called."""
         self.schedule_daily()
         
         logger.info("PEC Archiver scheduler started")
         logger.info(f"Waiting for scheduled time: {self.run_time}")
         
-        while True:
+        while not self._stop.is_set():
             schedule.run_pending()
-            time.sleep(60)
+            # Sleep until the next job is due instead of polling
+            idle = schedule.idle_seconds()
+            timeout = MAX_IDLE_WAIT if idle is None else min(max(idle, 1), MAX_IDLE_WAIT)
+            self._stop.wait(timeout=timeout)
+    
+    def stop(self) -> None:
+        """Make start() return after the current wait or job."""
+        self._stop.set()
     
     def run_once(self, target_date: datetime = None) -> dict:
         """
@@ -158,3 +295,15 @@ class PECScheduler:
             Aggregated report dictionary
         """
         return self.run_archive_job(target_date)
+    
+    def close(self) -> None:
+        """
+        Release resources held between runs (worker threads, connections).
+        
+        Does not wait for timed-out workers still running: they finish in
+        the background, and the pool logs out their connections when they
+        are released.
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.imap_pool.close()
+        self.notifier.close()
@@ -0,0 +1,433 @@
+"""
+Search index module for PEC Archiver.
+Maintains a SQLite FTS5 index over the metadata stored in index.json files.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import logging
+import time
+import threading
+from contextlib import contextmanager
+from datetime import date
+from typing import Iterator, Optional
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Trigram tokens need at least this many characters to be matched by FTS5;
+# shorter search terms fall back to a plain substring test.
+MIN_FTS_TERM_LENGTH = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS emails (
+    rowid INTEGER PRIMARY KEY,
+    account TEXT NOT NULL,
+    date TEXT NOT NULL,
+    uid TEXT NOT NULL,
+    folder TEXT,
+    filename TEXT,
+    filepath TEXT,
+    subject TEXT,
+    sender TEXT,
+    to_addr TEXT,
+    cc TEXT,
+    message_id TEXT,
+    size INTEGER,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS emails_account_date ON emails (account, date);
+CREATE INDEX IF NOT EXISTS emails_order ON emails (date, account, folder, uid);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS emails_fts USING fts5(
+    subject, sender, to_addr, cc,
+    content='emails', content_rowid='rowid', tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS emails_ai AFTER INSERT ON emails BEGIN
+    INSERT INTO emails_fts (rowid, subject, sender, to_addr, cc)
+    VALUES (new.rowid, new.subject, new.sender, new.to_addr, new.cc);
+END;
+CREATE TRIGGER IF NOT EXISTS emails_ad AFTER DELETE ON emails BEGIN
+    INSERT INTO emails_fts (emails_fts, rowid, subject, sender, to_addr, cc)
+    VALUES ('delete', old.rowid, old.subject, old.sender, old.to_addr, old.cc);
+END;
+
+CREATE TABLE IF NOT EXISTS indexed_files (
+    path TEXT PRIMARY KEY,
+    account TEXT NOT NULL,
+    date TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+"""
+
+
+class SearchIndexError(Exception):
+    """Search index operation error."""
+    pass
+
+
+def search_result_key(result: dict) -> tuple[str, str, str, str]:
+    """
+    Get the sort/pagination key of a search result.
+    
+    Results are ordered by this key in descending order, so the newest
+    dates come first and ties are broken deterministically.
+    
+    Args:
+        result: Search result dictionary (account, date, email)
+    
+    Returns:
+        Tuple of (date, account, folder, uid)
+    """
+    email = result['email']
+    return (
+        result['date'],
+        result['account'],
+        email.get('folder', ''),
+        str(email.get('uid', ''))
+    )
+
+
+def _fts_phrase(term: str) -> str:
+    """Quote a search term as an FTS5 phrase."""
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _py_lower(value: Optional[str]) -> Optional[str]:
+    """
+    Lowercase a column value with Python's str.lower.
+    
+    SQLite's lower() only folds ASCII; using the same folding as the
+    filesystem scan keeps accented text matching the same way.
+    """
+    return value.lower() if value is not None else None
+
+
+class SearchIndex:
+    """
+    Persistent full-text index over the archive's index.json files.
+    
+    The index is stored in a SQLite database and kept in sync
+    incrementally: only index.json files whose mtime or size changed
+    since the last refresh are re-read.
+    """
+    
+    def __init__(self, base_path: str, db_path: Optional[str] = None):
+        """
+        Initialize search index.
+        
+        Args:
+            base_path: Base path of the archive
+            db_path: Path to the SQLite database (default: base_path/.search.db)
+        
+        Raises:
+            SearchIndexError: If the database cannot be created
+        """
+        self.base_path = base_path
+        self.db_path = db_path or os.path.join(base_path, '.search.db')
+        self._refresh_lock = threading.Lock()
+        # time.monotonic() of the last completed refresh (None: never)
+        self._refreshed_at: Optional[float] = None
+        
+        try:
+            with self._connect() as conn:
+                conn.executescript(SCHEMA)
+        except sqlite3.Error as e:
+            raise SearchIndexError(f"Failed to initialize search index: {e}")
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection to the index database, committing on success."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.create_function('py_lower', 1, _py_lower, deterministic=True)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def _scan_index_files(self) -> dict[str, tuple[str, str, int, int]]:
+        """
+        Find all index.json files in the archive.
+        
+        Returns:
+            Dictionary mapping index path to (account, date, mtime_ns, size)
+        """
+        found = {}
+        
+        with os.scandir(self.base_path) as accounts:
+            for account_entry in accounts:
+                if not account_entry.is_dir():
+                    continue
+                with os.scandir(account_entry.path) as years:
+                    for year_entry in years:
+                        if not year_entry.is_dir() or not year_entry.name.isdigit():
+                            continue
+                        with os.scandir(year_entry.path) as dates:
+                            for date_entry in dates:
+                                if not date_entry.is_dir():
+                                    continue
+                                index_path = os.path.join(date_entry.path, 'index.json')
+                                try:
+                                    st = os.stat(index_path)
+                                except OSError:
+                                    continue
+                                found[index_path] = (
+                                    account_entry.name,
+                                    date_entry.name,
+                                    st.st_mtime_ns,
+                                    st.st_size
+                                )
+        
+        return found
+    
+    def refresh(self) -> int:
+        """
+        Bring the index in sync with the index.json files on disk.
+        
+        Returns:
+            Number of index.json files (re)loaded or removed
+        
+        Raises:
+            SearchIndexError: If the index cannot be updated
+        """
+        with self._refresh_lock:
+            return self._refresh_locked()
+    
+    def refresh_if_stale(self, max_age: float) -> None:
+        """
+        Refresh the index if the last refresh is older than max_age.
+        
+        The first refresh runs in the calling thread, so the index is
+        populated before it is queried. Later refreshes run on a
+        background thread and are skipped while one is in progress;
+        queries keep reading the current data meanwhile.
+        
+        Args:
+            max_age: Seconds after which the index is considered stale
+        
+        Raises:
+            SearchIndexError: If the first refresh fails
+        """
+        if self._refreshed_at is None:
+            with self._refresh_lock:
+                if self._refreshed_at is None:
+                    self._refresh_locked()
+            return
+        
+        if time.monotonic() - self._refreshed_at < max_age:
+            return
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        
+        threading.Thread(
+            target=self._background_refresh,
+            name='search-index-refresh',
+            daemon=True
+        ).start()
+    
+    def _background_refresh(self) -> None:
+        """Refresh on a background thread; the refresh lock is already held."""
+        try:
+            self._refresh_locked()
+        except SearchIndexError as e:
+            logger.error(str(e))
+        finally:
+            self._refresh_lock.release()
+    
+    def _refresh_locked(self) -> int:
+        """Refresh with the refresh lock held, recording when it completed."""
+        try:
+            changes = self._refresh()
+        except (sqlite3.Error, OSError) as e:
+            raise SearchIndexError(f"Failed to refresh search index: {e}")
+        self._refreshed_at = time.monotonic()
+        return changes
+    
+    def _refresh(self) -> int:
+        """Refresh implementation, called with the refresh lock held."""
+        on_disk = self._scan_index_files()
+        changes = 0
+        
+        with self._connect() as conn:
+            known = {
+                path: (mtime_ns, size)
+                for path, mtime_ns, size in conn.execute(
+                    'SELECT path, mtime_ns, size FROM indexed_files'
+                )
+            }
+            
+            # Drop entries for index files that no longer exist
+            for path in known.keys() - on_disk.keys():
+                account, date_dir = conn.execute(
+                    'SELECT account, date FROM indexed_files WHERE path = ?',
+                    (path,)
+                ).fetchone()
+                conn.execute(
+                    'DELETE FROM emails WHERE account = ? AND date = ?',
+                    (account, date_dir)
+                )
+                conn.execute('DELETE FROM indexed_files WHERE path = ?', (path,))
+                changes += 1
+            
+            # (Re)load new or modified index files
+            for path, (account, date_dir, mtime_ns, size) in on_disk.items():
+                if known.get(path) == (mtime_ns, size):
+                    continue
+                
+                try:
+                    with open(path, 'rb') as f:
+                        index_data = orjson.loads(f.read())
+                except (orjson.JSONDecodeError, OSError) as e:
+                    logger.error(f"Failed to load index.json from {path}: {e}")
+                    continue
+                
+                conn.execute(
+                    'DELETE FROM emails WHERE account = ? AND date = ?',
+                    (account, date_dir)
+                )
+                conn.executemany(
+                    'INSERT INTO emails (account, date, uid, folder, filename, '
+                    'filepath, subject, sender, to_addr, cc, message_id, size, data) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    [
+                        (
+                            account,
+                            date_dir,
+                            str(email.get('uid', '')),
+                            email.get('folder', ''),
+                            email.get('filename', ''),
+                            email.get('filepath', ''),
+                            email.get('subject', ''),
+                            email.get('from', ''),
+                            email.get('to', ''),
+                            email.get('cc', ''),
+                            email.get('message_id', ''),
+                            email.get('size', 0),
+                            orjson.dumps(email)
+                        )
+                        for email in index_data
+                    ]
+                )
+                conn.execute(
+                    'INSERT OR REPLACE INTO indexed_files '
+                    '(path, account, date, mtime_ns, size) VALUES (?, ?, ?, ?, ?)',
+                    (path, account, date_dir, mtime_ns, size)
+                )
+                changes += 1
+        
+        if changes:
+            logger.info(f"Search index refreshed: {changes} index file(s) updated")
+        return changes
+    
+    def search(
+        self,
+        subject: Optional[str] = None,
+        sender: Optional[str] = None,
+        recipient: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        account: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+        after: Optional[tuple[str, str, str, str]] = None
+    ) -> tuple[list[dict], int]:
+        """
+        Search indexed emails.
+        
+        Text filters are case-insensitive substring matches, as in
+        the filesystem search.
+        
+        Args:
+            subject: Subject filter
+            sender: Sender filter
+            recipient: Recipient filter (matches To or Cc)
+            date_from: Start date filter
+            date_to: End date filter
+            account: Account filter
+            limit: Maximum results to return
+            offset: Offset for pagination
+            after: Only return results ordered after this key
+                (see search_result_key)
+        
+        Returns:
+            Tuple of (list of matching emails, total count without `after`)
+        
+        Raises:
+            SearchIndexError: If the query fails
+        """
+        where = []
+        params = []
+        match_terms = []
+        
+        if account:
+            where.append('account = ?')
+            params.append(account)
+        if date_from:
+            where.append('date >= ?')
+            params.append(date_from.isoformat())
+        if date_to:
+            where.append('date <= ?')
+            params.append(date_to.isoformat())
+        
+        for columns, term in (
+            (('subject',), subject),
+            (('sender',), sender),
+            (('to_addr', 'cc'), recipient)
+        ):
+            if not term:
+                continue
+            if len(term) >= MIN_FTS_TERM_LENGTH:
+                match_terms.append(
+                    '{' + ' '.join(columns) + '} : ' + _fts_phrase(term)
+                )
+            else:
+                where.append(
+                    '(' + ' OR '.join(f'instr(py_lower({c}), ?) > 0' for c in columns) + ')'
+                )
+                params.extend([term.lower()] * len(columns))
+        
+        if match_terms:
+            where.append('rowid IN (SELECT rowid FROM emails_fts WHERE emails_fts MATCH ?)')
+            params.append(' AND '.join(match_terms))
+        
+        where_sql = ('WHERE ' + ' AND '.join(where)) if where else ''
+        
+        # Keyset pagination: continue strictly after the given key
+        page_where = list(where)
+        page_params = list(params)
+        if after is not None:
+            page_where.append('(date, account, folder, uid) < (?, ?, ?, ?)')
+            page_params.extend(after)
+        page_where_sql = ('WHERE ' + ' AND '.join(page_where)) if page_where else ''
+        
+        try:
+            with self._connect() as conn:
+                total = conn.execute(
+                    f'SELECT COUNT(*) FROM emails {where_sql}', params
+                ).fetchone()[0]
+                rows = conn.execute(
+                    f'SELECT account, date, data FROM emails {page_where_sql} '
+                    'ORDER BY date DESC, account DESC, folder DESC, uid DESC '
+                    'LIMIT ? OFFSET ?',
+                    page_params + [limit, offset]
+                ).fetchall()
+        except sqlite3.Error as e:
+            raise SearchIndexError(f"Search query failed: {e}")
+        
+        results = [
+            {
+                'account': acc,
+                'date': date_dir,
+                'email': orjson.loads(data)
+            }
+            for acc, date_dir, data in rows
+        ]
+        return results, total
@@ -6,14 +6,34 @@ Handles saving .eml files and creating folder structure.
 from __future__ import annotations
 
 import os
-import re
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from email.message import Message
 from typing import Optional
 
+from .indexing import decode_email_header
+
 logger = logging.getLogger(__name__)
 
+# Threads issuing fsync calls in sync_folder; the calls mostly wait on
+# the disk, so a few of them let the device merge the flushes
+SYNC_MAX_WORKERS = 8
+
+# Characters not allowed in file and directory names
+INVALID_NAME_CHARS = '<>:"/\\|?*'
+
+# Filenames: invalid characters become '_', control characters are removed
+FILENAME_TRANSLATION = str.maketrans(
+    {char: '_' for char in INVALID_NAME_CHARS}
+    | {code: None for code in [*range(0x20), 0x7f]}
+)
+
+# Folder names: spaces and invalid characters become '_'
+FOLDER_NAME_TRANSLATION = str.maketrans(
+    {char: '_' for char in ' ' + INVALID_NAME_CHARS}
+)
+
 
 class StorageError(Exception):
     """Storage operation error."""
@@ -30,14 +50,8 @@ def sanitize_filename(filename: str) -> str:
     Returns:
         Sanitized filename safe for filesystem
     """
-    # Remove or replace invalid characters
-    filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
-    # Remove control characters
-    filename = re.sub(r'[\x00-\x1f\x7f]', '', filename)
-    # Limit length
-    if len(filename) > 200:
-        filename = filename[:200]
-    return filename
+    # Replace invalid characters, remove control characters, limit length
+    return filename.translate(FILENAME_TRANSLATION)[:200]
 
 
 def sanitize_folder_name(folder: str) -> str:
@@ -50,11 +64,17 @@ def sanitize_folder_name(folder: str) -> str:
     Returns:
         Sanitized folder name safe for filesystem
     """
-    # Replace spaces with underscores
-    folder = folder.replace(' ', '_')
-    # Remove invalid characters
-    folder = re.sub(r'[<>:"/\\|?*]', '_', folder)
-    return folder
+    # Replace spaces and invalid characters with underscores
+    return folder.translate(FOLDER_NAME_TRANSLATION)
+
+
+def _fsync_path(path: str) -> None:
+    """Flush a file or directory to disk."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
 
 
 class Storage:
@@ -71,6 +91,12 @@ class Storage:
             base_path: Base path for archive storage
         """
         self.base_path = base_path
+        # Paths are requested for every saved message; they only depend
+        # on (account, day[, folder]), so compute each one once
+        self._account_paths: dict[tuple[str, int], str] = {}
+        self._folder_paths: dict[tuple[str, int, str], str] = {}
+        # Folder directories already created by this instance
+        self._created_folders: set[str] = set()
     
     def get_account_path(self, account: str, date: datetime) -> str:
         """
@@ -85,14 +111,22 @@ class Storage:
         Returns:
             Full path to account's date directory
         """
+        key = (account, date.toordinal())
+        account_path = self._account_paths.get(key)
+        if account_path is not None:
+            return account_path
+        
         # Sanitize account name (use part before @)
         account_name = account.split('@')[0]
         account_name = sanitize_filename(account_name)
         
-        year = date.strftime('%Y')
-        date_str = date.strftime('%Y-%m-%d')
+        # Format directly; strftime is much slower for these fixed formats
+        year = f"{date.year:04d}"
+        date_str = f"{year}-{date.month:02d}-{date.day:02d}"
         
-        return os.path.join(self.base_path, account_name, year, date_str)
+        account_path = os.path.join(self.base_path, account_name, year, date_str)
+        self._account_paths[key] = account_path
+        return account_path
     
     def get_folder_path(self, account: str, date: datetime, folder: str) -> str:
         """
@@ -106,9 +140,13 @@ class Storage:
         Returns:
             Full path to folder directory
         """
-        account_path = self.get_account_path(account, date)
-        folder_name = sanitize_folder_name(folder)
-        return os.path.join(account_path, folder_name)
+        key = (account, date.toordinal(), folder)
+        folder_path = self._folder_paths.get(key)
+        if folder_path is None:
+            account_path = self.get_account_path(account, date)
+            folder_path = os.path.join(account_path, sanitize_folder_name(folder))
+            self._folder_paths[key] = folder_path
+        return folder_path
     
     def create_directory_structure(
         self,
@@ -135,18 +173,44 @@ class Storage:
         try:
             os.makedirs(account_path, exist_ok=True)
             logger.debug(f"Created directory: {account_path}")
-            
-            for folder in folders:
-                folder_path = os.path.join(
-                    account_path,
-                    sanitize_folder_name(folder)
-                )
-                os.makedirs(folder_path, exist_ok=True)
-                logger.debug(f"Created directory: {folder_path}")
-            
-            return account_path
         except OSError as e:
             raise StorageError(f"Failed to create directory structure: {e}")
+        
+        for folder in folders:
+            self.ensure_folder(account, date, folder)
+        
+        return account_path
+    
+    def ensure_folder(self, account: str, date: datetime, folder: str) -> str:
+        """
+        Create a folder's directory if it does not exist.
+        
+        Call once per folder before saving its messages with save_eml.
+        Folders already created by this Storage (including those created
+        by create_directory_structure) are not created again.
+        
+        Args:
+            account: Account username
+            date: Archive date
+            folder: IMAP folder name
+        
+        Returns:
+            Full path to folder directory
+        
+        Raises:
+            StorageError: If directory creation fails
+        """
+        folder_path = self.get_folder_path(account, date, folder)
+        if folder_path in self._created_folders:
+            return folder_path
+        
+        try:
+            os.makedirs(folder_path, exist_ok=True)
+        except OSError as e:
+            raise StorageError(f"Failed to create folder directory: {e}")
+        logger.debug(f"Created directory: {folder_path}")
+        self._created_folders.add(folder_path)
+        return folder_path
     
     def save_eml(
         self,
@@ -160,6 +224,9 @@ class Storage:
         """
         Save a message as .eml file.
         
+        The folder directory must already exist (see ensure_folder and
+        create_directory_structure).
+        
         Args:
             account: Account username
             date: Archive date
@@ -174,12 +241,43 @@ class Storage:
         Raises:
             StorageError: If save fails
         """
-        folder_path = self.get_folder_path(account, date, folder)
+        return self.save_eml_to(
+            self.get_folder_path(account, date, folder),
+            uid,
+            message,
+            raw_email
+        )
+    
+    def save_eml_to(
+        self,
+        folder_path: str,
+        uid: str,
+        message: Message,
+        raw_email: bytes
+    ) -> str:
+        """
+        Save a message as .eml file into an existing folder directory.
+        
+        Same as save_eml, for callers that already hold the folder path
+        (e.g. from ensure_folder) and save many messages into it.
         
-        # Create filename from subject or UID
+        Args:
+            folder_path: Full path to folder directory
+            uid: Message UID
+            message: Parsed email message
+            raw_email: Raw email bytes
+        
+        Returns:
+            Path to saved .eml file
+        
+        Raises:
+            StorageError: If save fails
+        """
+        # Create filename from subject or UID; plain subjects are used as
+        # they are, only RFC 2047 encoded words are decoded
         subject = message.get('Subject', 'no_subject')
         if subject:
-            subject = sanitize_filename(str(subject))[:50]
+            subject = sanitize_filename(decode_email_header(subject)[:80])[:50]
         else:
             subject = 'no_subject'
         
@@ -187,7 +285,6 @@ class Storage:
         filepath = os.path.join(folder_path, filename)
         
         try:
-            os.makedirs(folder_path, exist_ok=True)
             with open(filepath, 'wb') as f:
                 f.write(raw_email)
             logger.debug(f"Saved message to: {filepath}")
@@ -214,14 +311,48 @@ class Storage:
         """
         folder_path = self.get_folder_path(account, date, folder)
         
-        if not os.path.exists(folder_path):
+        try:
+            with os.scandir(folder_path) as entries:
+                return [
+                    entry.path
+                    for entry in entries
+                    if entry.name.endswith('.eml') and entry.is_file()
+                ]
+        except FileNotFoundError:
             return []
+    
+    def sync_folder(self, account: str, date: datetime, folder: str) -> int:
+        """
+        Flush a folder's saved .eml files to disk.
+        
+        Every file is fsynced (a few at a time), then the folder and
+        account directories, so that both the file contents and their
+        directory entries survive a crash.
+        
+        Args:
+            account: Account username
+            date: Archive date
+            folder: IMAP folder name
+        
+        Returns:
+            Number of files synced
+        
+        Raises:
+            StorageError: If a file or directory cannot be synced
+        """
+        filepaths = self.get_saved_messages(account, date, folder)
+        folder_path = self.get_folder_path(account, date, folder)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=SYNC_MAX_WORKERS) as executor:
+                list(executor.map(_fsync_path, filepaths))
+            _fsync_path(folder_path)
+            _fsync_path(self.get_account_path(account, date))
+        except OSError as e:
+            raise StorageError(f"Failed to sync folder to disk: {e}")
         
-        return [
-            os.path.join(folder_path, f)
-            for f in os.listdir(folder_path)
-            if f.endswith('.eml')
-        ]
+        logger.debug(f"Synced {len(filepaths)} files in {folder_path}")
+        return len(filepaths)
     
     def get_all_saved_messages(
         self,
@@ -5,19 +5,37 @@ Processes a single PEC account's mailbox.
 
 from __future__ import annotations
 
+import queue
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Optional
 from email.message import Message
 
-from .imap_client import IMAPClient, IMAPError, with_retry
+from .imap_client import (
+    IMAPClient,
+    IMAPConnectionPool,
+    IMAPAuthenticationError,
+    IMAPError,
+    with_retry
+)
 from .storage import Storage, StorageError
 from .indexing import Indexer
-from .compression import create_archive, create_digest, CompressionError
+from .compression import (
+    create_archive,
+    create_digest,
+    CompressionError,
+    ARCHIVE_COMPRESS_LEVEL
+)
 from .reporting import create_summary
 
 logger = logging.getLogger(__name__)
 
+# Fetched messages waiting to be written; bounds memory if the disk is
+# slower than the IMAP connection
+WRITE_QUEUE_SIZE = 64
+
 
 class WorkerError(Exception):
     """Worker operation error."""
@@ -35,7 +53,10 @@ class AccountWorker:
         account_config: dict,
         base_path: str,
         retry_policy: dict = None,
-        imap_settings: dict = None
+        imap_settings: dict = None,
+        compression_settings: dict = None,
+        storage_settings: dict = None,
+        imap_pool: Optional[IMAPConnectionPool] = None
     ):
         """
         Initialize account worker.
@@ -45,6 +66,10 @@ class AccountWorker:
             base_path: Base path for archive storage
             retry_policy: Retry policy configuration
             imap_settings: IMAP settings configuration
+            compression_settings: Archive compression configuration
+            storage_settings: Storage configuration
+            imap_pool: Pool to take the IMAP connection from (default: open
+                a dedicated connection for each process() call)
         """
         self.account_config = account_config
         self.base_path = base_path
@@ -57,6 +82,9 @@ class AccountWorker:
             'timeout': 30,
             'batch_size': 100
         }
+        self.compression_settings = compression_settings or {}
+        self.storage_settings = storage_settings or {}
+        self.imap_pool = imap_pool
         
         self.username = account_config['username']
         self.password = account_config['password']
@@ -115,7 +143,10 @@ class AccountWorker:
                 connect_and_fetch,
                 max_retries=self.retry_policy['max_retries'],
                 initial_delay=self.retry_policy['initial_delay'],
-                backoff_multiplier=self.retry_policy['backoff_multiplier']
+                backoff_multiplier=self.retry_policy['backoff_multiplier'],
+                max_delay=self.retry_policy.get('max_delay', 300),
+                # Rejected credentials will not be accepted on a retry
+                stop_on=(IMAPAuthenticationError,)
             )
         except Exception as e:
             self.errors.append({
@@ -140,12 +171,15 @@ class AccountWorker:
         archive_path = None
         digest_path = None
         try:
-            archive_path = create_archive(
+            archive_path, archive_digest = create_archive(
                 account_path,
                 account_name,
-                target_date
+                target_date,
+                compresslevel=self.compression_settings.get(
+                    'level', ARCHIVE_COMPRESS_LEVEL
+                )
             )
-            digest_path = create_digest(archive_path)
+            digest_path = create_digest(archive_path, archive_digest)
         except CompressionError as e:
             self.errors.append({
                 'type': 'compression',
@@ -185,33 +219,98 @@ class AccountWorker:
         """
         Fetch and save messages from all folders.
         
+        With imap.folder_connections > 1, up to that many folders are
+        fetched at the same time over separate connections.
+        
         Args:
             target_date: Date to fetch messages for
             indexer: Indexer to add messages to
         """
-        with IMAPClient(
+        pool = self.imap_pool if self.imap_pool is not None else IMAPConnectionPool()
+        try:
+            # Connect up front, so a login failure reaches with_retry
+            client = self._acquire_client(pool)
+            connections = min(
+                self.imap_settings.get('folder_connections', 1),
+                len(self.folders)
+            )
+            
+            if connections <= 1:
+                try:
+                    for folder in self.folders:
+                        try:
+                            self._fetch_folder_messages(client, folder, target_date, indexer)
+                        except IMAPError as e:
+                            self._add_folder_error(folder, e)
+                except BaseException:
+                    pool.discard(client)
+                    raise
+                pool.release(client)
+                return
+            
+            # Fetch folders concurrently, each on a connection from the pool
+            pool.release(client)
+            with ThreadPoolExecutor(max_workers=connections) as executor:
+                list(executor.map(
+                    lambda folder: self._fetch_folder_pooled(pool, folder, target_date, indexer),
+                    self.folders
+                ))
+        finally:
+            if pool is not self.imap_pool:
+                pool.close()
+    
+    def _acquire_client(self, pool: IMAPConnectionPool) -> IMAPClient:
+        """Get a connected IMAP client for this account from a pool."""
+        return pool.acquire(
             host=self.host,
             username=self.username,
             password=self.password,
             port=self.port,
             timeout=self.imap_settings['timeout']
-        ) as client:
-            for folder in self.folders:
-                try:
-                    self._fetch_folder_messages(
-                        client,
-                        folder,
-                        target_date,
-                        indexer
-                    )
-                except IMAPError as e:
-                    self.errors.append({
-                        'type': 'imap',
-                        'folder': folder,
-                        'message': str(e),
-                        'timestamp': datetime.now().isoformat()
-                    })
-                    logger.error(f"Error fetching folder '{folder}': {e}")
+        )
+    
+    def _fetch_folder_pooled(
+        self,
+        pool: IMAPConnectionPool,
+        folder: str,
+        target_date: datetime,
+        indexer: Indexer
+    ) -> None:
+        """
+        Fetch and save messages from a single folder on a pooled connection.
+        
+        Args:
+            pool: Pool to take the connection from
+            folder: Folder name
+            target_date: Date to fetch messages for
+            indexer: Indexer to add messages to
+        """
+        try:
+            client = self._acquire_client(pool)
+        except IMAPError as e:
+            self._add_folder_error(folder, e)
+            return
+        
+        try:
+            self._fetch_folder_messages(client, folder, target_date, indexer)
+        except IMAPError as e:
+            pool.discard(client)
+            self._add_folder_error(folder, e)
+            return
+        except BaseException:
+            pool.discard(client)
+            raise
+        pool.release(client)
+    
+    def _add_folder_error(self, folder: str, error: IMAPError) -> None:
+        """Record an IMAP error that stopped fetching a folder."""
+        self.errors.append({
+            'type': 'imap',
+            'folder': folder,
+            'message': str(error),
+            'timestamp': datetime.now().isoformat()
+        })
+        logger.error(f"Error fetching folder '{folder}': {error}")
     
     def _fetch_folder_messages(
         self,
@@ -223,27 +322,93 @@ class AccountWorker:
         """
         Fetch and save messages from a single folder.
         
+        Messages are written on a separate thread, so the IMAP connection
+        keeps fetching while earlier messages are saved and indexed.
+        
         Args:
             client: IMAP client
             folder: Folder name
             target_date: Date to fetch messages for
             indexer: Indexer to add messages to
         """
-        for msg, raw_email, uid in client.fetch_messages_by_date(
-            folder,
-            target_date,
-            batch_size=self.imap_settings['batch_size']
-        ):
+        try:
+            folder_path = self.storage.ensure_folder(self.username, target_date, folder)
+        except StorageError as e:
+            self.errors.append({
+                'type': 'storage',
+                'folder': folder,
+                'message': str(e),
+                'timestamp': datetime.now().isoformat()
+            })
+            logger.error(f"Error preparing folder '{folder}': {e}")
+            return
+        
+        write_queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        writer_errors = []
+        writer = threading.Thread(
+            target=self._save_messages,
+            args=(write_queue, folder, folder_path, indexer, writer_errors),
+            daemon=True
+        )
+        writer.start()
+        
+        try:
+            for item in client.fetch_messages_by_date(
+                folder,
+                target_date,
+                batch_size=self.imap_settings['batch_size'],
+                target_batch_bytes=self.imap_settings.get('target_batch_bytes')
+            ):
+                write_queue.put(item)
+        finally:
+            write_queue.put(None)
+            writer.join()
+        
+        if writer_errors:
+            raise writer_errors[0]
+        
+        if self.storage_settings.get('fsync', False):
+            try:
+                self.storage.sync_folder(self.username, target_date, folder)
+            except StorageError as e:
+                self.errors.append({
+                    'type': 'storage',
+                    'folder': folder,
+                    'message': str(e),
+                    'timestamp': datetime.now().isoformat()
+                })
+                logger.error(f"Error syncing folder '{folder}': {e}")
+    
+    def _save_messages(
+        self,
+        write_queue: queue.Queue,
+        folder: str,
+        folder_path: str,
+        indexer: Indexer,
+        writer_errors: list
+    ) -> None:
+        """
+        Save and index messages from a queue until a None sentinel arrives.
+        
+        Args:
+            write_queue: Queue of (Message, raw email bytes, UID) tuples
+            folder: Folder name
+            folder_path: Directory to save the messages into
+            indexer: Indexer to add messages to
+            writer_errors: List receiving an unexpected exception, which
+                stops saving but keeps draining the queue
+        """
+        while True:
+            item = write_queue.get()
+            if item is None:
+                return
+            if writer_errors:
+                continue
+            
+            msg, raw_email, uid = item
             try:
-                filepath = self.storage.save_eml(
-                    self.username,
-                    target_date,
-                    folder,
-                    uid,
-                    msg,
-                    raw_email
-                )
-                indexer.add_message(msg, uid, folder, filepath)
+                filepath = self.storage.save_eml_to(folder_path, uid, msg, raw_email)
+                indexer.add_message(msg, uid, folder, filepath, len(raw_email))
             except StorageError as e:
                 self.errors.append({
                     'type': 'storage',
@@ -253,3 +418,5 @@ class AccountWorker:
                     'timestamp': datetime.now().isoformat()
                 })
                 logger.error(f"Error saving message {uid}: {e}")
+            except Exception as e:
+                writer_errors.append(e)
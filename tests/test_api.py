@@ -2,74 +2,155 @@
 Tests for REST API module.
 """
 
+import io
 import os
 import json
-import tempfile
+import shutil
 import pytest
-from datetime import datetime
+from datetime import datetime, date
+from email import policy
+from email.generator import BytesGenerator
 from email.message import EmailMessage
 
 from fastapi.testclient import TestClient
 
-from src.api import app, set_base_path, get_base_path
+from src import api
+from src.api import (
+    app,
+    set_base_path,
+    get_base_path,
+    load_index_json,
+    clear_index_cache,
+    clear_listing_cache,
+    search_emails,
+    search_result_key,
+    scan_emails,
+    find_index_matches,
+    list_date_dirs,
+    is_within_base_path,
+    read_summary_message_count,
+    email_payload,
+    SEARCH_FIELD_SUBJECT,
+    SEARCH_FIELD_RECIPIENT
+)
 from src.indexing import Indexer
 from src.storage import Storage
 
 
-@pytest.fixture
-def temp_archive():
-    """Create a temporary archive with test data."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        # Create test account structure
-        account_name = "test"
-        date_str = "2024-01-15"
-        year = "2024"
-        
-        storage = Storage(tmpdir)
-        target_date = datetime(2024, 1, 15)
-        
-        # Create directory structure
-        folders = ["INBOX", "Posta inviata"]
-        storage.create_directory_structure(f"{account_name}@pec.it", target_date, folders)
-        
-        # Create test messages
-        messages = []
-        for i in range(3):
-            msg = EmailMessage()
-            msg["Subject"] = f"Test Subject {i+1}"
-            msg["From"] = f"sender{i+1}@example.com"
-            msg["To"] = f"recipient{i+1}@example.com"
-            msg["Date"] = f"Mon, 15 Jan 2024 10:{i}0:00 +0100"
-            msg["Message-ID"] = f"<{i+1}@example.com>"
-            msg.set_content(f"Test body {i+1}")
-            
-            folder = "INBOX" if i < 2 else "Posta inviata"
-            filepath = storage.save_eml(
-                f"{account_name}@pec.it",
-                target_date,
-                folder,
-                str(i + 1),
-                msg,
-                msg.as_bytes()
-            )
-            messages.append((msg, str(i + 1), folder, filepath))
+def build_archive(tmpdir):
+    """Create an archive with test data in tmpdir; return (account, date)."""
+    # Create test account structure
+    account_name = "test"
+    date_str = "2024-01-15"
+    year = "2024"
+    
+    storage = Storage(tmpdir)
+    target_date = datetime(2024, 1, 15)
+    
+    # Create directory structure
+    folders = ["INBOX", "Posta inviata"]
+    storage.create_directory_structure(f"{account_name}@pec.it", target_date, folders)
+    
+    # Create test messages, serialized with one reused generator
+    messages = []
+    buffer = io.BytesIO()
+    generator = BytesGenerator(buffer, mangle_from_=False, policy=policy.default)
+    for i in range(3):
+        msg = EmailMessage()
+        msg["Subject"] = f"Test Subject {i+1}"
+        msg["From"] = f"sender{i+1}@example.com"
+        msg["To"] = f"recipient{i+1}@example.com"
+        msg["Date"] = f"Mon, 15 Jan 2024 10:{i}0:00 +0100"
+        msg["Message-ID"] = f"<{i+1}@example.com>"
+        msg.set_content(f"Test body {i+1}")
         
-        # Create index
-        account_path = storage.get_account_path(f"{account_name}@pec.it", target_date)
-        indexer = Indexer(account_path)
-        for msg, uid, folder, filepath in messages:
-            indexer.add_message(msg, uid, folder, filepath)
-        indexer.generate_json()
+        buffer.seek(0)
+        buffer.truncate()
+        generator.flatten(msg)
         
-        yield tmpdir, account_name, date_str
+        folder = "INBOX" if i < 2 else "Posta inviata"
+        filepath = storage.save_eml(
+            f"{account_name}@pec.it",
+            target_date,
+            folder,
+            str(i + 1),
+            msg,
+            buffer.getvalue()
+        )
+        messages.append((msg, str(i + 1), folder, filepath))
+    
+    # Create index
+    account_path = storage.get_account_path(f"{account_name}@pec.it", target_date)
+    indexer = Indexer(account_path)
+    for msg, uid, folder, filepath in messages:
+        indexer.add_message(msg, uid, folder, filepath)
+    indexer.generate_json()
+    
+    return account_name, date_str
+
+
+@pytest.fixture(scope="session")
+def golden_archive(tmp_path_factory):
+    """
+    Build the test archive once per session.
+    
+    Never served to the API; the archive fixtures copy it, so building
+    messages and indexes is paid once.
+    """
+    source = str(tmp_path_factory.mktemp("golden"))
+    return (source, *build_archive(source))
+
+
+def copy_archive(golden_archive, tmpdir):
+    """Copy the golden archive into tmpdir/archive; return fixture tuple."""
+    source, account_name, date_str = golden_archive
+    target = os.path.join(tmpdir, "archive")
+    shutil.copytree(source, target)
+    return target, account_name, date_str
+
+
+@pytest.fixture(scope="session")
+def archive(golden_archive, tmp_path_factory):
+    """
+    Create an archive with test data shared by the whole session.
+    
+    Tests using it must not modify it; use temp_archive instead.
+    """
+    return copy_archive(golden_archive, str(tmp_path_factory.mktemp("shared")))
+
+
+@pytest.fixture
+def temp_archive(golden_archive, tmp_path):
+    """Create a temporary archive with test data that a test may modify."""
+    return copy_archive(golden_archive, str(tmp_path))
+
+
+@pytest.fixture(scope="session")
+def api_client():
+    """
+    Create one test client for the session.
+    
+    The API reads the base path on every request, so tests point the
+    shared client at their archive with set_base_path.
+    """
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def client(api_client, archive):
+    """Get the test client over the shared archive."""
+    tmpdir, _, _ = archive
+    set_base_path(tmpdir)
+    return api_client
 
 
 @pytest.fixture
-def client(temp_archive):
-    """Create test client with temporary archive."""
+def temp_client(api_client, temp_archive):
+    """Get the test client over a temporary archive."""
     tmpdir, _, _ = temp_archive
     set_base_path(tmpdir)
-    return TestClient(app)
+    return api_client
 
 
 class TestHealthEndpoint:
@@ -87,9 +168,9 @@ class TestHealthEndpoint:
 class TestAccountsEndpoint:
     """Tests for accounts endpoint."""
     
-    def test_list_accounts(self, client, temp_archive):
+    def test_list_accounts(self, client, archive):
         """Test listing accounts."""
-        _, account_name, _ = temp_archive
+        _, account_name, _ = archive
         response = client.get("/api/v1/accounts")
         assert response.status_code == 200
         data = response.json()
@@ -98,9 +179,9 @@ class TestAccountsEndpoint:
         assert data["accounts"][0]["name"] == account_name
         assert "2024" in data["accounts"][0]["years"]
     
-    def test_list_dates(self, client, temp_archive):
+    def test_list_dates(self, client, archive):
         """Test listing dates for an account."""
-        _, account_name, date_str = temp_archive
+        _, account_name, date_str = archive
         response = client.get(f"/api/v1/accounts/{account_name}/dates?year=2024")
         assert response.status_code == 200
         data = response.json()
@@ -119,33 +200,33 @@ class TestAccountsEndpoint:
 class TestEmailsEndpoint:
     """Tests for emails endpoint."""
     
-    def test_list_emails(self, client, temp_archive):
+    def test_list_emails(self, client, archive):
         """Test listing emails for a specific date."""
-        _, account_name, date_str = temp_archive
+        _, account_name, date_str = archive
         response = client.get(f"/api/v1/accounts/{account_name}/emails/{date_str}")
         assert response.status_code == 200
         data = response.json()
         assert data["total"] == 3
         assert len(data["emails"]) == 3
     
-    def test_list_emails_with_folder_filter(self, client, temp_archive):
+    def test_list_emails_with_folder_filter(self, client, archive):
         """Test listing emails filtered by folder."""
-        _, account_name, date_str = temp_archive
+        _, account_name, date_str = archive
         response = client.get(f"/api/v1/accounts/{account_name}/emails/{date_str}?folder=INBOX")
         assert response.status_code == 200
         data = response.json()
         assert data["total"] == 2
         assert all(e["folder"] == "INBOX" for e in data["emails"])
     
-    def test_list_emails_invalid_date(self, client, temp_archive):
+    def test_list_emails_invalid_date(self, client, archive):
         """Test listing emails with invalid date format."""
-        _, account_name, _ = temp_archive
+        _, account_name, _ = archive
         response = client.get(f"/api/v1/accounts/{account_name}/emails/invalid-date")
         assert response.status_code == 400
     
-    def test_list_emails_not_found(self, client, temp_archive):
+    def test_list_emails_not_found(self, client, archive):
         """Test listing emails for non-existent date."""
-        _, account_name, _ = temp_archive
+        _, account_name, _ = archive
         response = client.get(f"/api/v1/accounts/{account_name}/emails/2023-01-01")
         assert response.status_code == 404
 
@@ -153,7 +234,7 @@ class TestEmailsEndpoint:
 class TestSearchEndpoint:
     """Tests for search endpoint."""
     
-    def test_search_by_subject(self, client, temp_archive):
+    def test_search_by_subject(self, client, archive):
         """Test searching by subject."""
         response = client.get("/api/v1/search?subject=Test Subject 1")
         assert response.status_code == 200
@@ -161,29 +242,29 @@ class TestSearchEndpoint:
         assert data["total"] == 1
         assert "Test Subject 1" in data["results"][0]["email"]["subject"]
     
-    def test_search_by_sender(self, client, temp_archive):
+    def test_search_by_sender(self, client, archive):
         """Test searching by sender."""
         response = client.get("/api/v1/search?from=sender1@example.com")
         assert response.status_code == 200
         data = response.json()
         assert data["total"] == 1
     
-    def test_search_by_recipient(self, client, temp_archive):
+    def test_search_by_recipient(self, client, archive):
         """Test searching by recipient."""
         response = client.get("/api/v1/search?to=recipient2@example.com")
         assert response.status_code == 200
         data = response.json()
         assert data["total"] == 1
     
-    def test_search_by_account(self, client, temp_archive):
+    def test_search_by_account(self, client, archive):
         """Test searching by account."""
-        _, account_name, _ = temp_archive
+        _, account_name, _ = archive
         response = client.get(f"/api/v1/search?account={account_name}")
         assert response.status_code == 200
         data = response.json()
         assert data["total"] == 3
     
-    def test_search_by_date_range(self, client, temp_archive):
+    def test_search_by_date_range(self, client, archive):
         """Test searching by date range."""
         response = client.get("/api/v1/search?date_from=2024-01-14&date_to=2024-01-16")
         assert response.status_code == 200
@@ -195,7 +276,7 @@ class TestSearchEndpoint:
         response = client.get("/api/v1/search")
         assert response.status_code == 400
     
-    def test_search_no_results(self, client, temp_archive):
+    def test_search_no_results(self, client, archive):
         """Test search with no matching results."""
         response = client.get("/api/v1/search?subject=NonExistentSubject")
         assert response.status_code == 200
@@ -203,9 +284,64 @@ class TestSearchEndpoint:
         assert data["total"] == 0
         assert len(data["results"]) == 0
     
-    def test_search_pagination(self, client, temp_archive):
+    def test_indexed_search_matches_scan(self, client, archive):
+        """Test that indexed search and filesystem scan agree."""
+        _, account_name, _ = archive
+        for params in ({"subject": "subject"}, {"recipient": "recipient2"}, {"account": account_name}):
+            indexed, indexed_total = search_emails(**params)
+            scanned, scanned_total = scan_emails(**params)
+            assert indexed_total == scanned_total
+            assert sorted(r["email"]["uid"] for r in indexed) == sorted(r["email"]["uid"] for r in scanned)
+    
+    def test_scan_multiple_dates(self, temp_client, temp_archive):
+        """Test that the filesystem scan merges results from several dates."""
+        tmpdir, account_name, date_str = temp_archive
+        src_index = os.path.join(tmpdir, account_name, "2024", date_str, "index.json")
+        other_dir = os.path.join(tmpdir, account_name, "2024", "2024-01-16")
+        os.makedirs(other_dir)
+        with open(src_index, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        with open(os.path.join(other_dir, "index.json"), "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        
+        results, total = scan_emails(subject="test subject")
+        assert total == 6
+        assert [r["date"] for r in results] == ["2024-01-16"] * 3 + [date_str] * 3
+    
+    def test_date_only_scan_stops_early(self, temp_client, temp_archive, monkeypatch):
+        """Test that a date-only scan pages like a full scan without reading older dates."""
+        tmpdir, account_name, date_str = temp_archive
+        src_index = os.path.join(tmpdir, account_name, "2024", date_str, "index.json")
+        other_dir = os.path.join(tmpdir, account_name, "2024", "2024-01-16")
+        os.makedirs(other_dir)
+        with open(src_index, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        with open(os.path.join(other_dir, "index.json"), "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        
+        with open(os.path.join(tmpdir, account_name, "2024", date_str, "summary.json"), "w") as f:
+            json.dump({"statistics": {"total_messages": 3}}, f)
+        
+        loaded = []
+        
+        def spy(account_path, date_dir):
+            loaded.append(date_dir)
+            return load_index_json(account_path, date_dir)
+        
+        monkeypatch.setattr(api, "load_index_json", spy)
+        results, total = scan_emails(account=account_name, limit=2, offset=1)
+        assert total == 6
+        assert [r["date"] for r in results] == ["2024-01-16"] * 2
+        assert loaded == ["2024-01-16"]
+        monkeypatch.undo()
+        
+        results, _ = scan_emails(account=account_name, limit=2, after=search_result_key(results[-1]))
+        expected, _ = scan_emails(subject="test", limit=6)
+        assert results == expected[3:5]
+    
+    def test_search_pagination(self, client, archive):
         """Test search pagination."""
-        _, account_name, _ = temp_archive
+        _, account_name, _ = archive
         response = client.get(f"/api/v1/search?account={account_name}&limit=1&offset=0")
         assert response.status_code == 200
         data = response.json()
@@ -213,12 +349,36 @@ class TestSearchEndpoint:
         assert len(data["results"]) == 1
 
 
+    def test_search_cursor_pagination(self, client, archive):
+        """Test walking all results with next_cursor."""
+        _, account_name, _ = archive
+        uids = []
+        cursor = None
+        for _ in range(4):
+            url = f"/api/v1/search?account={account_name}&limit=1"
+            if cursor:
+                url += f"&cursor={cursor}"
+            data = client.get(url).json()
+            uids.extend(r["email"]["uid"] for r in data["results"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        assert sorted(uids) == ["1", "2", "3"]
+        assert cursor is None
+    
+    def test_search_invalid_cursor(self, client, archive):
+        """Test that a malformed cursor is rejected."""
+        _, account_name, _ = archive
+        response = client.get(f"/api/v1/search?account={account_name}&cursor=not-a-cursor")
+        assert response.status_code == 400
+
+
 class TestDownloadEndpoint:
     """Tests for download endpoint."""
     
-    def test_download_email(self, client, temp_archive):
+    def test_download_email(self, client, archive):
         """Test downloading an email file."""
-        tmpdir, account_name, date_str = temp_archive
+        tmpdir, account_name, date_str = archive
         
         # First, get the list of emails to find a valid filename
         response = client.get(f"/api/v1/accounts/{account_name}/emails/{date_str}")
@@ -235,72 +395,314 @@ class TestDownloadEndpoint:
         )
         assert response.status_code == 200
         assert response.headers["content-type"] == "message/rfc822"
+        assert int(response.headers["content-length"]) == email["size"]
     
-    def test_download_email_not_found(self, client, temp_archive):
+    def test_download_email_not_found(self, client, archive):
         """Test downloading non-existent email."""
-        _, account_name, date_str = temp_archive
+        _, account_name, date_str = archive
         response = client.get(
             f"/api/v1/accounts/{account_name}/emails/{date_str}/INBOX/nonexistent.eml"
         )
         assert response.status_code == 404
     
-    def test_download_invalid_file_type(self, client, temp_archive):
+    def test_download_invalid_file_type(self, client, archive):
         """Test downloading non-.eml file."""
-        _, account_name, date_str = temp_archive
+        _, account_name, date_str = archive
         response = client.get(
             f"/api/v1/accounts/{account_name}/emails/{date_str}/INBOX/test.txt"
         )
         # Should return 404 (file not found) or 400 (invalid file type)
         assert response.status_code in [400, 404]
+    
+    def test_download_archive(self, temp_client, temp_archive):
+        """Test downloading the compressed archive for a date."""
+        tmpdir, account_name, date_str = temp_archive
+        archive_name = f"archive-{account_name}-{date_str}.tar.gz"
+        with open(os.path.join(tmpdir, account_name, "2024", date_str, archive_name), "wb") as f:
+            f.write(b"archive content")
+        
+        response = temp_client.get(f"/api/v1/accounts/{account_name}/archive/{date_str}")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/gzip"
+        assert response.content == b"archive content"
+    
+    def test_download_archive_not_modified(self, temp_client, temp_archive):
+        """Test ETag revalidation of archive downloads."""
+        tmpdir, account_name, date_str = temp_archive
+        archive_name = f"archive-{account_name}-{date_str}.tar.gz"
+        with open(os.path.join(tmpdir, account_name, "2024", date_str, archive_name), "wb") as f:
+            f.write(b"archive content")
+        url = f"/api/v1/accounts/{account_name}/archive/{date_str}"
+        
+        response = temp_client.get(url)
+        etag = response.headers["etag"]
+        assert "max-age" in response.headers["cache-control"]
+        
+        response = temp_client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        
+        response = temp_client.get(url, headers={"If-None-Match": '"stale"'})
+        assert response.status_code == 200
+    
+    def test_download_archive_not_found(self, client, archive):
+        """Test downloading a missing archive."""
+        _, account_name, date_str = archive
+        response = client.get(f"/api/v1/accounts/{account_name}/archive/{date_str}")
+        assert response.status_code == 404
 
 
 class TestPathTraversal:
     """Tests for path traversal prevention."""
     
-    def test_path_traversal_in_account(self, client, temp_archive):
+    def test_is_within_base_path(self):
+        """Test that only paths inside the base path are accepted."""
+        assert is_within_base_path("/data/pec-archive/acc/2024", "/data/pec-archive")
+        assert is_within_base_path("/data/pec-archive/", "/data/pec-archive")
+        assert not is_within_base_path("/data/pec-archive-old/acc", "/data/pec-archive")
+        assert not is_within_base_path("/data/pec-archive/../etc", "/data/pec-archive")
+    
+    def test_path_traversal_in_account(self, client, archive):
         """Test path traversal prevention in account parameter."""
-        _, _, date_str = temp_archive
+        _, _, date_str = archive
         response = client.get(f"/api/v1/accounts/../etc/emails/{date_str}")
         # Should fail due to path validation
         assert response.status_code in [400, 404]
     
-    def test_path_traversal_in_folder(self, client, temp_archive):
+    def test_path_traversal_in_folder(self, client, archive):
         """Test path traversal prevention in folder parameter."""
-        _, account_name, date_str = temp_archive
+        _, account_name, date_str = archive
         response = client.get(
             f"/api/v1/accounts/{account_name}/emails/{date_str}/../../../etc/test.eml"
         )
         assert response.status_code in [400, 404]
     
-    def test_path_traversal_in_filename(self, client, temp_archive):
+    def test_path_traversal_in_filename(self, client, archive):
         """Test path traversal prevention in filename parameter."""
-        _, account_name, date_str = temp_archive
+        _, account_name, date_str = archive
         response = client.get(
             f"/api/v1/accounts/{account_name}/emails/{date_str}/INBOX/../../test.eml"
         )
         assert response.status_code in [400, 404]
 
 
+class TestIndexCache:
+    """Tests for the in-memory index.json cache."""
+    
+    def test_cached_index_is_reused(self, archive):
+        """Test that an unchanged index.json is served from cache."""
+        tmpdir, account_name, date_str = archive
+        clear_index_cache()
+        account_path = os.path.join(tmpdir, account_name)
+        
+        first = load_index_json(account_path, date_str)
+        second = load_index_json(account_path, date_str)
+        assert len(first) == 3
+        assert first is second
+    
+    def test_cache_invalidated_on_change(self, temp_archive):
+        """Test that a rewritten index.json is reloaded."""
+        tmpdir, account_name, date_str = temp_archive
+        clear_index_cache()
+        account_path = os.path.join(tmpdir, account_name)
+        index_path = os.path.join(account_path, "2024", date_str, "index.json")
+        
+        data = load_index_json(account_path, date_str)
+        with open(index_path, "w", encoding="utf-8") as f:
+            json.dump(data[:1], f)
+        
+        assert len(load_index_json(account_path, date_str)) == 1
+
+
+    def test_find_index_matches(self, tmp_path):
+        """Test blob matching against a straightforward per-email filter."""
+        emails = [
+            {"uid": "1", "subject": "Fattura fattura", "to": "a@x.it", "cc": ""},
+            {"uid": "2", "subject": "Sollecito", "to": "b@x.it", "cc": "Fattura@x.it"},
+            {"uid": "3", "subject": "FATTURA", "to": "", "cc": ""},
+            {"uid": "4", "subject": "tura", "to": "", "cc": "c@x.it"},
+        ]
+        date_dir = tmp_path / "2024" / "2024-01-15"
+        date_dir.mkdir(parents=True)
+        (date_dir / "index.json").write_text(json.dumps(emails))
+        
+        for checks in (
+            [(SEARCH_FIELD_SUBJECT, "fattura")],
+            [(SEARCH_FIELD_SUBJECT, "tura")],
+            [(SEARCH_FIELD_RECIPIENT, "fattura")],
+            [(SEARCH_FIELD_RECIPIENT, "@x.it")],
+            [(SEARCH_FIELD_SUBJECT, "tura"), (SEARCH_FIELD_RECIPIENT, "c@")],
+            [(SEARCH_FIELD_SUBJECT, "fattura"), (SEARCH_FIELD_RECIPIENT, "x.it")],
+            [(SEARCH_FIELD_RECIPIENT, "x.it"), (SEARCH_FIELD_SUBJECT, "fattura")],
+            [(SEARCH_FIELD_RECIPIENT, "it\x00")],
+        ):
+            expected = [
+                e["uid"] for e in emails
+                if all(
+                    "\x00" not in term and (
+                        term in e["subject"].lower() if field == SEARCH_FIELD_SUBJECT
+                        else term in e["to"].lower() or term in e["cc"].lower()
+                    )
+                    for field, term in checks
+                )
+            ]
+            found = find_index_matches(str(tmp_path), "2024-01-15", checks)
+            assert [e["uid"] for e in found] == expected
+
+
+class TestEmailPayload:
+    """Tests for shaping index entries as EmailInfo output."""
+    
+    def test_missing_fields_get_defaults(self):
+        """Test that fields missing from an old index entry are not null."""
+        payload = email_payload({"uid": "1", "subject": "Test", "extra": "x"})
+        assert payload["subject"] == "Test"
+        assert payload["cc"] == ""
+        assert payload["from"] == ""
+        assert payload["size"] == 0
+        assert "extra" not in payload
+        assert None not in payload.values()
+
+
+class TestListDateDirs:
+    """Tests for date range pushdown in the filesystem scan."""
+    
+    @pytest.fixture
+    def account_path(self, tmp_path):
+        """Create an account with date directories across two years."""
+        for date_dir in ["2023-12-30", "2023-12-31", "2024-01-01", "2024-03-10"]:
+            (tmp_path / date_dir[:4] / date_dir).mkdir(parents=True)
+        (tmp_path / "2024" / "not-a-date").mkdir()
+        return str(tmp_path)
+    
+    def test_no_range(self, account_path):
+        """Test listing all date directories."""
+        assert sorted(list_date_dirs(account_path)) == [
+            "2023-12-30", "2023-12-31", "2024-01-01", "2024-03-10"
+        ]
+    
+    def test_short_range_probes_dates(self, account_path):
+        """Test a short range spanning a year boundary."""
+        result = list_date_dirs(account_path, date(2023, 12, 31), date(2024, 1, 5))
+        assert result == ["2023-12-31", "2024-01-01"]
+    
+    def test_open_and_long_ranges(self, account_path):
+        """Test open-ended and long ranges."""
+        assert sorted(list_date_dirs(account_path, date_from=date(2024, 1, 1))) == [
+            "2024-01-01", "2024-03-10"
+        ]
+        assert sorted(list_date_dirs(account_path, date(2023, 1, 1), date(2023, 12, 30))) == [
+            "2023-12-30"
+        ]
+    
+    def test_inverted_range(self, account_path):
+        """Test that an inverted range yields nothing."""
+        assert list_date_dirs(account_path, date(2024, 1, 2), date(2024, 1, 1)) == []
+
+
+class TestListingCache:
+    """Tests for the account/date listing cache."""
+    
+    def test_accounts_listing_is_cached(self, temp_client, temp_archive):
+        """Test that new accounts appear only after the cache is cleared."""
+        tmpdir, _, _ = temp_archive
+        clear_listing_cache()
+        assert temp_client.get("/api/v1/accounts").json()["total"] == 1
+        
+        os.makedirs(os.path.join(tmpdir, "other", "2024"))
+        assert temp_client.get("/api/v1/accounts").json()["total"] == 1
+        
+        clear_listing_cache()
+        assert temp_client.get("/api/v1/accounts").json()["total"] == 2
+    
+    def test_least_recently_used_evicted(self, monkeypatch):
+        """Test that a full cache evicts the least recently used listing."""
+        monkeypatch.setattr(api, "LISTING_CACHE_MAX_ENTRIES", 2)
+        calls = []
+        
+        @api._listing_cached
+        def listing(name):
+            calls.append(name)
+            return [name]
+        
+        clear_listing_cache()
+        listing("a")
+        listing("b")
+        listing("a")
+        listing("c")
+        assert calls == ["a", "b", "c"]
+        
+        listing("a")
+        listing("b")
+        assert calls == ["a", "b", "c", "b"]
+        clear_listing_cache()
+
+
+class TestGetSearchIndex:
+    """Tests for creating the search index on demand."""
+    
+    def test_failure_retried_after_interval(self, tmp_path, monkeypatch):
+        """Test that a failed creation is not retried on every call."""
+        attempts = []
+        
+        def failing_index(base_path, db_path=None):
+            attempts.append(base_path)
+            raise api.SearchIndexError("read-only file system")
+        
+        monkeypatch.setattr(api, "SearchIndex", failing_index)
+        monkeypatch.setattr(api, "_search_indexes", {})
+        monkeypatch.setattr(api, "_search_index_failures", {})
+        
+        assert api.get_search_index(str(tmp_path)) is None
+        assert api.get_search_index(str(tmp_path)) is None
+        assert len(attempts) == 1
+        
+        monkeypatch.setattr(api, "SEARCH_INDEX_REFRESH_INTERVAL", 0)
+        assert api.get_search_index(str(tmp_path)) is None
+        assert len(attempts) == 2
+
+
+class TestSummaryMessageCount:
+    """Tests for reading date message counts from summary.json."""
+    
+    def test_count_from_summary(self, temp_archive):
+        """Test that the count comes from summary.json when it is current."""
+        tmpdir, account_name, date_str = temp_archive
+        date_path = os.path.join(tmpdir, account_name, "2024", date_str)
+        assert read_summary_message_count(date_path) is None
+        
+        with open(os.path.join(date_path, "summary.json"), "w") as f:
+            json.dump({"statistics": {"total_messages": 7}}, f)
+        assert read_summary_message_count(date_path) == 7
+    
+    def test_stale_summary_ignored(self, temp_archive):
+        """Test that a summary older than index.json is not used."""
+        tmpdir, account_name, date_str = temp_archive
+        date_path = os.path.join(tmpdir, account_name, "2024", date_str)
+        summary_path = os.path.join(date_path, "summary.json")
+        with open(summary_path, "w") as f:
+            json.dump({"statistics": {"total_messages": 7}}, f)
+        os.utime(summary_path, ns=(0, 0))
+        
+        assert read_summary_message_count(date_path) is None
+
+
 class TestEmptyArchive:
     """Tests with empty archive."""
     
-    def test_list_accounts_empty(self):
+    def test_list_accounts_empty(self, api_client, tmp_path):
         """Test listing accounts with empty archive."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            set_base_path(tmpdir)
-            client = TestClient(app)
-            response = client.get("/api/v1/accounts")
-            assert response.status_code == 200
-            data = response.json()
-            assert data["total"] == 0
-            assert len(data["accounts"]) == 0
-    
-    def test_search_empty(self):
+        set_base_path(str(tmp_path))
+        response = api_client.get("/api/v1/accounts")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 0
+        assert len(data["accounts"]) == 0
+    
+    def test_search_empty(self, api_client, tmp_path):
         """Test searching in empty archive."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            set_base_path(tmpdir)
-            client = TestClient(app)
-            response = client.get("/api/v1/search?subject=test")
-            assert response.status_code == 200
-            data = response.json()
-            assert data["total"] == 0
+        set_base_path(str(tmp_path))
+        response = api_client.get("/api/v1/search?subject=test")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 0
@@ -8,13 +8,16 @@ import tempfile
 import pytest
 import yaml
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 from unittest.mock import patch, MagicMock
 
 from src.backup_range import (
     parse_date,
     validate_date_range,
     generate_date_range,
+    count_days,
     validate_args,
+    run_dates,
 )
 
 
@@ -24,150 +27,122 @@ class TestParseDate:
     def test_parse_valid_date(self):
         """Test parsing a valid date string."""
         result = parse_date('2024-01-15')
-        assert result.year == 2024
-        assert result.month == 1
-        assert result.day == 15
+        assert (result.year, result.month, result.day) == (2024, 1, 15)
     
-    def test_parse_invalid_format(self):
-        """Test parsing an invalid date format raises ValueError."""
+    @pytest.mark.parametrize('value', ['15-01-2024', '2024-13-45'])
+    def test_parse_invalid(self, value):
+        """Test that an invalid format or date raises ValueError."""
         with pytest.raises(ValueError) as exc_info:
-            parse_date('15-01-2024')
-        assert 'Invalid date format' in str(exc_info.value)
-    
-    def test_parse_invalid_date(self):
-        """Test parsing an invalid date raises ValueError."""
-        with pytest.raises(ValueError) as exc_info:
-            parse_date('2024-13-45')
+            parse_date(value)
         assert 'Invalid date format' in str(exc_info.value)
 
 
 class TestValidateDateRange:
     """Tests for date range validation."""
     
-    def test_valid_range(self):
-        """Test a valid date range."""
-        date_from = datetime(2024, 1, 15)
-        date_to = datetime(2024, 1, 22)
+    @pytest.mark.parametrize('date_from, date_to', [
+        (datetime(2024, 1, 15), datetime(2024, 1, 22)),
+        (datetime(2024, 1, 15), datetime(2024, 1, 15))
+    ])
+    def test_valid_range(self, date_from, date_to):
+        """Test that valid ranges, including a single day, are accepted."""
         # Should not raise
         validate_date_range(date_from, date_to)
     
-    def test_same_date_range(self):
-        """Test a range with same start and end date."""
-        date = datetime(2024, 1, 15)
-        # Should not raise
-        validate_date_range(date, date)
-    
-    def test_inverted_range(self):
-        """Test that inverted range raises ValueError."""
-        date_from = datetime(2024, 1, 22)
-        date_to = datetime(2024, 1, 15)
+    @pytest.mark.parametrize('date_from, date_to, message', [
+        (datetime(2024, 1, 22), datetime(2024, 1, 15), 'must be before or equal to'),
+        (datetime(2024, 1, 15), datetime.now() + timedelta(days=10), 'cannot be in the future')
+    ])
+    def test_invalid_range(self, date_from, date_to, message):
+        """Test that inverted ranges and future dates raise ValueError."""
         with pytest.raises(ValueError) as exc_info:
             validate_date_range(date_from, date_to)
-        assert 'must be before or equal to' in str(exc_info.value)
-    
-    def test_future_date(self):
-        """Test that future dates raise ValueError."""
-        date_from = datetime(2024, 1, 15)
-        date_to = datetime.now() + timedelta(days=10)
-        with pytest.raises(ValueError) as exc_info:
-            validate_date_range(date_from, date_to)
-        assert 'cannot be in the future' in str(exc_info.value)
+        assert message in str(exc_info.value)
 
 
 class TestGenerateDateRange:
     """Tests for date range generation."""
     
-    def test_single_day_range(self):
-        """Test generating a single day range."""
-        date = datetime(2024, 1, 15)
-        result = generate_date_range(date, date)
-        assert len(result) == 1
-        assert result[0] == date
-    
-    def test_week_range(self):
-        """Test generating a week-long range."""
-        date_from = datetime(2024, 1, 15)
-        date_to = datetime(2024, 1, 21)
-        result = generate_date_range(date_from, date_to)
-        assert len(result) == 7
+    @pytest.mark.parametrize('date_from, date_to, days', [
+        (datetime(2024, 1, 15), datetime(2024, 1, 15), 1),
+        (datetime(2024, 1, 15), datetime(2024, 1, 21), 7),
+        (datetime(2024, 1, 1), datetime(2024, 1, 31), 31)
+    ])
+    def test_range(self, date_from, date_to, days):
+        """Test generating single day, week and month ranges."""
+        result = list(generate_date_range(date_from, date_to))
+        assert len(result) == days
         assert result[0] == date_from
         assert result[-1] == date_to
     
-    def test_month_range(self):
-        """Test generating a month-long range."""
-        date_from = datetime(2024, 1, 1)
-        date_to = datetime(2024, 1, 31)
+    def test_range_is_lazy(self):
+        """Test that dates are generated lazily and counted separately."""
+        date_from = datetime(2020, 1, 1)
+        date_to = datetime(2024, 12, 31)
         result = generate_date_range(date_from, date_to)
-        assert len(result) == 31
+        assert not isinstance(result, list)
+        assert next(result) == date_from
+        assert count_days(date_from, date_to) == 1827
+
+
+def make_args(date, date_from, date_to):
+    """Build parsed command line arguments with the date options."""
+    return SimpleNamespace(date=date, date_from=date_from, date_to=date_to)
 
 
 class TestValidateArgs:
     """Tests for argument validation."""
     
-    def test_single_date_args(self):
-        """Test validation with single date."""
-        args = MagicMock()
-        args.date = '2024-01-15'
-        args.date_from = None
-        args.date_to = None
-        
-        date_from, date_to = validate_args(args)
-        assert date_from == date_to
-        assert date_from.year == 2024
-        assert date_from.month == 1
-        assert date_from.day == 15
-    
-    def test_date_range_args(self):
-        """Test validation with date range."""
-        args = MagicMock()
-        args.date = None
-        args.date_from = '2024-01-15'
-        args.date_to = '2024-01-22'
-        
-        date_from, date_to = validate_args(args)
-        assert date_from.day == 15
-        assert date_to.day == 22
-    
-    def test_no_dates_provided(self):
-        """Test that no dates raises ValueError."""
-        args = MagicMock()
-        args.date = None
-        args.date_from = None
-        args.date_to = None
-        
+    @pytest.mark.parametrize('date, date_from, date_to, expected', [
+        ('2024-01-15', None, None, (datetime(2024, 1, 15), datetime(2024, 1, 15))),
+        (None, '2024-01-15', '2024-01-22', (datetime(2024, 1, 15), datetime(2024, 1, 22)))
+    ])
+    def test_valid_args(self, date, date_from, date_to, expected):
+        """Test validation with a single date and with a date range."""
+        assert validate_args(make_args(date, date_from, date_to)) == expected
+    
+    @pytest.mark.parametrize('date, date_from, date_to, message', [
+        (None, None, None, 'must specify'),
+        ('2024-01-15', '2024-01-10', None, 'Cannot use --date together with'),
+        (None, '2024-01-15', None, '--date-from requires --date-to'),
+        (None, None, '2024-01-22', '--date-to requires --date-from')
+    ])
+    def test_invalid_args(self, date, date_from, date_to, message):
+        """Test that missing, conflicting or unpaired dates raise ValueError."""
         with pytest.raises(ValueError) as exc_info:
-            validate_args(args)
-        assert 'must specify' in str(exc_info.value)
-    
-    def test_conflicting_args(self):
-        """Test that conflicting date options raise ValueError."""
-        args = MagicMock()
-        args.date = '2024-01-15'
-        args.date_from = '2024-01-10'
-        args.date_to = None
+            validate_args(make_args(date, date_from, date_to))
+        assert message in str(exc_info.value)
+
+
+class TestRunDates:
+    """Tests for processing a range of dates."""
+    
+    REPORT = {
+        'accounts_processed': 2,
+        'accounts_successful': 2,
+        'accounts_with_errors': 0,
+        'total_messages': 5,
+        'total_errors': 0
+    }
+    
+    @pytest.mark.parametrize('parallel', [1, 3])
+    def test_totals(self, parallel):
+        """Test that reports are aggregated, sequentially and in parallel."""
+        scheduler = MagicMock()
+        failing_date = datetime(2024, 1, 2)
         
-        with pytest.raises(ValueError) as exc_info:
-            validate_args(args)
-        assert 'Cannot use --date together with' in str(exc_info.value)
-    
-    def test_date_from_without_date_to(self):
-        """Test that date_from without date_to raises ValueError."""
-        args = MagicMock()
-        args.date = None
-        args.date_from = '2024-01-15'
-        args.date_to = None
+        def run_once(date):
+            if date == failing_date:
+                raise RuntimeError('IMAP down')
+            return self.REPORT
         
-        with pytest.raises(ValueError) as exc_info:
-            validate_args(args)
-        assert '--date-from requires --date-to' in str(exc_info.value)
-    
-    def test_date_to_without_date_from(self):
-        """Test that date_to without date_from raises ValueError."""
-        args = MagicMock()
-        args.date = None
-        args.date_from = None
-        args.date_to = '2024-01-22'
+        scheduler.run_once.side_effect = run_once
+        dates = generate_date_range(datetime(2024, 1, 1), datetime(2024, 1, 4))
         
-        with pytest.raises(ValueError) as exc_info:
-            validate_args(args)
-        assert '--date-to requires --date-from' in str(exc_info.value)
+        totals = run_dates(scheduler, dates, parallel)
+        assert scheduler.run_once.call_count == 4
+        assert totals['dates_processed'] == 4
+        assert totals['dates_successful'] == 3
+        assert totals['dates_with_errors'] == 1
+        assert totals['total_accounts_processed'] == 6
+        assert totals['total_messages'] == 15
@@ -3,7 +3,6 @@ Tests for compression module.
 """
 
 import os
-import tempfile
 import tarfile
 import hashlib
 import pytest
@@ -13,134 +12,206 @@ from src.compression import (
     create_archive,
     create_digest,
     calculate_sha256,
-    verify_archive
+    verify_archive,
+    CompressionError
 )
 
 
 class TestCalculateSha256:
     """Tests for SHA256 calculation."""
     
-    def test_calculate_sha256(self):
+    def test_calculate_sha256(self, tmp_path):
         """Test SHA256 calculation."""
-        with tempfile.NamedTemporaryFile(delete=False) as f:
-            f.write(b'test content')
-            f.flush()
-            
-            digest = calculate_sha256(f.name)
-            
-            # Verify with hashlib directly
-            expected = hashlib.sha256(b'test content').hexdigest()
-            assert digest == expected
-        
-        os.unlink(f.name)
+        path = tmp_path / 'test.bin'
+        path.write_bytes(b'test content')
+        
+        digest = calculate_sha256(str(path))
+        
+        # Verify with hashlib directly
+        expected = hashlib.sha256(b'test content').hexdigest()
+        assert digest == expected
 
 
 class TestCreateArchive:
     """Tests for archive creation."""
     
-    def test_create_archive(self):
+    def test_create_archive(self, tmp_path):
         """Test creating a tar.gz archive."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Create some test files
-            test_file = os.path.join(tmpdir, 'test.txt')
-            with open(test_file, 'w') as f:
-                f.write('test content')
-            
-            subdir = os.path.join(tmpdir, 'INBOX')
-            os.makedirs(subdir)
-            with open(os.path.join(subdir, 'message.eml'), 'w') as f:
-                f.write('email content')
-            
-            # Create archive
-            date = datetime(2024, 1, 15)
-            archive_path = create_archive(tmpdir, 'testaccount', date)
-            
-            assert os.path.exists(archive_path)
-            assert archive_path.endswith('.tar.gz')
-            assert 'testaccount' in archive_path
-            assert '2024-01-15' in archive_path
-            
-            # Verify archive contents
-            with tarfile.open(archive_path, 'r:gz') as tar:
-                names = tar.getnames()
-                assert 'test.txt' in names
-                assert 'INBOX' in names
+        tmpdir = str(tmp_path)
+        
+        # Create some test files
+        test_file = os.path.join(tmpdir, 'test.txt')
+        with open(test_file, 'w') as f:
+            f.write('test content')
+        
+        subdir = os.path.join(tmpdir, 'INBOX')
+        os.makedirs(subdir)
+        with open(os.path.join(subdir, 'message.eml'), 'w') as f:
+            f.write('email content')
+        
+        # Create archive
+        date = datetime(2024, 1, 15)
+        archive_path, digest = create_archive(tmpdir, 'testaccount', date)
+        
+        assert os.path.exists(archive_path)
+        assert archive_path.endswith('.tar.gz')
+        assert 'testaccount' in archive_path
+        assert '2024-01-15' in archive_path
+        assert digest == calculate_sha256(archive_path)
+        
+        # Verify archive contents
+        with tarfile.open(archive_path, 'r:gz') as tar:
+            names = tar.getnames()
+            assert 'test.txt' in names
+            assert 'INBOX' in names
     
-    def test_archive_excludes_itself(self):
+    def test_archive_excludes_itself(self, tmp_path):
         """Test that archive excludes itself."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Create a test file
-            test_file = os.path.join(tmpdir, 'test.txt')
-            with open(test_file, 'w') as f:
-                f.write('test')
-            
-            # Create archive
-            date = datetime(2024, 1, 15)
-            archive_path = create_archive(tmpdir, 'test', date)
-            
-            # Verify archive doesn't contain .tar.gz files
-            with tarfile.open(archive_path, 'r:gz') as tar:
-                names = tar.getnames()
-                assert not any(n.endswith('.tar.gz') for n in names)
+        tmpdir = str(tmp_path)
+        
+        # Create a test file
+        test_file = os.path.join(tmpdir, 'test.txt')
+        with open(test_file, 'w') as f:
+            f.write('test')
+        
+        # Create archive
+        date = datetime(2024, 1, 15)
+        archive_path, _ = create_archive(tmpdir, 'test', date)
+        
+        # Verify archive doesn't contain .tar.gz files
+        with tarfile.open(archive_path, 'r:gz') as tar:
+            names = tar.getnames()
+            assert not any(n.endswith('.tar.gz') for n in names)
+
+    
+    def test_archive_members_match_tarfile_add(self, tmp_path):
+        """Test that members are added in tarfile.add order, honouring exclusions."""
+        source = tmp_path / 'source'
+        for folder in ('INBOX', 'Posta inviata', 'skip/nested', 'old.tar.gz'):
+            (source / folder).mkdir(parents=True)
+        for name in ('INBOX/2.eml', 'INBOX/1.eml', 'Posta inviata/3.eml',
+                     'skip/a.eml', 'skip/nested/b.eml', 'old.tar.gz/c.eml',
+                     'index.json', 'summary.json'):
+            (source / name).write_text(name)
+        
+        archive_path, _ = create_archive(
+            str(source), 'test', datetime(2024, 1, 15), exclude_patterns=['skip']
+        )
+        
+        with tarfile.open(archive_path, 'r:gz') as tar:
+            assert tar.getnames() == [
+                'INBOX', 'INBOX/1.eml', 'INBOX/2.eml',
+                'Posta inviata', 'Posta inviata/3.eml',
+                'index.json'
+            ]
+            assert tar.extractfile('INBOX/2.eml').read() == b'INBOX/2.eml'
+    
+    def test_create_archive_with_pigz(self, tmp_path, monkeypatch):
+        """Test that the archive is streamed through pigz when available."""
+        # Stand-in for pigz that ignores its options and compresses with gzip
+        fake_pigz = tmp_path / 'pigz'
+        fake_pigz.write_text('#!/bin/sh\nexec gzip -c\n')
+        fake_pigz.chmod(0o755)
+        monkeypatch.setattr('src.compression.shutil.which', lambda name: str(fake_pigz))
+        
+        source = tmp_path / 'source'
+        (source / 'INBOX').mkdir(parents=True)
+        (source / 'INBOX' / 'message.eml').write_text('email content')
+        
+        archive_path, digest = create_archive(str(source), 'test', datetime(2024, 1, 15))
+        
+        assert digest == calculate_sha256(archive_path)
+        with tarfile.open(archive_path, 'r:gz') as tar:
+            assert tar.extractfile('INBOX/message.eml').read() == b'email content'
+    
+    def test_create_archive_pigz_failure(self, tmp_path, monkeypatch):
+        """Test that a failing pigz raises CompressionError."""
+        fake_pigz = tmp_path / 'pigz'
+        fake_pigz.write_text('#!/bin/sh\ncat > /dev/null\necho broken >&2\nexit 1\n')
+        fake_pigz.chmod(0o755)
+        monkeypatch.setattr('src.compression.shutil.which', lambda name: str(fake_pigz))
+        
+        source = tmp_path / 'source'
+        source.mkdir()
+        (source / 'test.txt').write_text('test')
+        
+        with pytest.raises(CompressionError, match='broken'):
+            create_archive(str(source), 'test', datetime(2024, 1, 15))
 
 
 class TestCreateDigest:
     """Tests for digest creation."""
     
-    def test_create_digest(self):
+    def test_create_digest(self, tmp_path):
         """Test creating SHA256 digest file."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Create a test archive file
-            archive_path = os.path.join(tmpdir, 'archive-test-2024-01-15.tar.gz')
-            with open(archive_path, 'wb') as f:
-                f.write(b'test archive content')
-            
-            # Create digest
-            digest_path = create_digest(archive_path)
-            
-            assert os.path.exists(digest_path)
-            assert digest_path.endswith('.sha256')
-            
-            # Verify digest content
-            with open(digest_path, 'r') as f:
-                content = f.read()
-            
-            expected_hash = calculate_sha256(archive_path)
-            assert expected_hash in content
-            assert 'archive-test-2024-01-15.tar.gz' in content
+        tmpdir = str(tmp_path)
+        
+        # Create a test archive file
+        archive_path = os.path.join(tmpdir, 'archive-test-2024-01-15.tar.gz')
+        with open(archive_path, 'wb') as f:
+            f.write(b'test archive content')
+        
+        # Create digest
+        digest_path = create_digest(archive_path)
+        
+        assert os.path.exists(digest_path)
+        assert digest_path.endswith('.sha256')
+        
+        # Verify digest content
+        with open(digest_path, 'r') as f:
+            content = f.read()
+        
+        # Compare against hashlib, without hashing the file again
+        expected_hash = hashlib.sha256(b'test archive content').hexdigest()
+        assert expected_hash in content
+        assert 'archive-test-2024-01-15.tar.gz' in content
+    
+    def test_create_digest_precomputed(self, tmp_path):
+        """Test that a precomputed digest is written without rehashing."""
+        tmpdir = str(tmp_path)
+        archive_path = os.path.join(tmpdir, 'archive-test-2024-01-15.tar.gz')
+        with open(archive_path, 'wb') as f:
+            f.write(b'test archive content')
+        
+        digest_path = create_digest(archive_path, 'abc123')
+        
+        with open(digest_path, 'r') as f:
+            assert f.read() == 'abc123  archive-test-2024-01-15.tar.gz\n'
 
 
 class TestVerifyArchive:
     """Tests for archive verification."""
     
-    def test_verify_valid_archive(self):
+    def test_verify_valid_archive(self, tmp_path):
         """Test verifying valid archive."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Create archive
-            archive_path = os.path.join(tmpdir, 'test.tar.gz')
-            with open(archive_path, 'wb') as f:
-                f.write(b'test content')
-            
-            # Create digest
-            digest_path = create_digest(archive_path)
-            
-            # Verify
-            assert verify_archive(archive_path, digest_path) is True
+        tmpdir = str(tmp_path)
+        
+        # Create archive
+        archive_path = os.path.join(tmpdir, 'test.tar.gz')
+        with open(archive_path, 'wb') as f:
+            f.write(b'test content')
+        
+        # Create digest
+        digest_path = create_digest(archive_path)
+        
+        # Verify
+        assert verify_archive(archive_path, digest_path) is True
     
-    def test_verify_corrupted_archive(self):
+    def test_verify_corrupted_archive(self, tmp_path):
         """Test verifying corrupted archive."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Create archive
-            archive_path = os.path.join(tmpdir, 'test.tar.gz')
-            with open(archive_path, 'wb') as f:
-                f.write(b'test content')
-            
-            # Create digest
-            digest_path = create_digest(archive_path)
-            
-            # Corrupt archive
-            with open(archive_path, 'wb') as f:
-                f.write(b'corrupted content')
-            
-            # Verify should fail
-            assert verify_archive(archive_path, digest_path) is False
+        tmpdir = str(tmp_path)
+        
+        # Create archive
+        archive_path = os.path.join(tmpdir, 'test.tar.gz')
+        with open(archive_path, 'wb') as f:
+            f.write(b'test content')
+        
+        # Create digest
+        digest_path = create_digest(archive_path)
+        
+        # Corrupt archive
+        with open(archive_path, 'wb') as f:
+            f.write(b'corrupted content')
+        
+        # Verify should fail
+        assert verify_archive(archive_path, digest_path) is False
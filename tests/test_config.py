@@ -3,11 +3,19 @@ Tests for configuration module.
 """
 
 import os
+import json
 import tempfile
 import pytest
 import yaml
 
-from src.config import load_config, ConfigError, expand_env_vars, validate_config
+from src.config import (
+    load_config,
+    load_yaml_cached,
+    ConfigError,
+    expand_env_vars,
+    validate_config,
+    CONFIG_CACHE_SUFFIX
+)
 
 
 class TestExpandEnvVars:
@@ -84,6 +92,42 @@ class TestValidateConfig:
             validate_config(config)
         assert 'username' in str(exc_info.value)
     
+    @pytest.mark.parametrize('imap, field', [
+        ({'folder_connections': 0}, 'folder_connections'),
+        ({'target_batch_bytes': '4MB'}, 'target_batch_bytes')
+    ])
+    def test_invalid_imap_setting_raises_error(self, imap, field):
+        """Test that invalid IMAP tuning values raise ConfigError."""
+        config = {
+            'base_path': '/data',
+            'imap': {'timeout': 30, 'batch_size': 100, **imap},
+            'accounts': [{
+                'username': 'test@example.com',
+                'password': 'secret',
+                'host': 'imap.example.com',
+                'folders': ['INBOX']
+            }]
+        }
+        with pytest.raises(ConfigError) as exc_info:
+            validate_config(config)
+        assert field in str(exc_info.value)
+    
+    def test_invalid_compression_level_raises_error(self):
+        """Test that an out of range compression level raises ConfigError."""
+        config = {
+            'base_path': '/data',
+            'compression': {'level': 10},
+            'accounts': [{
+                'username': 'test@example.com',
+                'password': 'secret',
+                'host': 'imap.example.com',
+                'folders': ['INBOX']
+            }]
+        }
+        with pytest.raises(ConfigError) as exc_info:
+            validate_config(config)
+        assert 'compression.level' in str(exc_info.value)
+    
     def test_valid_config_passes(self):
         """Test that valid configuration passes validation."""
         config = {
@@ -100,6 +144,7 @@ class TestValidateConfig:
         
         # Check defaults are set
         assert config['concurrency'] == 4
+        assert config['compression']['level'] == 6
         assert 'retry_policy' in config
         assert config['accounts'][0]['port'] == 993
 
@@ -131,6 +176,7 @@ class TestLoadConfig:
             assert len(config['accounts']) == 1
         
         os.unlink(f.name)
+        os.unlink(f.name + CONFIG_CACHE_SUFFIX)
     
     def test_load_nonexistent_file_raises_error(self):
         """Test that loading nonexistent file raises ConfigError."""
@@ -149,3 +195,44 @@ class TestLoadConfig:
             assert 'Invalid YAML' in str(exc_info.value)
         
         os.unlink(f.name)
+
+
+class TestConfigCache:
+    """Tests for the parsed YAML cache."""
+    
+    def test_cache_is_used_and_invalidated(self, tmp_path):
+        """Test that the cache is reused until the config file changes."""
+        config_path = tmp_path / 'config.yaml'
+        config_path.write_text('base_path: /data\n')
+        
+        assert load_yaml_cached(str(config_path)) == {'base_path': '/data'}
+        cache_path = tmp_path / ('config.yaml' + CONFIG_CACHE_SUFFIX)
+        assert cache_path.exists()
+        
+        # A hand-edited cache with the same stamp is served as is
+        cached = json.loads(cache_path.read_text())
+        cached['config'] = {'base_path': '/cached'}
+        cache_path.write_text(json.dumps(cached))
+        assert load_yaml_cached(str(config_path)) == {'base_path': '/cached'}
+        
+        config_path.write_text('base_path: /data/new\n')
+        assert load_yaml_cached(str(config_path)) == {'base_path': '/data/new'}
+    
+    def test_env_vars_expanded_after_cache(self, tmp_path, monkeypatch):
+        """Test that environment variables are not frozen into the cache."""
+        config_path = tmp_path / 'config.yaml'
+        config_path.write_text('password: ${CACHE_TEST_PASSWORD}\n')
+        
+        monkeypatch.setenv('CACHE_TEST_PASSWORD', 'first')
+        assert expand_env_vars(load_yaml_cached(str(config_path)))['password'] == 'first'
+        monkeypatch.setenv('CACHE_TEST_PASSWORD', 'second')
+        assert expand_env_vars(load_yaml_cached(str(config_path)))['password'] == 'second'
+    
+    def test_non_json_values_not_cached(self, tmp_path):
+        """Test that YAML values without a JSON equivalent skip the cache."""
+        config_path = tmp_path / 'config.yaml'
+        config_path.write_text('1: one\nday: 2024-01-15\n')
+        
+        config = load_yaml_cached(str(config_path))
+        assert 1 in config
+        assert not (tmp_path / ('config.yaml' + CONFIG_CACHE_SUFFIX)).exists()
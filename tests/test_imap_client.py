@@ -0,0 +1,297 @@
+"""
+Tests for IMAP client module.
+"""
+
+import imaplib
+import pytest
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from src.imap_client import (
+    IMAPClient,
+    IMAPAuthenticationError,
+    IMAPConnectionPool,
+    IMAPError,
+    message_set,
+    size_batches,
+    with_retry
+)
+
+
+def raw_message(uid):
+    """Build raw email bytes for a message number."""
+    return (
+        f"Subject: Message {uid}\r\n"
+        f"From: sender@example.com\r\n"
+        f"\r\n"
+        f"Body {uid}\r\n"
+    ).encode()
+
+
+def fetch_response(uids):
+    """Build imaplib FETCH response data for message numbers."""
+    data = []
+    for uid in uids:
+        raw = raw_message(uid)
+        data.append((f"{uid} (BODY[] {{{len(raw)}}}".encode(), raw))
+        data.append(b')')
+    return data
+
+
+def parse_message_set(data):
+    """Expand an IMAP message set such as b'1:3,5' into message numbers."""
+    numbers = []
+    for part in data.split(b','):
+        start, _, end = part.partition(b':')
+        numbers.extend(range(int(start), int(end or start) + 1))
+    return numbers
+
+
+@pytest.fixture
+def client():
+    """Create a client with a mocked IMAP connection."""
+    client = IMAPClient('imap.example.com', 'user', 'secret')
+    client.connection = MagicMock()
+    return client
+
+
+class TestFetchBatch:
+    """Tests for batched message fetching."""
+    
+    def test_fetch_batch_single_command(self, client):
+        """Test that a batch is fetched with one FETCH command."""
+        client.connection.fetch.return_value = ('OK', fetch_response([3, 1, 2]))
+        
+        messages = client.fetch_batch([b'1', b'2', b'3'])
+        
+        client.connection.fetch.assert_called_once_with(b'1:3', '(BODY.PEEK[])')
+        assert [uid for _, _, uid in messages] == [b'1', b'2', b'3']
+        assert messages[0][0]['Subject'] == 'Message 1'
+        assert messages[0][1] == raw_message(1)
+    
+    def test_fetch_batch_skips_unsolicited_data(self, client):
+        """Test that unsolicited FETCH data and missing messages are skipped."""
+        data = fetch_response([1]) + [b'2 (FLAGS (\\Seen))']
+        client.connection.fetch.return_value = ('OK', data)
+        
+        messages = client.fetch_batch([b'1', b'2'])
+        assert [uid for _, _, uid in messages] == [b'1']
+    
+    def test_fetch_batch_failure(self, client):
+        """Test that a failed FETCH raises IMAPError."""
+        client.connection.fetch.return_value = ('NO', [b'error'])
+        
+        with pytest.raises(IMAPError):
+            client.fetch_batch([b'1'])
+
+
+class TestFetchMessagesByDate:
+    """Tests for fetching all messages of a date."""
+    
+    def test_fetch_in_batches(self, client):
+        """Test that messages are fetched batch_size at a time."""
+        client.connection.select.return_value = ('OK', [b'5'])
+        client.connection.search.return_value = ('OK', [b'1 2 3 4 5'])
+        client.connection.fetch.side_effect = lambda uids, _: (
+            'OK', fetch_response(parse_message_set(uids))
+        )
+        
+        results = list(client.fetch_messages_by_date('INBOX', datetime(2024, 1, 15), batch_size=2))
+        
+        assert [uid for _, _, uid in results] == ['1', '2', '3', '4', '5']
+        assert client.connection.fetch.call_count == 3
+    
+    def test_failed_batch_falls_back_to_single_fetches(self, client):
+        """Test that a failed batch is retried one message at a time."""
+        client.connection.select.return_value = ('OK', [b'2'])
+        client.connection.search.return_value = ('OK', [b'1 2'])
+        
+        def fetch(uids, _):
+            if len(parse_message_set(uids)) > 1 or uids == b'2':
+                return 'NO', [b'error']
+            return 'OK', fetch_response([int(uids)])
+        
+        client.connection.fetch.side_effect = fetch
+        
+        results = list(client.fetch_messages_by_date('INBOX', datetime(2024, 1, 15)))
+        assert [uid for _, _, uid in results] == ['1']
+    
+    def test_fetch_sized_batches(self, client):
+        """Test that target_batch_bytes groups messages by their sizes."""
+        sizes = {1: 10, 2: 10, 3: 50, 4: 10, 5: 10}
+        
+        def fetch(uids, items):
+            numbers = parse_message_set(uids)
+            if items == '(RFC822.SIZE)':
+                return 'OK', [f'{n} (RFC822.SIZE {sizes[n]})'.encode() for n in numbers]
+            return 'OK', fetch_response(numbers)
+        
+        client.connection.select.return_value = ('OK', [b'5'])
+        client.connection.search.return_value = ('OK', [b'1 2 3 4 5'])
+        client.connection.fetch.side_effect = fetch
+        
+        results = list(client.fetch_messages_by_date(
+            'INBOX', datetime(2024, 1, 15), target_batch_bytes=25
+        ))
+        
+        assert [uid for _, _, uid in results] == ['1', '2', '3', '4', '5']
+        fetched = [c.args[0] for c in client.connection.fetch.call_args_list[1:]]
+        assert fetched == [b'1:2', b'3', b'4:5']
+
+
+class TestMessageSet:
+    """Tests for message set and batch helpers."""
+    
+    def test_message_set_ranges(self):
+        """Test that consecutive numbers collapse into ranges."""
+        assert message_set([b'1', b'2', b'3', b'7', b'9', b'10']) == b'1:3,7,9:10'
+        assert message_set([b'5']) == b'5'
+    
+    def test_size_batches(self):
+        """Test batching by size and by message count."""
+        uids = [b'1', b'2', b'3', b'4']
+        sizes = {b'1': 3, b'2': 3, b'3': 10, b'4': 1}
+        
+        assert size_batches(uids, sizes, target_bytes=6) == [[b'1', b'2'], [b'3'], [b'4']]
+        assert size_batches(uids, sizes, target_bytes=100, max_messages=3) == [[b'1', b'2', b'3'], [b'4']]
+
+
+class TestIMAPConnectionPool:
+    """Tests for the IMAP connection pool."""
+    
+    @pytest.fixture
+    def connect(self, monkeypatch):
+        """Replace IMAPClient.connect with one attaching a mocked connection."""
+        connections = []
+        
+        def connect(client):
+            client.connection = MagicMock()
+            client.connection.noop.return_value = ('OK', [b''])
+            connections.append(client.connection)
+        
+        monkeypatch.setattr(IMAPClient, 'connect', connect)
+        return connections
+    
+    def test_released_client_is_reused(self, connect):
+        """Test that a released connection is handed out again."""
+        pool = IMAPConnectionPool()
+        client = pool.acquire('imap.example.com', 'user', 'secret')
+        pool.release(client)
+        
+        assert pool.acquire('imap.example.com', 'user', 'secret') is client
+        assert len(connect) == 1
+    
+    def test_clients_are_exclusive_per_user(self, connect):
+        """Test that a connection in use or for another user is not shared."""
+        pool = IMAPConnectionPool()
+        first = pool.acquire('imap.example.com', 'user', 'secret')
+        second = pool.acquire('imap.example.com', 'user', 'secret')
+        pool.release(first)
+        other = pool.acquire('imap.example.com', 'other', 'secret')
+        
+        assert len({id(first), id(second), id(other)}) == 3
+        assert len(connect) == 3
+    
+    def test_dead_client_is_replaced(self, connect):
+        """Test that a connection failing NOOP is closed and replaced."""
+        pool = IMAPConnectionPool()
+        client = pool.acquire('imap.example.com', 'user', 'secret')
+        stale = client.connection
+        stale.noop.side_effect = OSError('connection reset')
+        pool.release(client)
+        
+        fresh = pool.acquire('imap.example.com', 'user', 'secret')
+        
+        assert fresh.connection is not stale
+        stale.logout.assert_called_once()
+    
+    def test_close_logs_out_idle_clients(self, connect):
+        """Test that close() logs out every idle connection."""
+        pool = IMAPConnectionPool()
+        client = pool.acquire('imap.example.com', 'user', 'secret')
+        connection = client.connection
+        pool.release(client)
+        
+        pool.close()
+        
+        connection.logout.assert_called_once()
+        pool.acquire('imap.example.com', 'user', 'secret')
+        assert len(connect) == 2
+    
+    def test_release_after_close_logs_out(self, connect):
+        """Test that a client still in use at close() is not pooled later."""
+        pool = IMAPConnectionPool()
+        client = pool.acquire('imap.example.com', 'user', 'secret')
+        connection = client.connection
+        
+        pool.close()
+        pool.release(client)
+        
+        connection.logout.assert_called_once()
+        assert pool.acquire('imap.example.com', 'user', 'secret') is not client
+
+
+class TestConnect:
+    """Tests for connecting and logging in."""
+    
+    def test_rejected_login_raises_authentication_error(self, monkeypatch):
+        """Test that LOGIN answered with NO raises IMAPAuthenticationError."""
+        connection = MagicMock()
+        connection.login.side_effect = imaplib.IMAP4.error('[AUTHENTICATIONFAILED] Invalid credentials')
+        monkeypatch.setattr('src.imap_client.imaplib.IMAP4_SSL', lambda *args, **kwargs: connection)
+        
+        with pytest.raises(IMAPAuthenticationError):
+            IMAPClient('imap.example.com', 'user', 'wrong').connect()
+    
+    def test_dropped_login_raises_imap_error(self, monkeypatch):
+        """Test that a connection dropped during LOGIN stays retryable."""
+        connection = MagicMock()
+        connection.login.side_effect = imaplib.IMAP4.abort('socket error: EOF')
+        monkeypatch.setattr('src.imap_client.imaplib.IMAP4_SSL', lambda *args, **kwargs: connection)
+        
+        with pytest.raises(IMAPError) as exc_info:
+            IMAPClient('imap.example.com', 'user', 'secret').connect()
+        assert not isinstance(exc_info.value, IMAPAuthenticationError)
+
+
+class TestWithRetry:
+    """Tests for retry with backoff."""
+    
+    def test_jittered_delays_are_capped(self, monkeypatch):
+        """Test that delays stay within the growing, capped backoff."""
+        sleeps = []
+        monkeypatch.setattr('src.imap_client.time.sleep', sleeps.append)
+        func = MagicMock(side_effect=[IMAPError('down')] * 4 + ['ok'])
+        
+        result = with_retry(func, max_retries=4, initial_delay=5, backoff_multiplier=2, max_delay=12)
+        
+        assert result == 'ok'
+        assert func.call_count == 5
+        for sleep_for, bound in zip(sleeps, [5, 10, 12, 12]):
+            assert 0 <= sleep_for <= bound
+    
+    def test_raises_last_exception(self, monkeypatch):
+        """Test that the last error is raised once retries are exhausted."""
+        monkeypatch.setattr('src.imap_client.time.sleep', lambda _: None)
+        func = MagicMock(side_effect=[IMAPError('first'), IMAPError('last')])
+        
+        with pytest.raises(IMAPError, match='last'):
+            with_retry(func, max_retries=1)
+    
+    def test_deadline_stops_retries(self, monkeypatch):
+        """Test that no retry starts once the deadline has passed."""
+        monkeypatch.setattr('src.imap_client.time.sleep', lambda _: pytest.fail('slept'))
+        func = MagicMock(side_effect=IMAPError('down'))
+        
+        with pytest.raises(IMAPError):
+            with_retry(func, max_retries=3, deadline=0)
+        assert func.call_count == 1
+    
+    def test_stop_on_is_not_retried(self, monkeypatch):
+        """Test that stop_on exceptions are raised without retrying."""
+        monkeypatch.setattr('src.imap_client.time.sleep', lambda _: pytest.fail('slept'))
+        func = MagicMock(side_effect=IMAPAuthenticationError('login failed'))
+        
+        with pytest.raises(IMAPAuthenticationError):
+            with_retry(func, max_retries=3, stop_on=(IMAPAuthenticationError,))
+        assert func.call_count == 1
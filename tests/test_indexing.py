@@ -9,11 +9,14 @@ import csv
 import pytest
 from datetime import datetime
 from email.message import EmailMessage
+from email.parser import BytesHeaderParser
+from email.utils import parsedate_to_datetime
 
 from src.indexing import (
     Indexer,
     decode_email_header,
     parse_email_date,
+    load_message_from_file,
     extract_message_info
 )
 
@@ -35,6 +38,17 @@ class TestDecodeEmailHeader:
         """Test decoding empty header."""
         result = decode_email_header('')
         assert result == ''
+    
+    def test_decode_encoded_word_header(self):
+        """Test decoding RFC 2047 encoded header, repeated."""
+        header = '=?utf-8?q?Fattura_n=C2=B0_1?='
+        assert decode_email_header(header) == 'Fattura n° 1'
+        assert decode_email_header(header) == 'Fattura n° 1'
+    
+    def test_decode_header_object(self):
+        """Test decoding an email.header.Header value."""
+        from email.header import Header
+        assert decode_email_header(Header('Città', 'utf-8')) == 'Città'
 
 
 class TestParseEmailDate:
@@ -49,6 +63,23 @@ class TestParseEmailDate:
         assert result.month == 1
         assert result.day == 15
     
+    @pytest.mark.parametrize('date_str', [
+        'Mon, 15 Jan 2024 10:30:00 +0100',
+        '5 Feb 2024 08:00:00 -0530 (EST)',
+        'Mon, 15 Jan 2024 10:30:00 -0000',
+        'Mon, 15 Jan 24 10:30 +0100',
+        'Tue, 1 Oct 2024 08:00:00 GMT',
+        'Mon, 15 Jan 2024 25:30:00 +0100'
+    ])
+    def test_parse_matches_email_utils(self, date_str):
+        """Test that the fast path agrees with parsedate_to_datetime."""
+        try:
+            expected = parsedate_to_datetime(date_str).isoformat()
+        except ValueError:
+            expected = None
+        result = parse_email_date(date_str)
+        assert (result.isoformat() if result else None) == expected
+    
     def test_parse_none_date(self):
         """Test parsing None date."""
         result = parse_email_date(None)
@@ -87,6 +118,69 @@ class TestExtractMessageInfo:
             assert info['size'] > 0
         
         os.unlink(f.name)
+    
+    def test_extract_with_known_size(self):
+        """Test that a known size is used without touching the file."""
+        msg = EmailMessage()
+        msg['Subject'] = 'Test Subject'
+        
+        info = extract_message_info(msg, '1', 'INBOX', '/nonexistent/1_test.eml', size=42)
+        assert info['size'] == 42
+        
+        info = extract_message_info(msg, '1', 'INBOX', '/nonexistent/1_test.eml')
+        assert info['size'] == 0
+    
+    def test_repeated_values_are_shared(self):
+        """Test that folder and address values are stored once."""
+        infos = []
+        for uid in ('1', '2'):
+            msg = EmailMessage()
+            msg['From'] = 'sender@example.com'
+            infos.append(extract_message_info(msg, uid, ''.join(['IN', 'BOX']), f'/x/{uid}.eml', size=1))
+        
+        assert infos[0]['folder'] is infos[1]['folder']
+        assert infos[0]['from'] is infos[1]['from']
+        assert type(infos[0]['from']) is str
+    
+    def test_extract_first_header_any_case(self):
+        """Test that header names match case-insensitively and the first one wins."""
+        raw = (
+            b'SUBJECT: First\r\n'
+            b'subject: Second\r\n'
+            b'from: sender@example.com\r\n'
+            b'message-id: <1@example.com>\r\n'
+            b'\r\n'
+        )
+        msg = BytesHeaderParser().parsebytes(raw)
+        
+        info = extract_message_info(msg, '1', 'INBOX', '/nonexistent/1_test.eml', size=1)
+        assert info['subject'] == 'First'
+        assert info['from'] == 'sender@example.com'
+        assert info['cc'] == ''
+        assert info['message_id'] == '<1@example.com>'
+
+
+class TestLoadMessageFromFile:
+    """Tests for loading messages from .eml files."""
+    
+    def test_only_headers_are_loaded(self, tmp_path):
+        """Test that headers are parsed and the body is not read."""
+        msg = EmailMessage()
+        msg['Subject'] = 'Test Subject'
+        msg['From'] = 'sender@example.com'
+        msg.set_content('Body\n' * 1000)
+        path = tmp_path / '1_Test_Subject.eml'
+        path.write_bytes(msg.as_bytes())
+        
+        loaded = load_message_from_file(str(path))
+        
+        assert loaded['Subject'] == 'Test Subject'
+        assert loaded['From'] == 'sender@example.com'
+        assert loaded.get_payload() == ''
+    
+    def test_missing_file(self, tmp_path):
+        """Test that a missing file returns None."""
+        assert load_message_from_file(str(tmp_path / 'missing.eml')) is None
 
 
 class TestIndexer:
@@ -184,6 +278,25 @@ class TestIndexer:
                 assert stats['total_messages'] == 2
                 assert stats['folders']['INBOX'] == 1
                 assert stats['folders']['Posta inviata'] == 1
+                assert stats['total_size'] == os.path.getsize(f1.name) + os.path.getsize(f2.name)
             
             os.unlink(f2.name)
         os.unlink(f1.name)
+    
+    def test_load_messages_from_files_keeps_order(self, indexer):
+        """Test that files loaded in parallel are indexed in the given order."""
+        folder_path = os.path.join(indexer.account_path, 'INBOX')
+        os.makedirs(folder_path)
+        files = []
+        for uid in range(1, 51):
+            msg = EmailMessage()
+            msg['Subject'] = f'Message {uid}'
+            filepath = os.path.join(folder_path, f'{uid}_message.eml')
+            with open(filepath, 'wb') as f:
+                f.write(msg.as_bytes())
+            files.append(filepath)
+        
+        indexer.load_messages_from_files({'INBOX': files})
+        
+        assert [m['uid'] for m in indexer.messages] == [str(uid) for uid in range(1, 51)]
+        assert indexer.messages[49]['subject'] == 'Message 50'
@@ -10,8 +10,10 @@ from src.notifications import (
     format_report_html,
     format_report_text,
     send_notification,
+    Notifier,
     validate_notification_config,
-    NotificationError
+    NotificationError,
+    _utf8_text_part
 )
 
 
@@ -108,6 +110,19 @@ class TestFormatReportHtml:
         assert 'class="header error"' in result
 
 
+class TestUtf8TextPart:
+    """Tests for pre-encoded text parts."""
+    
+    def test_matches_mimetext(self):
+        """Test that the part serializes like MIMEText with utf-8."""
+        from email.mime.text import MIMEText
+        content = 'Città ✅ ' * 50 + '\n<b>fine</b>'
+        
+        for subtype in ('plain', 'html'):
+            expected = MIMEText(content, subtype, 'utf-8').as_bytes()
+            assert _utf8_text_part(content, subtype).as_bytes() == expected
+
+
 class TestValidateNotificationConfig:
     """Tests for notification configuration validation."""
     
@@ -198,6 +213,21 @@ class TestValidateNotificationConfig:
         errors = validate_notification_config(config)
         assert any('send_on' in e for e in errors)
     
+    def test_invalid_format_value(self):
+        """Test that invalid format value is detected."""
+        config = {
+            'enabled': True,
+            'recipients': ['admin@example.com'],
+            'format': 'pdf',
+            'smtp': {
+                'host': 'smtp.example.com',
+                'username': 'user',
+                'password': 'pass'
+            }
+        }
+        errors = validate_notification_config(config)
+        assert any('format' in e for e in errors)
+    
     def test_single_recipient_string(self):
         """Test that single recipient as string is valid."""
         config = {
@@ -457,3 +487,118 @@ class TestSendNotification:
         call_args = mock_server.sendmail.call_args
         recipients = call_args[0][1]
         assert recipients == ['admin@example.com']
+
+
+class TestNotifier:
+    """Tests for Notifier class."""
+    
+    CONFIG = {
+        'enabled': True,
+        'recipients': ['admin@example.com'],
+        'smtp': {
+            'host': 'smtp.example.com',
+            'port': 587,
+            'username': 'user',
+            'password': 'pass'
+        }
+    }
+    REPORT = {'accounts_processed': 1, 'accounts_with_errors': 0, 'total_errors': 0}
+    
+    @patch('src.notifications.smtplib.SMTP')
+    def test_connection_reused(self, mock_smtp_class):
+        """Test that consecutive sends share one SMTP connection."""
+        mock_server = MagicMock()
+        mock_smtp_class.return_value = mock_server
+        
+        with Notifier(self.CONFIG) as notifier:
+            assert notifier.send(self.REPORT, datetime(2024, 1, 15)) is True
+            assert notifier.send(self.REPORT, datetime(2024, 1, 16)) is True
+        
+        mock_smtp_class.assert_called_once()
+        mock_server.login.assert_called_once_with('user', 'pass')
+        assert mock_server.sendmail.call_count == 2
+        mock_server.quit.assert_called_once()
+    
+    @patch('src.notifications.smtplib.SMTP')
+    def test_reconnect_after_disconnect(self, mock_smtp_class):
+        """Test that a dropped connection is reopened once."""
+        import smtplib
+        stale_server = MagicMock()
+        fresh_server = MagicMock()
+        mock_smtp_class.side_effect = [stale_server, fresh_server]
+        
+        with Notifier(self.CONFIG) as notifier:
+            notifier.send(self.REPORT, datetime(2024, 1, 15))
+            stale_server.sendmail.side_effect = smtplib.SMTPServerDisconnected()
+            assert notifier.send(self.REPORT, datetime(2024, 1, 16)) is True
+        
+        assert mock_smtp_class.call_count == 2
+        fresh_server.sendmail.assert_called_once()
+        # The retry sends the message serialized for the first attempt
+        assert fresh_server.sendmail.call_args[0][2] is stale_server.sendmail.call_args[0][2]
+        assert b'\r\n\r\n' in fresh_server.sendmail.call_args[0][2]
+    
+    @patch('src.notifications.smtplib.SMTP')
+    def test_reconnect_after_connection_reset(self, mock_smtp_class):
+        """Test that a connection reset by the server is reopened."""
+        stale_server = MagicMock()
+        fresh_server = MagicMock()
+        mock_smtp_class.side_effect = [stale_server, fresh_server]
+        
+        with Notifier(self.CONFIG) as notifier:
+            notifier.send(self.REPORT, datetime(2024, 1, 15))
+            stale_server.sendmail.side_effect = ConnectionResetError()
+            assert notifier.send(self.REPORT, datetime(2024, 1, 16)) is True
+        
+        stale_server.close.assert_called_once()
+        fresh_server.sendmail.assert_called_once()
+    
+    @patch('src.notifications.smtplib.SMTP')
+    def test_reconnect_after_421_timeout(self, mock_smtp_class):
+        """Test that a 421 reply on a reused connection opens a new one."""
+        import smtplib
+        stale_server = MagicMock()
+        fresh_server = MagicMock()
+        mock_smtp_class.side_effect = [stale_server, fresh_server]
+        
+        with Notifier(self.CONFIG) as notifier:
+            notifier.send(self.REPORT, datetime(2024, 1, 15))
+            stale_server.sendmail.side_effect = smtplib.SMTPSenderRefused(
+                421, b'4.4.2 timeout exceeded', 'pec-archiver@example.com'
+            )
+            assert notifier.send(self.REPORT, datetime(2024, 1, 16)) is True
+        
+        stale_server.close.assert_called_once()
+        fresh_server.sendmail.assert_called_once()
+    
+    @patch('src.notifications.smtplib.SMTP')
+    def test_other_smtp_error_not_retried(self, mock_smtp_class):
+        """Test that a non-421 SMTP error on a reused connection is raised."""
+        import smtplib
+        mock_server = MagicMock()
+        mock_smtp_class.return_value = mock_server
+        
+        with Notifier(self.CONFIG) as notifier:
+            notifier.send(self.REPORT, datetime(2024, 1, 15))
+            mock_server.sendmail.side_effect = smtplib.SMTPSenderRefused(
+                550, b'5.7.1 sender rejected', 'pec-archiver@example.com'
+            )
+            with pytest.raises(NotificationError):
+                notifier.send(self.REPORT, datetime(2024, 1, 16))
+        
+        mock_smtp_class.assert_called_once()
+    
+    @patch('src.notifications.format_report_html')
+    @patch('src.notifications.smtplib.SMTP')
+    def test_text_format_skips_html(self, mock_smtp_class, mock_format_html):
+        """Test that format='text' sends a single plain text part."""
+        mock_server = MagicMock()
+        mock_smtp_class.return_value = mock_server
+        
+        with Notifier({**self.CONFIG, 'format': 'text'}) as notifier:
+            assert notifier.send(self.REPORT, datetime(2024, 1, 15)) is True
+        
+        mock_format_html.assert_not_called()
+        message = mock_server.sendmail.call_args[0][2]
+        assert b'Content-Type: text/plain' in message
+        assert b'multipart' not in message
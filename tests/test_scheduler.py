@@ -0,0 +1,79 @@
+"""
+Tests for scheduler module.
+"""
+
+import json
+import threading
+import time
+import pytest
+from datetime import datetime
+
+from src.scheduler import PECScheduler
+
+
+@pytest.fixture
+def config(tmp_path):
+    """Create a configuration with a fast and a hanging account."""
+    return {
+        'base_path': str(tmp_path),
+        'concurrency': 2,
+        'imap': {'timeout': 30, 'batch_size': 100, 'account_deadline_seconds': 0.2},
+        'notifications': {'enabled': False},
+        'accounts': [
+            {'username': 'fast@pec.it', 'password': 'x', 'host': 'imap.example.com', 'folders': ['INBOX']},
+            {'username': 'slow@pec.it', 'password': 'x', 'host': 'imap.example.com', 'folders': ['INBOX']}
+        ]
+    }
+
+
+class TestRunArchiveJob:
+    """Tests for running the archive job over all accounts."""
+    
+    def test_account_deadline(self, config, tmp_path, monkeypatch):
+        """Test that an account over its deadline is reported as timed out."""
+        release = threading.Event()
+        summary_path = tmp_path / 'summary.json'
+        summary_path.write_text(json.dumps({
+            'account': 'fast@pec.it',
+            'status': 'success',
+            'statistics': {'total_messages': 3, 'total_size_bytes': 30},
+            'error_count': 0
+        }))
+        
+        def process(worker, target_date):
+            if worker.username == 'slow@pec.it':
+                release.wait(5)
+            return str(summary_path)
+        
+        monkeypatch.setattr('src.scheduler.AccountWorker.process', process)
+        
+        with PECScheduler(config=config) as scheduler:
+            try:
+                report = scheduler.run_archive_job(datetime(2024, 1, 15))
+            finally:
+                release.set()
+        
+        assert report['accounts_processed'] == 2
+        assert report['accounts_successful'] == 1
+        assert report['accounts_with_errors'] == 1
+        assert report['total_messages'] == 3
+        assert {'account': 'slow@pec.it', 'status': 'timeout', 'messages': 0} in report['accounts']
+    
+    def test_close_does_not_wait_for_timed_out_worker(self, config, monkeypatch):
+        """Test that close() returns while a timed-out worker is still running."""
+        release = threading.Event()
+        
+        def process(worker, target_date):
+            release.wait(5)
+            raise RuntimeError('interrupted')
+        
+        monkeypatch.setattr('src.scheduler.AccountWorker.process', process)
+        
+        scheduler = PECScheduler(config=config)
+        try:
+            scheduler.run_archive_job(datetime(2024, 1, 15))
+            start = time.monotonic()
+            scheduler.close()
+            assert time.monotonic() - start < 1
+        finally:
+            release.set()
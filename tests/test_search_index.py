@@ -0,0 +1,141 @@
+"""
+Tests for search index module.
+"""
+
+import os
+import json
+import tempfile
+import pytest
+from datetime import date
+
+from src.search_index import SearchIndex, search_result_key
+
+
+def write_index(base_path, account, date_str, emails):
+    """Write an index.json for an account and date."""
+    date_path = os.path.join(base_path, account, date_str[:4], date_str)
+    os.makedirs(date_path, exist_ok=True)
+    with open(os.path.join(date_path, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump(emails, f)
+
+
+def make_email(uid, subject, sender='a@example.com', to='b@example.com', cc=''):
+    """Build an index.json entry."""
+    return {
+        'uid': uid,
+        'folder': 'INBOX',
+        'filename': f'{uid}_x.eml',
+        'filepath': f'INBOX/{uid}_x.eml',
+        'subject': subject,
+        'from': sender,
+        'to': to,
+        'cc': cc,
+        'date': '',
+        'message_id': f'<{uid}@example.com>',
+        'size': 10
+    }
+
+
+class TestSearchIndex:
+    """Tests for SearchIndex class."""
+    
+    @pytest.fixture
+    def archive(self):
+        """Create an archive with two accounts and three dates."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write_index(tmpdir, 'alpha', '2024-01-15', [
+                make_email('1', 'Fattura Gennaio'),
+                make_email('2', 'Test Subject 10', cc='Ufficio@Example.com')
+            ])
+            write_index(tmpdir, 'alpha', '2024-01-16', [
+                make_email('3', 'Test Subject 1')
+            ])
+            write_index(tmpdir, 'beta', '2023-12-31', [
+                make_email('4', 'Fattura Dicembre', sender='x@pec.it')
+            ])
+            yield tmpdir
+    
+    @pytest.fixture
+    def index(self, archive):
+        """Create a refreshed search index over the archive."""
+        index = SearchIndex(archive)
+        index.refresh()
+        return index
+    
+    def test_refresh_loads_all_files(self, archive):
+        """Test that the first refresh loads every index.json."""
+        index = SearchIndex(archive)
+        assert index.refresh() == 3
+        assert index.refresh() == 0
+    
+    def test_search_subject_substring(self, index):
+        """Test case-insensitive substring match on subject."""
+        results, total = index.search(subject='test subject 1')
+        assert total == 2
+        # Newest date first
+        assert results[0]['date'] == '2024-01-16'
+    
+    def test_search_short_term(self, index):
+        """Test that terms shorter than a trigram still match."""
+        _, total = index.search(subject='10')
+        assert total == 1
+    
+    def test_search_recipient_matches_cc(self, index):
+        """Test that recipient search also matches Cc."""
+        results, total = index.search(recipient='ufficio@example')
+        assert total == 1
+        assert results[0]['email']['uid'] == '2'
+    
+    def test_search_account_and_date_range(self, index):
+        """Test account and date range filters."""
+        _, total = index.search(account='alpha', date_from=date(2024, 1, 16))
+        assert total == 1
+        _, total = index.search(date_to=date(2023, 12, 31))
+        assert total == 1
+    
+    def test_search_pagination(self, index):
+        """Test limit/offset pagination."""
+        results, total = index.search(subject='fattura', limit=1, offset=1)
+        assert total == 2
+        assert len(results) == 1
+        assert results[0]['account'] == 'beta'
+    
+    def test_search_after_key(self, index):
+        """Test keyset pagination with the after parameter."""
+        first, total = index.search(subject='fattura', limit=1)
+        second, _ = index.search(subject='fattura', limit=1, after=search_result_key(first[0]))
+        assert total == 2
+        assert first[0]['email']['uid'] == '1'
+        assert second[0]['email']['uid'] == '4'
+    
+    def test_refresh_picks_up_changes(self, archive, index):
+        """Test that modified and removed index files are re-synced."""
+        write_index(archive, 'alpha', '2024-01-16', [
+            make_email('3', 'Test Subject 1'),
+            make_email('5', 'Fattura Febbraio')
+        ])
+        os.remove(os.path.join(archive, 'beta', '2023', '2023-12-31', 'index.json'))
+        
+        assert index.refresh() == 2
+        results, total = index.search(subject='fattura')
+        assert total == 2
+        assert {r['email']['uid'] for r in results} == {'1', '5'}
+    
+    def test_short_term_folds_non_ascii(self, tmp_path):
+        """Test that short terms fold accented letters like the filesystem scan."""
+        write_index(str(tmp_path), 'alpha', '2024-01-15', [make_email('1', 'È arrivata')])
+        index = SearchIndex(str(tmp_path))
+        index.refresh()
+        
+        _, total = index.search(subject='è')
+        assert total == 1
+    
+    def test_refresh_if_stale(self, archive, monkeypatch):
+        """Test that only the first or a stale refresh_if_stale call refreshes."""
+        index = SearchIndex(archive)
+        index.refresh_if_stale(max_age=3600)
+        _, total = index.search(subject='fattura')
+        assert total == 2
+        
+        monkeypatch.setattr(index, '_refresh', lambda: pytest.fail('refreshed'))
+        index.refresh_if_stale(max_age=3600)
@@ -6,9 +6,9 @@ import os
 import tempfile
 import pytest
 from datetime import datetime
-from email.message import EmailMessage
+from email.message import EmailMessage, Message
 
-from src.storage import Storage, sanitize_filename, sanitize_folder_name
+from src.storage import Storage, StorageError, sanitize_filename, sanitize_folder_name
 
 
 class TestSanitizeFilename:
@@ -73,6 +73,17 @@ class TestStorage:
         
         assert 'INBOX' in path
     
+    def test_folder_path_is_per_day(self, storage):
+        """Test that cached paths depend only on account, day and folder."""
+        morning = storage.get_folder_path('test@example.com', datetime(2024, 1, 15, 8), 'INBOX')
+        evening = storage.get_folder_path('test@example.com', datetime(2024, 1, 15, 20), 'INBOX')
+        next_day = storage.get_folder_path('test@example.com', datetime(2024, 1, 16), 'INBOX')
+        other = storage.get_folder_path('test@example.com', datetime(2024, 1, 15), 'Posta inviata')
+        
+        assert morning == evening
+        assert '2024-01-16' in next_day
+        assert other.endswith('Posta_inviata')
+    
     def test_create_directory_structure(self, storage):
         """Test directory structure creation."""
         date = datetime(2024, 1, 15)
@@ -122,6 +133,32 @@ class TestStorage:
             content = f.read()
         assert b'Test Subject' in content
     
+    def test_ensure_folder(self, storage):
+        """Test that ensure_folder creates the folder directory."""
+        date = datetime(2024, 1, 15)
+        
+        folder_path = storage.ensure_folder('test@example.com', date, 'Posta inviata')
+        
+        assert os.path.isdir(folder_path)
+        assert folder_path == storage.get_folder_path('test@example.com', date, 'Posta inviata')
+    
+    def test_ensure_folder_after_structure(self, storage, monkeypatch):
+        """Test that folders created with the structure are not created again."""
+        date = datetime(2024, 1, 15)
+        storage.create_directory_structure('test@example.com', date, ['INBOX'])
+        monkeypatch.setattr('src.storage.os.makedirs', lambda *args, **kwargs: pytest.fail('makedirs'))
+        
+        folder_path = storage.ensure_folder('test@example.com', date, 'INBOX')
+        assert os.path.isdir(folder_path)
+    
+    def test_save_eml_missing_folder(self, storage):
+        """Test that saving into a missing folder raises StorageError."""
+        msg = EmailMessage()
+        msg['Subject'] = 'Test'
+        
+        with pytest.raises(StorageError):
+            storage.save_eml('test@example.com', datetime(2024, 1, 15), 'INBOX', '1', msg, msg.as_bytes())
+    
     def test_get_saved_messages(self, storage):
         """Test getting list of saved messages."""
         date = datetime(2024, 1, 15)
@@ -138,3 +175,46 @@ class TestStorage:
         messages = storage.get_saved_messages('test@example.com', date, 'INBOX')
         assert len(messages) == 2
         assert all(m.endswith('.eml') for m in messages)
+    
+    def test_get_saved_messages_missing_folder(self, storage):
+        """Test that a folder that was never created has no saved messages."""
+        assert storage.get_saved_messages('test@example.com', datetime(2024, 1, 15), 'INBOX') == []
+    
+    def test_sync_folder(self, storage, monkeypatch):
+        """Test that sync_folder fsyncs every .eml file and the directories."""
+        date = datetime(2024, 1, 15)
+        msg = EmailMessage()
+        msg['Subject'] = 'Test'
+        storage.create_directory_structure('test@example.com', date, ['INBOX'])
+        storage.save_eml('test@example.com', date, 'INBOX', '1', msg, msg.as_bytes())
+        storage.save_eml('test@example.com', date, 'INBOX', '2', msg, msg.as_bytes())
+        
+        synced = []
+        monkeypatch.setattr('src.storage._fsync_path', synced.append)
+        
+        assert storage.sync_folder('test@example.com', date, 'INBOX') == 2
+        folder_path = storage.get_folder_path('test@example.com', date, 'INBOX')
+        assert synced[-2:] == [folder_path, storage.get_account_path('test@example.com', date)]
+        assert all(path.endswith('.eml') for path in synced[:2])
+    
+    def test_save_eml_to(self, storage):
+        """Test saving into a folder path obtained from ensure_folder."""
+        msg = EmailMessage()
+        msg['Subject'] = 'Test Subject'
+        folder_path = storage.ensure_folder('test@example.com', datetime(2024, 1, 15), 'INBOX')
+        
+        filepath = storage.save_eml_to(folder_path, '7', msg, b'raw')
+        
+        assert filepath == os.path.join(folder_path, '7_Test Subject.eml')
+        with open(filepath, 'rb') as f:
+            assert f.read() == b'raw'
+    
+    def test_save_eml_encoded_subject(self, storage):
+        """Test that an RFC 2047 encoded subject is decoded for the filename."""
+        msg = Message()
+        msg['Subject'] = '=?utf-8?B?UmljZXZ1dGEgZGkgY29uc2VnbmE=?='
+        folder_path = storage.ensure_folder('test@example.com', datetime(2024, 1, 15), 'INBOX')
+        
+        filepath = storage.save_eml_to(folder_path, '8', msg, b'raw')
+        
+        assert os.path.basename(filepath) == '8_Ricevuta di consegna.eml'
@@ -0,0 +1,111 @@
+"""
+Tests for account worker module.
+"""
+
+import os
+import pytest
+from datetime import datetime
+from email.message import EmailMessage
+from unittest.mock import MagicMock
+
+from src.worker import AccountWorker
+from src.indexing import Indexer
+
+
+def make_message(uid):
+    """Build a (Message, raw bytes, UID) tuple as yielded by the IMAP client."""
+    msg = EmailMessage()
+    msg['Subject'] = f'Message {uid}'
+    msg['From'] = 'sender@example.com'
+    msg.set_content(f'Body {uid}')
+    return msg, msg.as_bytes(), str(uid)
+
+
+@pytest.fixture
+def worker(tmp_path):
+    """Create a worker storing into a temporary directory."""
+    return AccountWorker(
+        account_config={
+            'username': 'test@pec.it',
+            'password': 'secret',
+            'host': 'imap.example.com',
+            'folders': ['INBOX']
+        },
+        base_path=str(tmp_path)
+    )
+
+
+class TestFetchFolderMessages:
+    """Tests for fetching and saving a folder's messages."""
+    
+    def test_messages_saved_and_indexed(self, worker):
+        """Test that every fetched message is saved and indexed in order."""
+        target_date = datetime(2024, 1, 15)
+        account_path = worker.storage.create_directory_structure(
+            worker.username, target_date, worker.folders
+        )
+        indexer = Indexer(account_path)
+        client = MagicMock()
+        client.fetch_messages_by_date.return_value = iter(
+            [make_message(uid) for uid in range(1, 101)]
+        )
+        
+        worker._fetch_folder_messages(client, 'INBOX', target_date, indexer)
+        
+        assert [m['uid'] for m in indexer.messages] == [str(uid) for uid in range(1, 101)]
+        assert len(worker.storage.get_saved_messages(worker.username, target_date, 'INBOX')) == 100
+        assert worker.errors == []
+    
+    def test_writer_error_is_raised(self, worker):
+        """Test that an unexpected error while saving reaches the caller."""
+        target_date = datetime(2024, 1, 15)
+        indexer = MagicMock()
+        indexer.add_message.side_effect = RuntimeError('index broken')
+        client = MagicMock()
+        client.fetch_messages_by_date.return_value = iter(
+            [make_message(uid) for uid in range(1, 201)]
+        )
+        
+        with pytest.raises(RuntimeError, match='index broken'):
+            worker._fetch_folder_messages(client, 'INBOX', target_date, indexer)
+
+
+class TestFetchMessages:
+    """Tests for fetching all folders of an account."""
+    
+    def test_folders_fetched_concurrently(self, tmp_path):
+        """Test that folder_connections > 1 fetches each folder on a pooled client."""
+        pool = MagicMock()
+        
+        def acquire(**kwargs):
+            client = MagicMock()
+            client.fetch_messages_by_date.side_effect = lambda folder, *args, **kw: iter(
+                [make_message(uid) for uid in range(1, 51)]
+            )
+            return client
+        
+        pool.acquire.side_effect = acquire
+        worker = AccountWorker(
+            account_config={
+                'username': 'test@pec.it',
+                'password': 'secret',
+                'host': 'imap.example.com',
+                'folders': ['INBOX', 'Posta inviata', 'Archivio']
+            },
+            base_path=str(tmp_path),
+            imap_settings={'timeout': 30, 'batch_size': 100, 'folder_connections': 2},
+            imap_pool=pool
+        )
+        target_date = datetime(2024, 1, 15)
+        indexer = Indexer(worker.storage.get_account_path(worker.username, target_date))
+        
+        worker._fetch_messages(target_date, indexer)
+        
+        stats = indexer.get_stats()
+        assert stats['total_messages'] == 150
+        assert stats['folders'] == {'INBOX': 50, 'Posta inviata': 50, 'Archivio': 50}
+        for entry in indexer.messages:
+            assert os.path.basename(os.path.dirname(entry['filepath'])) == entry['folder'].replace(' ', '_')
+        assert pool.acquire.call_count == 4
+        assert pool.release.call_count == 4
+        assert worker.errors == []